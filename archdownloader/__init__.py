@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+"""
+Descargador Universal (ArchDownloader)
+
+- core: motor de descargas sin Qt (yt-dlp y descargas directas)
+- dedup: índice de contenido (hash → ruta) para evitar copias duplicadas
+- checksums: hash esperado de cada descarga (usuario, cabeceras o SHA256SUMS)
+- history: historial de URLs para repetir descargas de forma condicional
+- bandwidth: limitador de velocidad global, por servidor y por descarga
+- retry: reintentos con espera exponencial por tipo de error
+- concurrency: ajuste automático de conexiones y descargas simultáneas
+- categories: clasificación en carpetas, reglas del usuario y detección del tipo por el contenido
+- paths: rutas de los datos de la aplicación (sin dependencias, para el arranque)
+- postprocess: grupo de post-procesado con ffmpeg (MP3, contenedor, metadatos)
+- infocache: caché del info JSON de yt-dlp (caducidad de URLs firmadas, LRU, selector de formatos)
+- startup: perfil del arranque de la interfaz (--startup-profile)
+- metrics: métricas por descarga en JSONL y en formato Prometheus
+- logbuffer: registro acotado que la interfaz pinta por lotes
+- jobs: cola de descargas con límites de concurrencia
+- cli:  modo por lotes para servidores y cron
+- gui:  interfaz gráfica PyQt6
+"""
+
+__version__ = "2.0"
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Limitador de ancho de banda con cubetas de tokens global, por servidor y por descarga
+Los límites se pueden cambiar en caliente y el ancho de banda libre se reparte entre las descargas activas
+"""
+
+import re
+import time
+import threading
+
+def parse_rate(text):
+    """Convierte velocidades como '500K', '2M' o '1.5MB' a bytes/s (0 = sin límite)"""
+    if isinstance(text, (int, float)):
+        return max(0, int(text))
+    match = re.match(r'^\s*([\d.]+)\s*([KMG]?)(i?B)?(/s)?\s*$', str(text), re.IGNORECASE)
+    if not match:
+        raise ValueError(f"Velocidad no válida: {text}")
+    multiplier = 1024 ** ' KMG'.index(match.group(2).upper() or ' ')
+    return int(float(match.group(1)) * multiplier)
+
+class TokenBucket:
+    """Cubeta de tokens que admite deuda: quien pide más de lo disponible espera su turno"""
+    
+    def __init__(self, rate=0):
+        self.rate = rate  # bytes/s, 0 = sin límite
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    @property
+    def burst(self):
+        # Ráfaga pequeña para que la media se ajuste al límite incluso en intervalos cortos
+        return max(self.rate / 10.0, 16384.0)
+    
+    def set_rate(self, rate):
+        with self.lock:
+            self._refill()
+            self.rate = rate
+            self.tokens = min(self.tokens, self.burst)
+    
+    def reserve(self, amount):
+        """Descuenta amount bytes y devuelve los segundos que hay que esperar"""
+        with self.lock:
+            if not self.rate:
+                return 0.0
+            self._refill()
+            self.tokens -= amount
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+    
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+class JobThrottle:
+    """Cuota de ancho de banda de una descarga registrada en el limitador"""
+    
+    def __init__(self, limiter, host):
+        self.limiter = limiter
+        self.host = host
+        self.bucket = TokenBucket()
+        self.fixed_rate = None  # Descargas externas (yt-dlp) con límite fijo al arrancar
+        self.window_bytes = 0
+        self.window_throttled = False
+        self.measured_rate = 0.0
+    
+    def consume(self, amount, is_cancelled=None):
+        """Espera lo necesario para que amount bytes respeten todos los límites"""
+        if not self.limiter.active:
+            return
+        wait = self.limiter.reserve(self, amount)
+        deadline = time.monotonic() + wait
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (is_cancelled and is_cancelled()):
+                return
+            time.sleep(min(remaining, 0.1))
+    
+    def account(self, amount):
+        """Descuenta bytes ya transferidos por un proceso externo, sin esperar"""
+        if self.limiter.active:
+            self.limiter.reserve(self, amount, own_bucket=False)
+    
+    def current_rate(self):
+        return self.bucket.rate
+    
+    def close(self):
+        self.limiter.unregister(self)
+
+class BandwidthLimiter:
+    """Reparte un límite global entre las descargas activas (reparto max-min).
+    
+    Cada descarga tiene su propia cubeta cuyo ritmo se recalcula cada medio
+    segundo: las que no consiguen gastar su parte (servidor lento) reciben lo
+    que usan y el resto se reparte entre las demás. Al terminar una descarga
+    su parte pasa a las que siguen activas. La cubeta global garantiza el
+    límite total y las cubetas por servidor los límites de cada host.
+    """
+    
+    REBALANCE_INTERVAL = 0.5
+    
+    def __init__(self, global_rate=0, per_host_rate=0, per_job_rate=0):
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_host_rate = per_host_rate
+        self.per_job_rate = per_job_rate
+        self.expected_jobs = 1  # Descargas simultáneas previstas (para las cuotas fijas de yt-dlp)
+        self.host_buckets = {}
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.last_rebalance = time.monotonic()
+    
+    @property
+    def active(self):
+        return bool(self.global_bucket.rate or self.per_host_rate or self.per_job_rate)
+    
+    def set_limits(self, global_rate=None, per_host_rate=None, per_job_rate=None):
+        """Cambia los límites en caliente (None deja el valor actual)"""
+        with self.lock:
+            if global_rate is not None:
+                self.global_bucket.set_rate(global_rate)
+            if per_host_rate is not None:
+                self.per_host_rate = per_host_rate
+                for bucket in self.host_buckets.values():
+                    bucket.set_rate(per_host_rate)
+            if per_job_rate is not None:
+                self.per_job_rate = per_job_rate
+            self._rebalance()
+    
+    def limits(self):
+        return {
+            'global': self.global_bucket.rate,
+            'per_host': self.per_host_rate,
+            'per_job': self.per_job_rate
+        }
+    
+    def register(self, host=''):
+        with self.lock:
+            throttle = JobThrottle(self, host)
+            self.jobs.append(throttle)
+            if host not in self.host_buckets:
+                self.host_buckets[host] = TokenBucket(self.per_host_rate)
+            self._rebalance()
+            return throttle
+    
+    def register_external(self, host=''):
+        """Registra una descarga que no pasa por consume() (yt-dlp) y devuelve su límite fijo.
+        
+        yt-dlp recibe el límite al arrancar (--limit-rate), así que se le asigna
+        la parte que le tocaría con todas las descargas previstas en marcha.
+        """
+        with self.lock:
+            throttle = JobThrottle(self, host)
+            rates = [rate for rate in (self.per_job_rate, self.per_host_rate) if rate]
+            if self.global_bucket.rate:
+                slots = max(self.expected_jobs, len(self.jobs) + 1)
+                rates.append(self.global_bucket.rate / slots)
+            throttle.fixed_rate = int(min(rates)) if rates else 0
+            self.jobs.append(throttle)
+            if host not in self.host_buckets:
+                self.host_buckets[host] = TokenBucket(self.per_host_rate)
+            self._rebalance()
+            return throttle
+    
+    def unregister(self, throttle):
+        with self.lock:
+            if throttle in self.jobs:
+                self.jobs.remove(throttle)
+            if not any(job.host == throttle.host for job in self.jobs):
+                self.host_buckets.pop(throttle.host, None)
+            self._rebalance()
+    
+    def reserve(self, throttle, amount, own_bucket=True):
+        """Descuenta amount de todas las cubetas aplicables y devuelve la espera"""
+        now = time.monotonic()
+        with self.lock:
+            throttle.window_bytes += amount
+            if now - self.last_rebalance >= self.REBALANCE_INTERVAL:
+                self._rebalance(now)
+            host_bucket = self.host_buckets.get(throttle.host)
+        
+        waits = [self.global_bucket.reserve(amount)]
+        if host_bucket:
+            waits.append(host_bucket.reserve(amount))
+        if own_bucket:
+            own_wait = throttle.bucket.reserve(amount)
+            if own_wait > 0:
+                throttle.window_throttled = True
+            waits.append(own_wait)
+        return max(waits)
+    
+    def _rebalance(self, now=None):
+        """Recalcula la cuota de cada descarga con reparto max-min del límite global"""
+        now = now or time.monotonic()
+        elapsed = max(now - self.last_rebalance, 1e-3)
+        self.last_rebalance = now
+        
+        remaining = float(self.global_bucket.rate) if self.global_bucket.rate else None
+        flexible = []
+        for job in self.jobs:
+            job.measured_rate = job.window_bytes / elapsed
+            if job.fixed_rate is not None:
+                # yt-dlp ya arrancó con su límite: se descuenta de lo disponible
+                if remaining is not None:
+                    remaining = max(0.0, remaining - job.fixed_rate)
+            else:
+                flexible.append(job)
+        
+        def demand(job):
+            # Una descarga que no tuvo que esperar a su cubeta no necesita más de lo que usa
+            if job.window_throttled or job.measured_rate <= 0:
+                return float('inf')
+            return job.measured_rate * 1.25 + 16384
+        
+        flexible.sort(key=demand)
+        for index, job in enumerate(flexible):
+            cap = self.per_job_rate or float('inf')
+            if remaining is not None:
+                share = remaining / (len(flexible) - index)
+                rate = min(share, cap, demand(job))
+                remaining -= rate
+            else:
+                rate = cap
+            job.bucket.set_rate(0 if rate == float('inf') else max(1, int(rate)))
+            job.window_bytes = 0
+            job.window_throttled = False
+        
+        for job in self.jobs:
+            job.window_bytes = 0
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_bandwidth_limiter():
+    """Devuelve el limitador compartido por todas las descargas del proceso"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = BandwidthLimiter()
+        return _limiter
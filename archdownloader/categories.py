@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+"""
+Clasificación de las descargas en carpetas
+Índice extensión → categoría construido una vez, reglas del usuario (por
+servidor, patrón de URL o extensión) leídas de categorias.json y detección
+del tipo real por los primeros bytes del contenido cuando la URL no trae
+una extensión conocida
+"""
+
+import os
+import re
+import json
+import copy
+import threading
+from urllib.parse import urlparse
+
+# Configuración de carpetas por tipo
+FILE_CATEGORIES = {
+    'imagenes': {
+        'extensions': ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.tiff', '.ico', '.heic', '.avif'],
+        'folder': 'Imágenes',
+        'icon': '🖼️'
+    },
+    'musica': {
+        'extensions': ['.mp3', '.flac', '.ogg', '.wav', '.aac', '.m4a', '.wma', '.opus', '.alac'],
+        'folder': 'Música',
+        'icon': '🎵'
+    },
+    'videos': {
+        'extensions': ['.mp4', '.webm', '.mkv', '.avi', '.mov', '.wmv', '.flv', '.m4v', '.3gp', '.ogv'],
+        'folder': 'Videos',
+        'icon': '🎥'
+    },
+    'documentos': {
+        'extensions': ['.pdf', '.doc', '.docx', '.txt', '.rtf', '.odt', '.xls', '.xlsx', '.ppt', '.pptx'],
+        'folder': 'Documentos',
+        'icon': '📄'
+    },
+    'archivos': {
+        'extensions': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz'],
+        'folder': 'Archivos',
+        'icon': '📦'
+    },
+    'otros': {
+        'extensions': [],
+        'folder': 'Otros',
+        'icon': '📁'
+    }
+}
+
+# Bytes del principio del cuerpo que se leen para reconocer el tipo de archivo
+SNIFF_SIZE = 16 * 1024
+
+# Extensiones de páginas dinámicas: si el contenido es un archivo reconocible se sustituyen
+DYNAMIC_SUFFIXES = {'.php', '.asp', '.aspx', '.jsp', '.cgi', '.do', '.action'}
+
+# Categoría a la que va lo que no encaja en ninguna otra
+FALLBACK_CATEGORY = 'otros'
+
+# Firmas fijas al principio del archivo: (prefijo, extensión)
+MAGIC_PREFIXES = [
+    (b'\x89PNG\r\n\x1a\n', '.png'),
+    (b'\xff\xd8\xff', '.jpg'),
+    (b'GIF87a', '.gif'),
+    (b'GIF89a', '.gif'),
+    (b'II*\x00', '.tiff'),
+    (b'MM\x00*', '.tiff'),
+    (b'\x00\x00\x01\x00', '.ico'),
+    (b'%PDF-', '.pdf'),
+    (b'{\\rtf', '.rtf'),
+    (b'Rar!\x1a\x07', '.rar'),
+    (b"7z\xbc\xaf'\x1c", '.7z'),
+    (b'\x1f\x8b', '.gz'),
+    (b'BZh', '.bz2'),
+    (b'\xfd7zXZ\x00', '.xz'),
+    (b'fLaC', '.flac'),
+    (b'ID3', '.mp3'),
+    (b'FLV\x01', '.flv'),
+    (b'0&\xb2u\x8ef\xcf\x11', '.wmv'),
+]
+
+# Marca del contenedor ISO (cuadro ftyp) → extensión
+FTYP_BRANDS = {
+    b'M4A ': '.m4a', b'M4B ': '.m4a', b'qt  ': '.mov', b'M4V ': '.m4v',
+    b'3gp4': '.3gp', b'3gp5': '.3gp', b'3gp6': '.3gp', b'3g2a': '.3gp',
+    b'heic': '.heic', b'heix': '.heic', b'mif1': '.heic', b'msf1': '.heic',
+    b'avif': '.avif', b'avis': '.avif'
+}
+
+# Entradas de un ZIP que delatan un documento de Office u OpenDocument
+ZIP_MARKERS = [
+    (b'word/', '.docx'),
+    (b'xl/', '.xlsx'),
+    (b'ppt/', '.pptx'),
+    (b'mimetypeapplication/vnd.oasis.opendocument.text', '.odt')
+]
+
+def sniff_extension(data):
+    """Devuelve la extensión que corresponde a los primeros bytes de un archivo, o None"""
+    if not data:
+        return None
+    data = bytes(data[:SNIFF_SIZE])
+    for prefix, extension in MAGIC_PREFIXES:
+        if data.startswith(prefix):
+            return extension
+    
+    if data[:4] == b'RIFF' and len(data) >= 12:
+        return {b'WEBP': '.webp', b'WAVE': '.wav', b'AVI ': '.avi'}.get(data[8:12])
+    if data[4:8] == b'ftyp':
+        return FTYP_BRANDS.get(data[8:12], '.mp4')
+    if data.startswith(b'\x1aE\xdf\xa3'):
+        # EBML: Matroska o WebM según el DocType de la cabecera
+        return '.webm' if b'webm' in data[:64] else '.mkv'
+    if data.startswith(b'OggS'):
+        if b'OpusHead' in data[:128]:
+            return '.opus'
+        return '.ogv' if b'theora' in data[:128] else '.ogg'
+    if data.startswith(b'PK\x03\x04'):
+        for marker, extension in ZIP_MARKERS:
+            if marker in data:
+                return extension
+        return '.zip'
+    if data.startswith(b'BM') and len(data) >= 14 and data[6:10] == b'\x00\x00\x00\x00':
+        return '.bmp'
+    if len(data) > 262 and data[257:262] == b'ustar':
+        return '.tar'
+    if len(data) >= 2 and data[0] == 0xff and data[1] & 0xf6 == 0xf0:
+        return '.aac'  # ADTS
+    if len(data) >= 2 and data[0] == 0xff and data[1] & 0xe0 == 0xe0 and data[1] & 0x06:
+        return '.mp3'  # Trama MPEG de audio sin etiqueta ID3
+    head = data[:512].lstrip().lower()
+    if head.startswith(b'<svg') or (head.startswith(b'<?xml') and b'<svg' in head):
+        return '.svg'
+    return None
+
+def file_extension(filename):
+    """Extensión en minúsculas ('' si no tiene); más barato que Path(filename).suffix"""
+    return os.path.splitext(filename)[1].lower()
+
+def normalize_extension(extension):
+    extension = extension.strip().lower()
+    return extension if extension.startswith('.') else '.' + extension
+
+class CategoryIndex:
+    """Categorías con sus búsquedas precalculadas.
+    
+    La extensión se resuelve con un diccionario y el servidor recorriendo
+    sus sufijos (a.b.com, b.com, com), así que clasificar no depende del
+    número de categorías. Las reglas del usuario van antes que la extensión:
+    primero por servidor, luego por patrón de URL.
+    """
+    
+    def __init__(self, file_categories, config=None):
+        self.categories = copy.deepcopy(file_categories)
+        self.by_extension = {}
+        self.by_host = {}
+        self.patterns = []
+        config = config or {}
+        
+        # Categorías nuevas o extensiones añadidas a las existentes
+        for name, info in (config.get('categorias') or {}).items():
+            category = self.categories.setdefault(name, {'extensions': [], 'folder': name.capitalize(), 'icon': '📁'})
+            category['folder'] = info.get('folder', category['folder'])
+            category['icon'] = info.get('icon', category['icon'])
+            category['extensions'] = category['extensions'] + [
+                normalize_extension(extension) for extension in info.get('extensions', [])]
+        
+        for name, info in self.categories.items():
+            for extension in info['extensions']:
+                # Con extensiones repetidas gana la primera categoría que la declara
+                self.by_extension.setdefault(extension.lower(), name)
+        
+        for rule in config.get('reglas') or []:
+            name = rule.get('categoria')
+            if name not in self.categories:
+                raise ValueError(f"Regla con una categoría que no existe: {name}")
+            if rule.get('extension'):
+                # Las reglas por extensión sí sustituyen a la de las categorías
+                for extension in ([rule['extension']] if isinstance(rule['extension'], str) else rule['extension']):
+                    self.by_extension[normalize_extension(extension)] = name
+            if rule.get('host'):
+                self.by_host[rule['host'].lower().lstrip('.')] = name
+            if rule.get('patron'):
+                try:
+                    self.patterns.append((re.compile(rule['patron'], re.IGNORECASE), name))
+                except re.error as e:
+                    raise ValueError(f"Patrón no válido en las reglas: {rule['patron']} ({e})")
+    
+    def is_known(self, filename):
+        """Indica si la extensión del nombre corresponde a alguna categoría"""
+        return file_extension(filename) in self.by_extension
+    
+    def category(self, filename, url=None, sniffed=None):
+        """Nombre de la categoría: reglas de la URL, extensión del nombre, tipo detectado o 'otros'"""
+        if url and (self.by_host or self.patterns):
+            host = (urlparse(url).hostname or '').lower()
+            while host:
+                if host in self.by_host:
+                    return self.by_host[host]
+                host = host.partition('.')[2]
+            for pattern, name in self.patterns:
+                if pattern.search(url):
+                    return name
+        name = self.by_extension.get(file_extension(filename))
+        if name is None and sniffed:
+            name = self.by_extension.get(sniffed)
+        return name or FALLBACK_CATEGORY
+    
+    def folder(self, filename, url=None, sniffed=None):
+        """Carpeta de destino del archivo"""
+        return self.categories[self.category(filename, url, sniffed)]['folder']
+
+def load_category_config(path):
+    """Lee categorias.json; devuelve {} si no existe"""
+    try:
+        with open(path, 'r', encoding='utf-8') as config_file:
+            config = json.load(config_file)
+    except FileNotFoundError:
+        return {}
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path} no es JSON válido: {e}")
+    if not isinstance(config, dict):
+        raise ValueError(f"{path} debe contener un objeto con 'categorias' y 'reglas'")
+    return config
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_category_index(file_categories, config_path=None):
+    """Devuelve el índice de categorías, reconstruido solo si cambia categorias.json.
+    
+    Si el archivo no es válido se usan las categorías por defecto y el error
+    queda en el atributo load_error del índice.
+    """
+    try:
+        mtime = os.path.getmtime(config_path) if config_path else None
+    except OSError:
+        mtime = None
+    key = (id(file_categories), config_path)
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        load_error = None
+        try:
+            index = CategoryIndex(file_categories, load_category_config(config_path) if mtime else None)
+        except (OSError, ValueError) as e:
+            index = CategoryIndex(file_categories)
+            load_error = str(e)
+        index.load_error = load_error
+        _indexes[key] = (mtime, index)
+        return index
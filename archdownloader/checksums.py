@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Verificación de checksums de las descargas directas
+El hash esperado lo indica el usuario, lo anuncia el servidor en sus cabeceras
+o se busca en archivos hermanos (.sha256, SHA256SUMS...)
+"""
+
+import re
+import base64
+import posixpath
+from urllib.parse import urlsplit, urlunsplit, unquote
+
+# Algoritmos admitidos, del más fuerte al más débil
+CHECKSUM_ALGORITHMS = ['sha256', 'sha1', 'md5']
+
+# Longitud en hexadecimal de cada algoritmo
+CHECKSUM_HEX_LENGTHS = {'sha256': 64, 'sha1': 40, 'md5': 32}
+
+# Nombres de los algoritmos en las cabeceras Digest / Repr-Digest / Content-Digest
+HEADER_ALGORITHMS = {'sha-256': 'sha256', 'sha': 'sha1', 'sha-1': 'sha1', 'md5': 'md5'}
+
+# Solo se buscan archivos de checksum para descargas grandes (ISO, paquetes de versiones...)
+CHECKSUM_DISCOVERY_MIN_SIZE = 16 * 1024 * 1024
+CHECKSUM_FILE_MAX_SIZE = 1024 * 1024
+
+# Archivos hermanos que se prueban: sufijos de la URL y listas del mismo directorio
+CHECKSUM_SUFFIXES = {'sha256': ('.sha256', '.sha256sum'), 'sha1': ('.sha1',), 'md5': ('.md5',)}
+CHECKSUM_LISTS = {'sha256': ('SHA256SUMS',), 'sha1': ('SHA1SUMS',), 'md5': ('MD5SUMS',)}
+
+class ExpectedChecksum:
+    """Hash que debe tener el archivo descargado y de dónde se obtuvo"""
+    
+    def __init__(self, algorithm, hexdigest, source):
+        self.algorithm = algorithm
+        self.hexdigest = hexdigest.lower()
+        self.source = source
+    
+    @property
+    def label(self):
+        return {'sha256': 'SHA-256', 'sha1': 'SHA-1', 'md5': 'MD5'}[self.algorithm]
+    
+    def matches(self, digests):
+        return digests.get(self.algorithm) == self.hexdigest
+
+def parse_checksum(text, source="indicado por el usuario"):
+    """Interpreta 'sha256:HEX', 'md5=HEX' o un hash sin prefijo (se deduce por su longitud)"""
+    match = re.match(r'^\s*(?:([\w-]+)\s*[:=]\s*)?([0-9a-fA-F]+)\s*$', text or '')
+    if not match:
+        raise ValueError(f"Checksum no válido: {text}")
+    name, hexdigest = match.groups()
+    if name:
+        algorithm = HEADER_ALGORITHMS.get(name.lower(), name.lower().replace('-', ''))
+    else:
+        algorithm = next((algorithm for algorithm, length in CHECKSUM_HEX_LENGTHS.items()
+                          if length == len(hexdigest)), None)
+    if algorithm not in CHECKSUM_HEX_LENGTHS or len(hexdigest) != CHECKSUM_HEX_LENGTHS[algorithm]:
+        raise ValueError(f"Checksum no válido (se admiten MD5, SHA-1 y SHA-256): {text}")
+    return ExpectedChecksum(algorithm, hexdigest, source)
+
+def strongest(digests):
+    """Devuelve el algoritmo más fuerte presente en {algoritmo: hex}, o None"""
+    return next((algorithm for algorithm in CHECKSUM_ALGORITHMS if algorithm in digests), None)
+
+def _digests_from_header(value):
+    """Lee 'sha-256=:base64:, md5=base64' (RFC 9530 y RFC 3230) como {algoritmo: hex}"""
+    digests = {}
+    for item in (value or '').split(','):
+        name, _, encoded = item.strip().partition('=')
+        algorithm = HEADER_ALGORITHMS.get(name.strip().lower())
+        if not algorithm:
+            continue
+        try:
+            raw = base64.b64decode(encoded.strip().strip(':'))
+        except ValueError:
+            continue
+        if len(raw) * 2 == CHECKSUM_HEX_LENGTHS[algorithm]:
+            digests[algorithm] = raw.hex()
+    return digests
+
+def content_digests(headers):
+    """Hashes del cuerpo de esta respuesta (Content-Digest / Content-MD5).
+    
+    En una respuesta 206 describen solo el rango recibido, lo que permite
+    verificar cada segmento por separado.
+    """
+    digests = _digests_from_header(headers.get('Content-MD5') and f"md5={headers['Content-MD5']}")
+    digests.update(_digests_from_header(headers.get('Content-Digest')))
+    return digests
+
+def representation_digests(headers):
+    """Hashes del archivo completo anunciados por el servidor en una respuesta 200"""
+    digests = {}
+    if headers.get('Content-Encoding', 'identity').lower() in ('', 'identity'):
+        # Sin compresión el cuerpo de la respuesta es el propio archivo
+        digests.update(content_digests(headers))
+    for header in ('Digest', 'Repr-Digest'):
+        digests.update(_digests_from_header(headers.get(header)))
+    return digests
+
+def checksum_file_urls(url):
+    """Devuelve [(url, algoritmo, es_lista)] de los archivos de checksum que pueden acompañar a la URL"""
+    parts = urlsplit(url)
+    directory = posixpath.dirname(parts.path)
+    candidates = []
+    for algorithm in CHECKSUM_ALGORITHMS:
+        for suffix in CHECKSUM_SUFFIXES[algorithm]:
+            sibling = urlunsplit(parts._replace(path=parts.path + suffix, fragment=''))
+            candidates.append((sibling, algorithm, False))
+        for name in CHECKSUM_LISTS[algorithm]:
+            path = posixpath.join(directory, name)
+            candidates.append((urlunsplit(parts._replace(path=path, query='', fragment='')), algorithm, True))
+    return candidates
+
+def parse_checksum_file(text, filename, algorithm, is_list=False):
+    """Busca el hash de filename en un archivo de checksums.
+    
+    Admite el formato de sha256sum ('HEX  nombre' o 'HEX *nombre'), el de BSD
+    ('SHA256 (nombre) = HEX') y archivos con solo el hash (salvo en las listas
+    de un directorio, donde cada línea debe llevar el nombre).
+    """
+    length = CHECKSUM_HEX_LENGTHS[algorithm]
+    for line in text.splitlines():
+        line = line.strip()
+        bsd = re.match(r'^[\w-]+\s*\((.+)\)\s*=\s*([0-9a-fA-F]+)$', line)
+        if bsd:
+            name, hexdigest = bsd.groups()
+        else:
+            fields = line.split(None, 1)
+            if not fields:
+                continue
+            hexdigest = fields[0]
+            name = fields[1].lstrip('*').strip() if len(fields) > 1 else None
+        if len(hexdigest) != length or not re.fullmatch(r'[0-9a-fA-F]+', hexdigest):
+            continue
+        if (name is None and not is_list) or (name and posixpath.basename(name) == filename):
+            return hexdigest.lower()
+    return None
+
+def url_filename(url):
+    """Nombre del archivo tal como aparece en la URL (el que listan los SHA256SUMS)"""
+    return unquote(posixpath.basename(urlsplit(url).path))
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Modo por lotes del Descargador Universal
+Reutiliza el núcleo sin importar PyQt6, pensado para servidores y cron
+"""
+
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .core import (CATEGORIES_PATH, DEFAULT_DOWNLOAD_PATH, FILE_CATEGORIES, METRICS_PATH, DownloadEngine,
+                   normalize_url)
+from .categories import get_category_index
+from .ytdlp_pool import get_ytdlp_pool
+from .dedup import DEDUP_OFF
+from .bandwidth import get_bandwidth_limiter, parse_rate
+from .checksums import parse_checksum
+from .retry import parse_retry_budgets
+from .concurrency import get_concurrency_tuner
+from .metrics import start_metrics_server
+from .jobs import JOB_RUNNING, JOB_POSTPROCESSING, JOB_DONE, JOB_FAILED, DownloadQueue
+
+def read_url_list(path):
+    """Lee un archivo con una URL por línea (ignora vacías y comentarios #).
+    
+    Tras la URL puede ir, separado por espacios, el checksum esperado.
+    Devuelve una lista de (url, checksum).
+    """
+    stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        entries = []
+        for line in stream:
+            if not line.strip() or line.lstrip().startswith('#'):
+                continue
+            fields = line.split()
+            entries.append((fields[0], fields[1] if len(fields) > 1 else ""))
+        return entries
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+class BatchRunner:
+    """Ejecuta una lista de URLs con el motor respetando los límites de la cola.
+    
+    urls admite URLs sueltas o pares (url, checksum).
+    """
+    
+    def __init__(self, urls, dest=DEFAULT_DOWNLOAD_PATH, jobs=4, per_host=2, segments=4,
+                 video_quality="best", audio_only=False, dedup_policy=DEDUP_OFF, use_history=True,
+                 limit_rate=0, limit_per_host=0, limit_per_job=0, limit_file=None, retries=None,
+                 adaptive=False, metrics_path=METRICS_PATH, verbose=False, out=None):
+        self.queue = DownloadQueue(max_concurrent=jobs, max_per_host=per_host)
+        get_ytdlp_pool(jobs)
+        self.segments = segments
+        self.dedup_policy = dedup_policy
+        self.use_history = use_history
+        self.limiter = get_bandwidth_limiter()
+        self.limiter.expected_jobs = jobs
+        self.limiter.set_limits(limit_rate, limit_per_host, limit_per_job)
+        self.limit_file = limit_file
+        self.limit_file_mtime = None
+        self.retries = retries
+        self.adaptive = adaptive
+        # Con ajuste automático jobs es el máximo y el controlador decide cuántas arrancan
+        self.job_concurrency = get_concurrency_tuner().job_controller(jobs) if adaptive else None
+        self.metrics_path = metrics_path
+        self.verbose = verbose
+        self.out = out or sys.stdout
+        self.print_lock = threading.Lock()
+        self.engines = {}
+        
+        for entry in urls:
+            url, checksum = entry if isinstance(entry, tuple) else (entry, "")
+            self.queue.add(normalize_url(url), dest, video_quality=video_quality, audio_only=audio_only,
+                           checksum=checksum)
+    
+    def print_line(self, text):
+        with self.print_lock:
+            print(text, file=self.out, flush=True)
+    
+    def make_listener(self, job):
+        """Listener del motor: imprime el log y, en modo detallado, el estado"""
+        def listener(event, value):
+            if event == 'log':
+                self.print_line(f"[#{job.job_id}] {value}")
+            elif event == 'status' and self.verbose:
+                self.print_line(f"[#{job.job_id}] {value}")
+        return listener
+    
+    def start_job(self, executor, job):
+        self.queue.set_state(job.job_id, JOB_RUNNING)
+        engine = DownloadEngine(
+            job.url, job.download_path, FILE_CATEGORIES,
+            video_quality=job.video_quality,
+            audio_only=job.audio_only,
+            is_video_platform=job.parent_id is not None,
+            segments=self.segments,
+            dedup_policy=self.dedup_policy,
+            use_history=self.use_history,
+            checksum=job.checksum,
+            retries=self.retries,
+            adaptive=self.adaptive,
+            metrics_path=self.metrics_path,
+            pool_size=self.queue.max_concurrent * self.segments,
+            listener=self.make_listener(job)
+        )
+        self.engines[job.job_id] = engine
+        # La descarga devuelve su plaza al entregar el archivo al post-procesado
+        return executor.submit(engine.execute, wait_postprocess=False)
+    
+    def check_limit_file(self):
+        """Relee el límite global del archivo indicado con --limit-file si cambió"""
+        if not self.limit_file:
+            return
+        try:
+            mtime = os.path.getmtime(self.limit_file)
+            if mtime == self.limit_file_mtime:
+                return
+            self.limit_file_mtime = mtime
+            with open(self.limit_file, 'r', encoding='utf-8') as limit_file:
+                rate = parse_rate(limit_file.read().strip() or '0')
+        except (OSError, ValueError) as e:
+            self.print_line(f"⚠️ No se pudo leer el límite de velocidad: {e}")
+            return
+        self.limiter.set_limits(global_rate=rate)
+        limit_text = f"{DownloadEngine.format_bytes(rate)}/s" if rate else "sin límite"
+        self.print_line(f"🚦 Velocidad máxima total: {limit_text}")
+    
+    def cancel(self):
+        for engine in self.engines.values():
+            engine.cancel()
+    
+    def run(self):
+        """Descarga toda la lista. Devuelve el número de trabajos fallidos"""
+        start_time = time.monotonic()
+        running = {}
+        
+        with ThreadPoolExecutor(max_workers=self.queue.max_concurrent) as executor:
+            try:
+                while True:
+                    limit = self.job_concurrency.limit if self.job_concurrency else None
+                    for job in self.queue.runnable_jobs(limit):
+                        running[self.start_job(executor, job)] = job
+                    if not running:
+                        break
+                    
+                    done, _ = wait(running, timeout=1.0, return_when=FIRST_COMPLETED)
+                    self.check_limit_file()
+                    for future in done:
+                        job = running.pop(future)
+                        engine = self.engines[job.job_id]
+                        if future is engine.postprocess_future:
+                            success, message, filepath = engine.wait_postprocess()
+                        else:
+                            success, message, filepath = future.result()
+                            if engine.postprocess_future is not None:
+                                # ffmpeg sigue en el grupo de post-procesado; la plaza ya está libre
+                                self.queue.set_state(job.job_id, JOB_POSTPROCESSING)
+                                running[engine.postprocess_future] = job
+                                continue
+                        del self.engines[job.job_id]
+                        job.filepath = filepath
+                        if success and engine.playlist_entries is not None:
+                            self.queue.add_playlist_entries(job, engine.playlist_entries)
+                            continue
+                        if success:
+                            self.queue.set_state(job.job_id, JOB_DONE, message.split('\n')[0].rstrip(':'))
+                        else:
+                            self.queue.set_state(job.job_id, JOB_FAILED, message.split('\n')[0])
+                            self.print_line(f"[#{job.job_id}] ❌ {message}")
+                        if job.parent_id:
+                            parent = self.queue.update_playlist(job.parent_id)
+                            if parent and parent.state == JOB_DONE:
+                                self.print_line(f"[#{parent.job_id}] 📃 Lista terminada: {parent.message}")
+                            elif parent:
+                                self.print_line(f"[#{parent.job_id}] 📃 {parent.progress}% · {parent.message}")
+            except KeyboardInterrupt:
+                self.print_line("⏹️ Cancelando descargas (las parciales se reanudarán en el próximo intento)...")
+                self.cancel()
+                raise
+        
+        # Las listas expandidas no cuentan: solo sus entradas
+        playlists = {job.parent_id for job in self.queue.jobs if job.parent_id}
+        completed = sum(1 for job in self.queue.jobs if job.state == JOB_DONE and job.job_id not in playlists)
+        failed = self.queue.count(JOB_FAILED)
+        elapsed = time.monotonic() - start_time
+        self.print_line(f"📋 Lote terminado en {elapsed:.1f} s: {completed} completadas, {failed} con errores")
+        return failed
+
+def run_batch(args):
+    """Punto de entrada del modo por lotes a partir de los argumentos del lanzador"""
+    urls = [(url, "") for url in args.url or []]
+    if args.checksum:
+        if len(urls) != 1 or args.batch:
+            print("❌ --checksum solo se puede usar con una única --url", file=sys.stderr)
+            return 2
+        urls = [(urls[0][0], args.checksum)]
+    if args.batch:
+        urls.extend(read_url_list(args.batch))
+    if not urls:
+        print("❌ No se indicó ninguna URL", file=sys.stderr)
+        return 2
+    
+    for url, checksum in urls:
+        if not checksum:
+            continue
+        try:
+            parse_checksum(checksum)
+        except ValueError as e:
+            print(f"❌ {url}: {e}", file=sys.stderr)
+            return 2
+    
+    try:
+        limits = [parse_rate(value or 0) for value in (args.limit_rate, args.limit_per_host, args.limit_per_job)]
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    
+    try:
+        retries = parse_retry_budgets(args.retries) if args.retries else None
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    
+    category_index = get_category_index(FILE_CATEGORIES, CATEGORIES_PATH)
+    if category_index.load_error:
+        print(f"⚠️ No se pudieron cargar las categorías propias: {category_index.load_error}", file=sys.stderr)
+    
+    metrics_path = args.metrics_file or METRICS_PATH
+    if metrics_path.lower() == 'off':
+        metrics_path = None
+    if args.metrics_port:
+        try:
+            start_metrics_server(args.metrics_port)
+        except OSError as e:
+            print(f"❌ No se pudo abrir el puerto de métricas {args.metrics_port}: {e}", file=sys.stderr)
+            return 2
+        print(f"📈 Métricas en http://127.0.0.1:{args.metrics_port}/metrics")
+    
+    runner = BatchRunner(
+        urls,
+        dest=os.path.expanduser(args.dest),
+        jobs=args.jobs,
+        per_host=args.per_host,
+        segments=args.segments,
+        video_quality=args.quality,
+        audio_only=args.audio_only,
+        dedup_policy=args.dedup,
+        use_history=args.use_history,
+        limit_rate=limits[0],
+        limit_per_host=limits[1],
+        limit_per_job=limits[2],
+        limit_file=args.limit_file,
+        retries=retries,
+        adaptive=args.adaptive,
+        metrics_path=metrics_path,
+        verbose=args.verbose
+    )
+    try:
+        failed = runner.run()
+    except KeyboardInterrupt:
+        return 130
+    return 1 if failed else 0
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Ajuste automático de la concurrencia (AIMD sobre el goodput)
+Sube de uno en uno las conexiones por descarga y las descargas simultáneas
+mientras el goodput total sigue mejorando y reduce a la mitad ante errores,
+cortes o una meseta
+"""
+
+import time
+import threading
+from collections import deque
+
+# Duración de cada ventana de medida
+ADAPT_WINDOW = 2.0
+
+# Una conexión más debe aportar al menos esta fracción de lo que aporta cada una de las existentes
+ADAPT_MARGINAL_GAIN = 0.5
+
+# Factor de reducción ante errores (429, 5xx, conexiones cortadas...)
+ADAPT_DECREASE = 0.5
+
+# Ventanas que se espera tras una meseta o un error antes de volver a probar un valor más alto
+ADAPT_HOLD_WINDOWS = 5
+
+# Ventanas durante las que no se vuelve a subir hasta el nivel que dio errores
+ADAPT_CEILING_WINDOWS = 30
+
+# Peso de la medida nueva en la media del goodput de cada nivel
+ADAPT_SMOOTHING = 0.5
+
+class ConcurrencyController:
+    """Límite de concurrencia que se ajusta midiendo el goodput agregado.
+    
+    Quien usa el límite informa de los bytes recibidos con add_bytes() y de
+    los fallos con add_error(). Cada ADAPT_WINDOW segundos se compara el
+    goodput del nivel actual con el del nivel inferior: si la última conexión
+    añadida aporta lo suficiente se sube uno (aumento aditivo); si no, se
+    vuelve al nivel anterior y se espera antes de probar de nuevo. Un error
+    divide el límite (reducción multiplicativa) y durante un tiempo no se
+    vuelve a subir hasta el nivel que falló. La primera ventana tras un
+    cambio no cuenta, porque las conexiones nuevas aún están arrancando.
+    
+    add_bytes() y add_error() devuelven el texto de la decisión cuando el
+    límite cambia, para que quien la provocó la muestre en su log. Quien
+    ocupa una plaza la marca con acquire() y la libera con release(): las
+    ventanas en las que no se usaron todas las plazas no sirven para medir.
+    """
+    
+    def __init__(self, name, maximum, minimum=1, initial=None, window=ADAPT_WINDOW, clock=time.monotonic):
+        self.name = name
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.limit = max(minimum, min(self.maximum, initial or minimum))
+        self.window = window
+        self.clock = clock
+        self.goodput = {}  # nivel → goodput medio medido con ese límite (bytes/s)
+        self.decisions = deque(maxlen=50)  # (instante, límite anterior, límite nuevo, motivo)
+        self._bytes = 0
+        self._window_start = clock()
+        self._settling = True
+        self._hold = 0
+        self._ceiling = None
+        self._ceiling_windows = 0
+        self._decreased = False
+        self._underused = False
+        self.active = 0
+        self._lock = threading.Lock()
+    
+    def set_maximum(self, maximum):
+        """Cambia el máximo permitido (el límite actual se recorta si lo supera)"""
+        with self._lock:
+            self.maximum = max(self.minimum, maximum)
+            if self.limit > self.maximum:
+                return self._change(self.maximum, "nuevo máximo")
+        return None
+    
+    def acquire(self):
+        with self._lock:
+            self.active += 1
+    
+    def release(self):
+        with self._lock:
+            self.active -= 1
+            if self.active < self.limit:
+                self._underused = True
+    
+    def add_bytes(self, amount):
+        """Cuenta bytes recibidos; devuelve la decisión si se cerró una ventana y cambió el límite"""
+        with self._lock:
+            self._bytes += amount
+            now = self.clock()
+            elapsed = now - self._window_start
+            if elapsed < self.window:
+                return None
+            rate = self._bytes / elapsed
+            self._bytes = 0
+            self._window_start = now
+            underused, self._underused = self._underused, self.active < self.limit
+            if underused:
+                # Con plazas libres el goodput no dice nada del límite
+                self._settling = False
+                return None
+            return self._evaluate(rate)
+    
+    def add_error(self, reason="error"):
+        """Reducción multiplicativa; los errores justo después de reducir se deben aún al nivel anterior"""
+        with self._lock:
+            if self._settling and self._decreased:
+                return None
+            self._hold = ADAPT_HOLD_WINDOWS
+            self._ceiling = max(self.minimum, self.limit - 1)
+            self._ceiling_windows = ADAPT_CEILING_WINDOWS
+            if self.limit <= self.minimum:
+                self._restart_window()
+                return None
+            return self._change(max(self.minimum, int(self.limit * ADAPT_DECREASE)), reason)
+    
+    def _evaluate(self, rate):
+        if self._settling:
+            self._settling = False
+            return None
+        
+        previous = self.goodput.get(self.limit)
+        if previous is not None:
+            rate = previous + ADAPT_SMOOTHING * (rate - previous)
+        self.goodput[self.limit] = rate
+        
+        if self._ceiling_windows:
+            self._ceiling_windows -= 1
+            if not self._ceiling_windows:
+                self._ceiling = None
+        if self._hold:
+            self._hold -= 1
+            return None
+        
+        lower = self.goodput.get(self.limit - 1)
+        if lower is not None and self.limit > self.minimum:
+            # Lo que debería aportar una conexión más si el goodput creciera en proporción
+            expected = lower / (self.limit - 1) if self.limit > 1 else lower
+            if rate - lower < ADAPT_MARGINAL_GAIN * expected:
+                self._hold = ADAPT_HOLD_WINDOWS
+                return self._change(self.limit - 1, f"meseta: {format_rate(rate)} con {self.limit} "
+                                                    f"frente a {format_rate(lower)} con {self.limit - 1}")
+        ceiling = self.maximum if self._ceiling is None else min(self.maximum, self._ceiling)
+        if self.limit < ceiling:
+            return self._change(self.limit + 1, f"el goodput sigue subiendo ({format_rate(rate)})")
+        return None
+    
+    def _change(self, limit, reason):
+        previous, self.limit = self.limit, limit
+        self._decreased = limit < previous
+        self._restart_window()
+        self.decisions.append((time.time(), previous, limit, reason))
+        return f"{self.name}: {previous} → {limit} ({reason})"
+    
+    def _restart_window(self):
+        self._bytes = 0
+        self._window_start = self.clock()
+        self._settling = True
+        self._underused = False
+
+def format_rate(rate):
+    for unit in ['B/s', 'KB/s', 'MB/s']:
+        if rate < 1024.0:
+            return f"{rate:.1f} {unit}"
+        rate /= 1024.0
+    return f"{rate:.1f} GB/s"
+
+class ConcurrencyTuner:
+    """Controladores compartidos: uno global para las descargas simultáneas y uno por servidor
+    para las conexiones de cada descarga (lo aprendido sirve para las siguientes descargas)"""
+    
+    def __init__(self, window=ADAPT_WINDOW):
+        self.window = window
+        self.jobs = None
+        self.hosts = {}
+        self.lock = threading.Lock()
+    
+    def job_controller(self, maximum):
+        with self.lock:
+            if self.jobs is None:
+                self.jobs = ConcurrencyController("Descargas simultáneas", maximum, initial=min(2, maximum),
+                                                  window=self.window)
+        self.jobs.set_maximum(maximum)
+        return self.jobs
+    
+    def host_controller(self, host, maximum):
+        with self.lock:
+            controller = self.hosts.get(host)
+            if controller is None:
+                controller = ConcurrencyController(f"Conexiones a {host}", maximum, initial=min(2, maximum),
+                                                   window=self.window)
+                self.hosts[host] = controller
+        controller.set_maximum(maximum)
+        return controller
+    
+    def limits(self):
+        """{nombre: límite actual} de los controladores creados"""
+        with self.lock:
+            controllers = ([self.jobs] if self.jobs else []) + list(self.hosts.values())
+        return {controller.name: controller.limit for controller in controllers}
+
+_tuner = None
+_tuner_lock = threading.Lock()
+
+def get_concurrency_tuner():
+    """Devuelve el ajuste de concurrencia compartido por todas las descargas del proceso"""
+    global _tuner
+    with _tuner_lock:
+        if _tuner is None:
+            _tuner = ConcurrencyTuner()
+        return _tuner
@@ -0,0 +1,2119 @@
+# -*- coding: utf-8 -*-
+"""
+Núcleo del Descargador Universal sin dependencias de Qt
+Lo usan tanto la interfaz gráfica como el modo por lotes (CLI)
+"""
+
+import sys
+import os
+import requests
+import mimetypes
+import threading
+import time
+import re
+import subprocess
+import json
+import errno
+import shutil
+import hashlib
+import socket
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, CancelledError, wait, FIRST_COMPLETED
+from pathlib import Path
+from urllib.parse import urlparse, unquote
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+from .ytdlp_pool import (YTDLP_POLL_INTERVAL, YtdlpOutputReader, get_ytdlp_pool, probe_ytdlp,
+                         signal_process, stop_process)
+from .dedup import (DEDUP_OFF, DEDUP_HARDLINK, DEDUP_SKIP, DEDUP_ALGORITHM,
+                    StreamHasher, get_dedup_index)
+from .checksums import (CHECKSUM_DISCOVERY_MIN_SIZE, CHECKSUM_FILE_MAX_SIZE, ExpectedChecksum,
+                        checksum_file_urls, content_digests, parse_checksum, parse_checksum_file,
+                        representation_digests, strongest, url_filename)
+from .history import get_download_history
+from .bandwidth import get_bandwidth_limiter
+from .retry import ERROR_CLASS_LABELS, IncompleteDownload, RetryBudget
+from .concurrency import get_concurrency_tuner
+from .categories import DYNAMIC_SUFFIXES, FILE_CATEGORIES, SNIFF_SIZE, get_category_index, sniff_extension
+from .metrics import OUTCOME_OK, OUTCOME_FAILED, OUTCOME_CANCELLED, JobMetrics, get_metrics_recorder
+from .infocache import get_info_cache
+from .postprocess import (POSTPROCESS_AUDIO, POSTPROCESS_REMUX, POSTPROCESS_LABELS, PostProcessTask,
+                          find_ffmpeg, get_postprocess_pool)
+from .paths import (APP_DATA_DIR, DEDUP_DB_PATH, HISTORY_DB_PATH, YTDLP_ARCHIVE_VIDEO, YTDLP_ARCHIVE_AUDIO,
+                    METRICS_PATH, CATEGORIES_PATH, INFO_CACHE_DIR, DEFAULT_DOWNLOAD_PATH)
+
+def normalize_url(url):
+    """Limpia la URL y agrega https:// si no tiene protocolo"""
+    url = url.strip()
+    if url and not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    return url
+
+# URLs de listas y canales que se expanden en una descarga por entrada
+PLAYLIST_PATTERNS = [
+    r'youtube\.com/playlist\?',
+    r'youtube\.com/(@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+)/?(videos|shorts|streams|playlists)?/?($|[?#])',
+    r'vimeo\.com/(channels|showcase|album)/',
+    r'dailymotion\.com/playlist/',
+    r'twitch\.tv/[^/]+/videos'
+]
+
+def is_playlist_url(url):
+    """Indica si la URL es una lista de reproducción o un canal"""
+    return any(re.search(pattern, url, re.IGNORECASE) for pattern in PLAYLIST_PATTERNS)
+
+# Prefijo de la línea con la que yt-dlp informa la ruta final de cada archivo
+YTDLP_FILEPATH_MARKER = '@@ARCHDL-FILEPATH@@'
+
+# Progreso de yt-dlp en JSON, una línea por actualización (--progress-template).
+# Los campos que yt-dlp no conoce (tamaño total en directos, fragmentos...) no aparecen
+YTDLP_PROGRESS_MARKER = '@@ARCHDL-PROGRESS@@'
+YTDLP_PROGRESS_TEMPLATE = (f'download:{YTDLP_PROGRESS_MARKER}%(progress.{{status,downloaded_bytes,total_bytes,'
+                           f'total_bytes_estimate,speed,eta,fragment_index,fragment_count}})j')
+
+# Aviso de cada post-procesador (a partir de ellos ya no se transfiere nada)
+YTDLP_POSTPROCESS_MARKER = '@@ARCHDL-POSTPROCESS@@'
+YTDLP_POSTPROCESS_TEMPLATE = f'postprocess:{YTDLP_POSTPROCESS_MARKER}%(progress.{{status,postprocessor}})j'
+
+# Datos de cada archivo que decide y acompaña al post-procesado (metadatos, protocolo, contenedor)
+YTDLP_INFO_MARKER = '@@ARCHDL-INFO@@'
+YTDLP_INFO_TEMPLATE = f'after_move:{YTDLP_INFO_MARKER}%(.{{title,uploader,webpage_url,protocol,container}})j'
+
+# Etapa en la que entra un trabajo al entregar el archivo descargado (evento 'stage')
+STAGE_POSTPROCESS = 'postproceso'
+
+# Calidades predefinidas → formato de yt-dlp (cualquier otro valor se pasa tal cual a -f,
+# como los que se eligen en la lista de formatos de la interfaz)
+YTDLP_QUALITY_FORMATS = {
+    'best': 'best[height<=?1080]',
+    '720p': 'best[height<=?720]',
+    '480p': 'best[height<=?480]',
+    '360p': 'best[height<=?360]'
+}
+
+# Líneas de yt-dlp que se muestran en el log
+YTDLP_LOG_KEYWORDS = ('title:', 'destination:', 'finished')
+
+# Siguiente sufijo libre por (carpeta, nombre, extensión): evita recorrer _1, _2... en cada descarga
+_name_counters = {}
+_name_counters_lock = threading.Lock()
+
+def reserve_filepath(directory, filename):
+    """Reserva un nombre libre en la carpeta creando su .part en exclusiva.
+    
+    La creación con O_EXCL es atómica, así que dos descargas simultáneas nunca
+    obtienen el mismo nombre. El sufijo libre se recuerda por carpeta y nombre,
+    de modo que las siguientes reservas no vuelven a comprobar los ocupados.
+    """
+    base_name, extension = os.path.splitext(filename)
+    key = (os.path.abspath(directory), base_name, extension)
+    with _name_counters_lock:
+        counter = _name_counters.get(key, 0)
+    
+    while True:
+        candidate = os.path.join(directory, f"{base_name}_{counter}{extension}" if counter else filename)
+        counter += 1
+        if os.path.exists(candidate):
+            continue
+        try:
+            os.close(os.open(candidate + '.part', os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644))
+        except FileExistsError:
+            continue
+        # Otra descarga pudo publicar este nombre entre la comprobación y la reserva
+        if os.path.exists(candidate):
+            os.remove(candidate + '.part')
+            continue
+        with _name_counters_lock:
+            _name_counters[key] = max(_name_counters.get(key, 0), counter)
+        return candidate
+
+# Escritura de las descargas directas: lecturas de READ_SIZE sobre un búfer reutilizable
+# que se vuelca al disco en bloques alineados de WRITE_BLOCK_SIZE
+READ_SIZE = 256 * 1024
+WRITE_BLOCK_SIZE = 1024 * 1024
+
+# Veces que se repite un segmento cuyo hash no coincide con el anunciado por el servidor
+SEGMENT_VERIFY_RETRIES = 2
+
+# Espera antes de sustituir una conexión cerrada a mitad de respuesta (segmento acortado o
+# detenido): el servidor tarda un poco en darla por cerrada y la nueva podría recibir un 429
+SEGMENT_CLOSE_GRACE = 0.2
+
+# Errores de posix_fallocate que solo indican que el sistema de archivos no lo admite
+FALLOCATE_UNSUPPORTED = {errno.EOPNOTSUPP, errno.EINVAL, errno.ENOSYS}
+
+# Escrituras en los archivos de yt-dlp (--download-archive) de todas las descargas del proceso
+_ytdlp_archive_lock = threading.Lock()
+
+class RangeNotSupported(Exception):
+    """El servidor ignoró la cabecera Range y devolvió el archivo completo"""
+
+class RangeSegment:
+    """Rango de bytes que descarga una conexión.
+    
+    Con el ajuste automático de conexiones, end puede acortarse mientras se
+    descarga (otra conexión se queda con el final) y stopped pide a la
+    conexión que se detenga dejando lo que falta para más tarde.
+    """
+    
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.stopped = False
+        self.shortened = False
+        self.splittable = False  # Solo cuando ya hay respuesta y el rango no se verifica con su propio hash
+
+# Estadísticas del pool de conexiones compartido
+_pool_stats = {'requests': 0, 'new_connections': 0}
+_pool_stats_lock = threading.Lock()
+
+def _count_pool_stat(key):
+    with _pool_stats_lock:
+        _pool_stats[key] += 1
+
+# Métricas del trabajo que hace la petición en curso en cada hilo
+_request_context = threading.local()
+
+class TimedConnectionMixin:
+    """Mide DNS, TCP y TLS de cada conexión nueva y los anota en las métricas del trabajo.
+    
+    El nombre se resuelve una sola vez aquí (para medirlo por separado) y
+    urllib3 conecta a la dirección obtenida; si hay varias direcciones y la
+    primera no responde, urllib3 vuelve a resolver y las prueba todas.
+    """
+    
+    def _new_conn(self):
+        host = self._dns_host
+        started = time.monotonic()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except OSError:
+            addresses = []  # urllib3 volverá a intentarlo y dará su propio error
+        resolved = time.monotonic()
+        try:
+            if addresses:
+                self._dns_host = addresses[0][4][0]
+            try:
+                sock = super()._new_conn()
+            except Exception:
+                if len(addresses) < 2:
+                    raise
+                self._dns_host = host
+                sock = super()._new_conn()
+        finally:
+            # host (SNI, cabecera Host) se deriva de _dns_host
+            self._dns_host = host
+        self._timings = (resolved - started, time.monotonic() - resolved)
+        return sock
+    
+    def connect(self):
+        started = time.monotonic()
+        super().connect()
+        dns, tcp = getattr(self, '_timings', (0.0, 0.0))
+        metrics = getattr(_request_context, 'metrics', None)
+        if metrics:
+            tls = max(0.0, time.monotonic() - started - dns - tcp) if self.scheme == 'https' else None
+            metrics.add_connection(dns, tcp, tls)
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    scheme = 'http'
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    scheme = 'https'
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    """Pool HTTP que cuenta las conexiones nuevas (fallos del pool)"""
+    ConnectionCls = TimedHTTPConnection
+    
+    def _new_conn(self):
+        _count_pool_stat('new_connections')
+        return super()._new_conn()
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """Pool HTTPS que cuenta las conexiones nuevas (fallos del pool)"""
+    ConnectionCls = TimedHTTPSConnection
+    
+    def _new_conn(self):
+        _count_pool_stat('new_connections')
+        return super()._new_conn()
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """Adaptador de requests que reutiliza conexiones y registra aciertos del pool"""
+    
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': CountingHTTPConnectionPool,
+            'https': CountingHTTPSConnectionPool
+        }
+    
+    def send(self, request, **kwargs):
+        _count_pool_stat('requests')
+        return super().send(request, **kwargs)
+
+_http_session = None
+_http_pool_size = 0
+_http_session_lock = threading.Lock()
+
+def get_http_session(pool_size=10):
+    """Devuelve la sesión HTTP compartida por todas las descargas directas.
+    
+    Mantiene las conexiones vivas entre trabajos (sin repetir TCP+TLS por archivo)
+    y comparte las cookies. El pool crece si se pide un tamaño mayor.
+    """
+    global _http_session, _http_pool_size
+    with _http_session_lock:
+        if _http_session is None:
+            _http_session = requests.Session()
+            _http_session.headers.update({
+                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+                'Accept': '*/*',
+                'Accept-Language': 'es-ES,es;q=0.9,en;q=0.8',
+                'Connection': 'keep-alive'
+            })
+        if pool_size > _http_pool_size:
+            adapter = PooledHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _http_session.mount('http://', adapter)
+            _http_session.mount('https://', adapter)
+            _http_pool_size = pool_size
+        return _http_session
+
+def http_pool_stats():
+    """Peticiones hechas, conexiones abiertas y conexiones reutilizadas del pool"""
+    with _pool_stats_lock:
+        stats = dict(_pool_stats)
+    stats['reused_connections'] = max(0, stats['requests'] - stats['new_connections'])
+    return stats
+
+class TransferProgress:
+    """Agrupa las actualizaciones de progreso de una transferencia.
+    
+    Recibe cada bloque descargado pero solo devuelve una instantánea cuando
+    pasa el intervalo mínimo o cambia el porcentaje, junto con la velocidad
+    instantánea, la velocidad suavizada y el tiempo restante estimado.
+    """
+    
+    def __init__(self, total_size=0, interval=0.1, smoothing=0.3):
+        self.total_size = total_size
+        self.interval = interval
+        self.smoothing = smoothing
+        self.downloaded = 0
+        self.speed = 0.0
+        self.avg_speed = 0.0
+        self.start_time = time.monotonic()
+        self.last_emit_time = 0.0
+        self.last_percent = -1
+        self.sample_time = self.start_time
+        self.sample_bytes = 0
+    
+    @property
+    def percent(self):
+        if self.total_size <= 0:
+            return 0
+        return min(100, int(self.downloaded * 100 / self.total_size))
+    
+    @property
+    def eta(self):
+        if self.total_size <= 0 or self.avg_speed <= 0:
+            return None
+        return max(0, self.total_size - self.downloaded) / self.avg_speed
+    
+    def update(self, downloaded, total_size=None, force=False):
+        """Registra el progreso; devuelve una instantánea si toca notificar"""
+        now = time.monotonic()
+        self.downloaded = downloaded
+        if total_size is not None:
+            self.total_size = total_size
+        
+        # Recalcular velocidades como mucho una vez por intervalo
+        elapsed = now - self.sample_time
+        if elapsed >= self.interval:
+            self.speed = max(0, downloaded - self.sample_bytes) / elapsed
+            if self.avg_speed:
+                self.avg_speed += self.smoothing * (self.speed - self.avg_speed)
+            else:
+                self.avg_speed = self.speed
+            self.sample_time = now
+            self.sample_bytes = downloaded
+        
+        percent = self.percent
+        if not force and percent == self.last_percent and now - self.last_emit_time < self.interval:
+            return None
+        
+        self.last_emit_time = now
+        self.last_percent = percent
+        return self.snapshot()
+    
+    def snapshot(self):
+        return {
+            'downloaded': self.downloaded,
+            'total': self.total_size,
+            'percent': self.percent,
+            'speed': self.speed,
+            'avg_speed': self.avg_speed,
+            'eta': self.eta,
+            'elapsed': time.monotonic() - self.start_time
+        }
+class DownloadEngine:
+    """Motor de descargas sin dependencias de Qt.
+    
+    Ejecuta una descarga (yt-dlp o directa) en el hilo que llame a execute()
+    y notifica el avance a través de un listener(event, value) con los
+    eventos 'progress' (int), 'status' (str), 'log' (str), 'transfer' (dict)
+    y 'stage' (str). El post-procesado con ffmpeg no ocupa la plaza de
+    descarga: el archivo en bruto pasa al grupo de post-procesado y se
+    avisa con el evento 'stage' (STAGE_POSTPROCESS).
+    """
+    
+    def __init__(self, url, download_path, file_categories, is_video_platform=False, 
+                 video_quality="best", audio_only=False, custom_name="", segments=4, pool_size=10,
+                 use_warm_pool=True, dedup_policy=DEDUP_OFF, use_history=True, checksum="",
+                 use_info_cache=True, retries=None, adaptive=False, limiter=None, metrics_path=METRICS_PATH,
+                 categories_path=CATEGORIES_PATH, listener=None):
+        self.url = url
+        self.download_path = download_path
+        self.file_categories = file_categories
+        self.category_index = get_category_index(file_categories, categories_path)
+        self.is_video_platform = is_video_platform
+        self.video_quality = video_quality
+        self.audio_only = audio_only
+        self.custom_name = custom_name
+        self.segments = segments
+        self.pool_size = pool_size
+        self.use_warm_pool = use_warm_pool
+        self.dedup_policy = dedup_policy
+        self.use_history = use_history
+        self.use_info_cache = use_info_cache
+        self.info_cache_stale = False
+        self.ytdlp_archive_lines = b''  # Videos que yt-dlp apuntó y falta confirmar
+        self._archive_snapshot_size = 0
+        self.checksum = checksum  # Hash esperado indicado por el usuario ('sha256:HEX', ...)
+        self.expected_checksum = None
+        self.retry = RetryBudget(retries)  # retries: {tipo de error: intentos} (None = valores por defecto)
+        self.adaptive = adaptive  # Ajustar conexiones según el goodput (segments pasa a ser el máximo)
+        self.limiter = limiter or get_bandwidth_limiter()
+        self.metrics_path = metrics_path  # None = no guardar el JSONL
+        self.metrics = JobMetrics(url, kind=None, recorder=get_metrics_recorder())
+        self.listener = listener
+        self.min_segment_size = 1024 * 1024  # No dividir en trozos de menos de 1 MB
+        self.is_cancelled = False
+        self.process = None
+        self._ytdlp_reader = None
+        self.playlist_entries = None  # Entradas obtenidas al expandir una lista
+        self._segment_lock = threading.Lock()
+        self._segment_downloaded = 0
+        self._segment_positions = {}
+        self._segment_failed = False
+        self._hasher = None
+        self._throttle = None
+        self._part_fd = None
+        self._body_prefix = b''  # Inicio del cuerpo ya leído para reconocer el tipo de archivo
+        self._job_concurrency = None
+        self._segment_concurrency = None
+        self.postprocess_task = None  # Trabajo de ffmpeg pendiente tras la descarga
+        self.postprocess_future = None
+    
+    def cancel(self):
+        """Pide que la descarga se detenga; no espera a que termine.
+        
+        yt-dlp recibe SIGTERM al momento y el hilo de la descarga, que lo
+        comprueba al menos cada YTDLP_POLL_INTERVAL segundos, se encarga de
+        matarlo si no ha terminado en YTDLP_STOP_TIMEOUT.
+        """
+        self.is_cancelled = True
+        signal_process(self.process)
+        if self.postprocess_task:
+            self.postprocess_task.cancel()
+        if self.postprocess_future:
+            self.postprocess_future.cancel()
+    
+    def detect_video_platform(self, url):
+        """Detecta si la URL es de una plataforma de video soportada"""
+        video_patterns = [
+            r'youtube\.com/watch',
+            r'youtube\.com/(playlist|@|channel/|c/|user/|shorts/)',
+            r'youtu\.be/',
+            r'vimeo\.com/',
+            r'tiktok\.com/',
+            r'instagram\.com/',
+            r'facebook\.com/',
+            r'twitter\.com/',
+            r'x\.com/',
+            r'twitch\.tv/',
+            r'dailymotion\.com/',
+            r'metacafe\.com/',
+            r'veoh\.com/'
+        ]
+        
+        for pattern in video_patterns:
+            if re.search(pattern, url, re.IGNORECASE):
+                return True
+        return False
+    
+    def check_ytdlp_available(self):
+        """Verifica si yt-dlp está disponible (resultado en caché para la sesión)"""
+        return probe_ytdlp()['available']
+    
+    def install_ytdlp(self):
+        """Intenta instalar yt-dlp automáticamente"""
+        self.emit('log', "🔧 yt-dlp no encontrado, intentando instalar...")
+        self.emit('status', "Instalando yt-dlp...")
+        
+        try:
+            # Intentar con pacman primero (Arch Linux)
+            result = subprocess.run(['sudo', 'pacman', '-S', '--noconfirm', 'yt-dlp'],
+                                  capture_output=True, text=True, timeout=60)
+            if result.returncode == 0:
+                self.emit('log', "✅ yt-dlp instalado con pacman")
+                return True
+        except:
+            pass
+        
+        try:
+            # Fallback a pip
+            result = subprocess.run([sys.executable, '-m', 'pip', 'install', '--user', 'yt-dlp'],
+                                  capture_output=True, text=True, timeout=60)
+            if result.returncode == 0:
+                self.emit('log', "✅ yt-dlp instalado con pip")
+                return True
+        except:
+            pass
+        
+        self.emit('log', "❌ No se pudo instalar yt-dlp automáticamente")
+        return False
+    
+    def get_file_category(self, filename, sniffed=None):
+        """Determina la carpeta del archivo por las reglas del usuario, su extensión o el tipo detectado"""
+        return self.category_index.folder(filename, self.url, sniffed)
+    
+    def sniff_response(self, response):
+        """Lee el principio del cuerpo y devuelve la extensión que corresponde a su contenido, o None.
+        
+        Lo leído se guarda en self._body_prefix para escribirlo al descargar
+        por una sola conexión; no hace falta ninguna petición extra.
+        """
+        buffer = bytearray(SNIFF_SIZE)
+        view = memoryview(buffer)
+        readinto, _ = self.raw_reader(response)
+        size = 0
+        try:
+            while size < SNIFF_SIZE:
+                read = readinto(view[size:])
+                if not read:
+                    break
+                size += read
+        except (OSError, ProtocolError, ReadTimeoutError):
+            # La descarga se encargará del error (y de reintentar) al seguir leyendo
+            pass
+        if size:
+            self._throttle.consume(size, lambda: self.is_cancelled)
+            self.metrics.add_bytes(size)
+        self._body_prefix = bytes(view[:size])
+        return sniff_extension(self._body_prefix)
+    
+    def resolve_filename(self, filename, response):
+        """Completa la extensión del nombre con el contenido o el Content-Type.
+        
+        Devuelve (nombre, extensión detectada en el contenido o None). Solo se
+        mira el contenido si la extensión del nombre no es de ninguna categoría.
+        """
+        if self.category_index.is_known(filename):
+            return filename, None
+        sniffed = self.sniff_response(response)
+        suffix = Path(filename).suffix.lower()
+        if sniffed and (not suffix or suffix in DYNAMIC_SUFFIXES):
+            return f"{filename[:len(filename) - len(suffix)]}{sniffed}", sniffed
+        if '.' not in filename:
+            content_type = response.headers.get('Content-Type', '').split(';')[0]
+            extension = mimetypes.guess_extension(content_type)
+            return filename + (extension or '.bin'), sniffed
+        return filename, sniffed
+    
+    def download_with_ytdlp(self):
+        """Descarga usando yt-dlp para plataformas de video"""
+        success, message, filepath = self.run_ytdlp_download()
+        if not success and self.info_cache_stale and not self.is_cancelled:
+            # La información de la caché ya no servía y se descartó: un intento con extracción nueva
+            self.emit('log', "🔄 Se repite la descarga extrayendo de nuevo la información")
+            success, message, filepath = self.run_ytdlp_download()
+        return success, message, filepath
+    
+    def run_ytdlp_download(self):
+        """Un intento de descarga con yt-dlp (con la información de la caché si la hay)"""
+        self.info_cache_stale = False
+        warm_worker = None
+        throttle = None
+        info_cache = get_info_cache(INFO_CACHE_DIR) if self.use_info_cache else None
+        load_json = info_json = cached = return_code = archive_copy = None
+        output_lines = []
+        try:
+            # Verificar si yt-dlp está disponible
+            if not self.check_ytdlp_available():
+                if not self.install_ytdlp():
+                    return False, "yt-dlp no está disponible y no se pudo instalar", ""
+            
+            # Determinar carpeta de destino
+            if self.audio_only:
+                dest_folder = os.path.join(self.download_path, self.file_categories['musica']['folder'])
+            else:
+                dest_folder = os.path.join(self.download_path, self.file_categories['videos']['folder'])
+            
+            os.makedirs(dest_folder, exist_ok=True)
+            
+            # Configurar argumentos de yt-dlp (el ejecutable lo decide probe_ytdlp)
+            cmd = []
+            
+            # Conservar los .part y fragmentos para que un nuevo intento continúe
+            cmd.extend(['--continue', '--part'])
+            
+            # Progreso y post-procesado en JSON, una línea por actualización
+            cmd.extend(['--newline', '--progress-template', YTDLP_PROGRESS_TEMPLATE,
+                        '--progress-template', YTDLP_POSTPROCESS_TEMPLATE])
+            
+            # Fragmentos HLS/DASH en paralelo, con tantas conexiones como una descarga directa.
+            # yt-dlp no permite cambiarlo en marcha: con ajuste automático se usa lo aprendido del servidor
+            fragments = self.segments
+            controller = self.segment_controller()
+            if controller:
+                fragments = controller.limit
+                self.emit('log', f"🎛️ {fragments} fragmentos en paralelo (aprendido para {self.metrics.host})")
+            cmd.extend(['--concurrent-fragments', str(max(1, fragments))])
+            
+            # Pedir la ruta final (tras post-procesar y mover) en una línea marcada.
+            # --print activa el modo silencioso, así que se desactiva para seguir viendo el progreso
+            cmd.extend(['--print', YTDLP_INFO_TEMPLATE,
+                        '--print', f'after_move:{YTDLP_FILEPATH_MARKER}%(filepath)s', '--no-quiet'])
+            
+            # Las conversiones y reparaciones con ffmpeg se hacen después, fuera de la plaza de descarga
+            cmd.extend(['--fixup', 'never'])
+            
+            # yt-dlp no pasa por el limitador: recibe su parte del ancho de banda al arrancar
+            throttle = self.limiter.register_external((urlparse(self.url).hostname or '').lower())
+            if throttle.fixed_rate:
+                cmd.extend(['--limit-rate', str(throttle.fixed_rate)])
+                self.emit('log', f"🚦 Límite de velocidad: {self.format_bytes(throttle.fixed_rate)}/s")
+            
+            # Saltar sin extraer los videos ya descargados (audio y video por separado). yt-dlp
+            # apunta el video en cuanto termina su parte, antes del post-procesado: recibe una
+            # copia y el video pasa al archivo de verdad solo cuando el trabajo termina bien
+            if self.use_history:
+                archive_copy = self.snapshot_ytdlp_archive()
+                cmd.extend(['--download-archive', archive_copy])
+            
+            if self.audio_only:
+                # Solo se descarga el audio; la conversión a MP3 va al grupo de post-procesado
+                cmd.extend(['-f', 'bestaudio/best'])
+            elif self.video_quality:
+                cmd.extend(['-f', YTDLP_QUALITY_FORMATS.get(self.video_quality, self.video_quality)])
+            
+            # Configurar nombre de archivo
+            if self.custom_name:
+                safe_name = re.sub(r'[^\w\s-]', '', self.custom_name)
+                cmd.extend(['-o', os.path.join(dest_folder, f'{safe_name}.%(ext)s')])
+            else:
+                cmd.extend(['-o', os.path.join(dest_folder, '%(title)s.%(ext)s')])
+            
+            # Información ya extraída (reintento, otra calidad, misma URL): yt-dlp no vuelve a
+            # pedir la página ni los manifiestos. La que escriba se guarda para la próxima vez
+            if info_cache:
+                load_json, info_json = info_cache.temp_path(), info_cache.temp_path()
+                cached = info_cache.copy_to(self.url, load_json)
+                cmd.extend(['--write-info-json', '-o', 'infojson:' + info_json[:-len('.info.json')]])
+            if cached:
+                self.emit('log', f"🗃️ Información del video en caché (extraída hace {self.format_duration(cached.age)}, "
+                                 f"válida {self.format_duration(cached.remaining)} más): no se repite la extracción")
+                # Si las URLs ya no sirven, yt-dlp vuelve a extraer desde webpage_url
+                cmd.extend(['--load-info-json', load_json])
+            else:
+                cmd.append(self.url)
+            
+            self.emit('log', f"🎥 Procesando con yt-dlp: {self.url}")
+            
+            warm_worker = self.start_ytdlp(cmd)
+            
+            output_files = []
+            output_info = {}
+            tracker = TransferProgress()
+            while return_code is None:
+                if self.is_cancelled:
+                    return False, "Descarga cancelada", ""
+                
+                lines, return_code = self.read_ytdlp_output(warm_worker)
+                for output in lines:
+                    # Progreso estructurado: no pasa por el log ni por ninguna expresión regular
+                    if output.startswith(YTDLP_PROGRESS_MARKER):
+                        try:
+                            progress = json.loads(output[len(YTDLP_PROGRESS_MARKER):])
+                        except ValueError:
+                            continue
+                        self.handle_ytdlp_progress(progress, tracker, throttle)
+                        continue
+                    
+                    if output.startswith(YTDLP_POSTPROCESS_MARKER):
+                        self.metrics.start_postprocess()
+                        continue
+                    
+                    if output.startswith(YTDLP_INFO_MARKER):
+                        try:
+                            output_info = json.loads(output[len(YTDLP_INFO_MARKER):])
+                        except ValueError:
+                            output_info = {}
+                        continue
+                    
+                    if output.startswith(YTDLP_FILEPATH_MARKER):
+                        output_files.append(output[len(YTDLP_FILEPATH_MARKER):])
+                        continue
+                    
+                    output = output.strip()
+                    if output:
+                        output_lines.append(output)
+                        
+                        # Mostrar información relevante en el log
+                        lowered = output.lower()
+                        if any(keyword in lowered for keyword in YTDLP_LOG_KEYWORDS):
+                            self.emit('log', f"ℹ️  {output}")
+            
+            if archive_copy:
+                self.collect_ytdlp_archive(archive_copy)
+                archive_copy = None
+            
+            # Al cancelar, yt-dlp recibe SIGTERM y termina con error: no es un fallo de la descarga
+            if self.is_cancelled:
+                return False, "Descarga cancelada", ""
+            
+            # Verificar resultado
+            if return_code == 0:
+                self.emit('log', "✅ Descarga completada con yt-dlp")
+                
+                # yt-dlp informó la ruta final de cada archivo; no hace falta buscar en la carpeta
+                final_path = output_files[-1] if output_files else ""
+                if final_path and os.path.exists(final_path):
+                    task = self.postprocess_task_for(final_path, output_info)
+                    if task:
+                        # La plaza de descarga queda libre: ffmpeg trabaja en el grupo de post-procesado
+                        self.postprocess_task = task
+                        return True, "En cola para post-procesar", final_path
+                    self.record_history(final_path)
+                    self.commit_ytdlp_archive()
+                    return True, self.ytdlp_success_message(final_path), final_path
+                elif any('already been recorded in the archive' in line for line in output_lines):
+                    self.emit('log', "📌 Video ya descargado anteriormente (archivo de yt-dlp), se omite")
+                    previous = self.history_entry(require_validators=False)
+                    if previous:
+                        return True, f"Ya descargado anteriormente:\n{os.path.basename(previous.path)}\n\nUbicación: {os.path.dirname(previous.path)}", previous.path
+                    return True, "Ya descargado anteriormente (registrado en el archivo de yt-dlp)", ""
+                else:
+                    self.commit_ytdlp_archive()
+                    return True, "Descarga completada pero no se pudo localizar el archivo", ""
+            else:
+                error_output = '\n'.join(output_lines[-10:])  # Últimas 10 líneas de error
+                return False, f"Error en yt-dlp:\n{error_output}", ""
+        
+        except Exception as e:
+            return False, f"Error ejecutando yt-dlp: {str(e)}", ""
+        finally:
+            self.release_ytdlp(warm_worker)
+            if throttle:
+                throttle.close()
+            if info_json:
+                self.update_info_cache(info_cache, cached, load_json, info_json, return_code, output_lines)
+            if archive_copy:
+                self.collect_ytdlp_archive(archive_copy)
+    
+    def update_info_cache(self, info_cache, cached, load_json, info_json, return_code, output_lines):
+        """Guarda la información que escribió yt-dlp o descarta la de la caché si no sirvió"""
+        info_cache.discard(load_json)
+        if cached and not self.is_cancelled and (return_code not in (None, 0) or
+                       any('info failed to download' in line for line in output_lines)):
+            # Las URLs guardadas ya no valían: la próxima vez se extrae de nuevo
+            info_cache.forget(self.url)
+            info_cache.discard(info_json)
+            self.info_cache_stale = True
+            self.emit('log', "🗃️ La información en caché ya no era válida, se descarta")
+            return
+        if os.path.exists(info_json) and info_cache.store(self.url, info_json) and not cached:
+            self.emit('log', "🗃️ Información del video guardada en caché")
+    
+    def ytdlp_archive_path(self):
+        return YTDLP_ARCHIVE_AUDIO if self.audio_only else YTDLP_ARCHIVE_VIDEO
+    
+    def snapshot_ytdlp_archive(self):
+        """Copia del archivo de yt-dlp con la que trabaja esta descarga; devuelve su ruta"""
+        fd, copy_path = tempfile.mkstemp(prefix='archdl-ytdlp-archivo-', suffix='.txt')
+        with os.fdopen(fd, 'wb') as copy, _ytdlp_archive_lock:
+            try:
+                with open(self.ytdlp_archive_path(), 'rb') as archive:
+                    shutil.copyfileobj(archive, copy)
+            except FileNotFoundError:
+                pass
+            self._archive_snapshot_size = copy.tell()
+        return copy_path
+    
+    def collect_ytdlp_archive(self, copy_path):
+        """Guarda las líneas que yt-dlp añadió a la copia (pendientes de confirmar) y la borra"""
+        try:
+            with open(copy_path, 'rb') as copy:
+                copy.seek(self._archive_snapshot_size)
+                self.ytdlp_archive_lines = copy.read()
+        except OSError:
+            self.ytdlp_archive_lines = b''
+        try:
+            os.remove(copy_path)
+        except OSError:
+            pass
+    
+    def commit_ytdlp_archive(self):
+        """Apunta en el archivo de yt-dlp los videos de este trabajo, que ya terminó bien"""
+        lines, self.ytdlp_archive_lines = self.ytdlp_archive_lines, b''
+        if not lines.strip():
+            return
+        os.makedirs(APP_DATA_DIR, exist_ok=True)
+        with _ytdlp_archive_lock, open(self.ytdlp_archive_path(), 'ab') as archive:
+            archive.write(lines if lines.endswith(b'\n') else lines + b'\n')
+    
+    def ytdlp_success_message(self, final_path):
+        category = self.file_categories['musica']['folder'] if self.audio_only else self.file_categories['videos']['folder']
+        return f"Video descargado exitosamente:\n{os.path.basename(final_path)}\n\nGuardado en: {category}/"
+    
+    def postprocess_task_for(self, path, info):
+        """Trabajo de ffmpeg que necesita el archivo que entregó yt-dlp, o None.
+        
+        Solo audio: convertir a MP3 (si no lo es ya). Video: pasar a MP4 de
+        verdad lo que yt-dlp dejó como MPEG-TS (HLS) o MP4 fragmentado de
+        DASH, que es lo que antes reparaba él mismo con --fixup.
+        """
+        stem, extension = os.path.splitext(path)
+        extension = extension.lower()
+        if self.audio_only:
+            if extension == '.mp3':
+                return None
+            kind, target = POSTPROCESS_AUDIO, stem + '.mp3'
+        elif info.get('container') == 'm4a_dash' or \
+                (str(info.get('protocol', '')).startswith('m3u8') and extension in ('.mp4', '.m4a')):
+            kind, target = POSTPROCESS_REMUX, path
+        else:
+            return None
+        
+        if not find_ffmpeg():
+            if kind == POSTPROCESS_AUDIO:
+                self.emit('log', f"⚠️ ffmpeg no está instalado: se conserva el audio original ({extension})")
+            else:
+                self.emit('log', "⚠️ ffmpeg no está instalado: el video queda sin reparar el contenedor")
+            return None
+        return PostProcessTask(kind, path, target, info)
+    
+    def start_postprocess(self):
+        """Entrega el archivo descargado al grupo de post-procesado y libera la plaza de descarga"""
+        if self._job_concurrency:
+            self._job_concurrency.release()
+            self._job_concurrency = None
+        label = POSTPROCESS_LABELS[self.postprocess_task.kind]
+        self.emit('log', f"📤 Descarga terminada; pasa a la cola de post-procesado ({label})")
+        self.emit('status', "En cola de post-procesado...")
+        self.emit('stage', STAGE_POSTPROCESS)
+        self.postprocess_future = get_postprocess_pool().submit(self.run_postprocess)
+        # Si se canceló mientras se entregaba, cancel() aún no tenía Future que cancelar
+        if self.is_cancelled:
+            self.postprocess_future.cancel()
+    
+    def run_postprocess(self):
+        """Ejecuta el trabajo de ffmpeg en una plaza del grupo de post-procesado y cierra el trabajo"""
+        task = self.postprocess_task
+        try:
+            if self.is_cancelled:
+                return self.finish_job(False, "Descarga cancelada", "")
+            label = POSTPROCESS_LABELS[task.kind]
+            self.emit('status', f"⚙️ {label}...")
+            self.emit('log', f"⚙️ {label}: {os.path.basename(task.source)}")
+            self.metrics.start_postprocess()
+            success, error = task.run(find_ffmpeg())
+            if self.is_cancelled:
+                return self.finish_job(False, "Descarga cancelada", "")
+            if not success:
+                # El archivo en bruto se conserva: el siguiente intento no lo descarga de nuevo
+                return self.finish_job(False, f"Error al post-procesar con ffmpeg:\n{error}\n\n"
+                                              f"Se conserva el original: {os.path.basename(task.source)}", task.source)
+            self.record_history(task.target)
+            self.commit_ytdlp_archive()
+            return self.finish_job(True, self.ytdlp_success_message(task.target), task.target)
+        except Exception as e:
+            return self.finish_job(False, f"Error inesperado al post-procesar: {str(e)}", "")
+    
+    def wait_postprocess(self):
+        """Espera al post-procesado entregado y devuelve el resultado final del trabajo"""
+        try:
+            return self.postprocess_future.result()
+        except CancelledError:
+            return self.finish_job(False, "Descarga cancelada", "")
+    
+    def extract_info(self):
+        """Información del video con sus formatos, sin descargarlo.
+        
+        Sale de la caché si sigue siendo válida; si no, yt-dlp la extrae
+        (--dump-single-json) y se guarda, así que la descarga que venga
+        después tampoco la repite. Devuelve (éxito, mensaje, info).
+        """
+        info_cache = get_info_cache(INFO_CACHE_DIR)
+        info = info_cache.load(self.url)
+        if info is not None:
+            self.emit('log', f"🗃️ Formatos de la caché: {info.get('title') or self.url}")
+            return True, "Información en caché", info
+        
+        warm_worker = None
+        try:
+            if not self.check_ytdlp_available():
+                return False, "yt-dlp no está disponible", None
+            
+            self.emit('status', "Obteniendo los formatos disponibles...")
+            warm_worker = self.start_ytdlp(['--dump-single-json', '--no-playlist', '--no-warnings', self.url])
+            
+            output_lines = []
+            return_code = None
+            while return_code is None:
+                if self.is_cancelled:
+                    return False, "Cancelado", None
+                lines, return_code = self.read_ytdlp_output(warm_worker)
+                for output in lines:
+                    if output.startswith('{'):
+                        try:
+                            info = json.loads(output)
+                        except ValueError:
+                            pass
+                    elif output.strip():
+                        output_lines.append(output.strip())
+            
+            if return_code != 0 or info is None:
+                error_output = '\n'.join(output_lines[-10:])
+                return False, f"Error al obtener los formatos:\n{error_output}", None
+            if info.get('_type', 'video') != 'video':
+                return False, "La URL es una lista: elige la calidad al descargarla", None
+            
+            if info_cache.store_info(self.url, info):
+                self.emit('log', "🗃️ Información del video guardada en caché")
+            return True, "Información extraída", info
+        
+        except Exception as e:
+            return False, f"Error ejecutando yt-dlp: {str(e)}", None
+        finally:
+            self.release_ytdlp(warm_worker)
+    
+    def expand_playlist(self):
+        """Lista las entradas de una lista o canal sin resolver sus formatos.
+        
+        Usa la extracción plana de yt-dlp (--flat-playlist), que solo descarga
+        el índice. Devuelve (éxito, mensaje, entradas) con un dict por entrada
+        con 'url' y 'title'.
+        """
+        warm_worker = None
+        try:
+            if not self.check_ytdlp_available():
+                if not self.install_ytdlp():
+                    return False, "yt-dlp no está disponible y no se pudo instalar", []
+            
+            self.emit('log', f"📃 Expandiendo lista: {self.url}")
+            self.emit('status', "Obteniendo el índice de la lista...")
+            warm_worker = self.start_ytdlp(['--flat-playlist', '--dump-single-json', '--no-warnings', self.url])
+            
+            output_lines = []
+            info = None
+            return_code = None
+            while return_code is None:
+                if self.is_cancelled:
+                    return False, "Descarga cancelada", []
+                lines, return_code = self.read_ytdlp_output(warm_worker)
+                for output in lines:
+                    if output.startswith('{'):
+                        try:
+                            info = json.loads(output)
+                        except ValueError:
+                            pass
+                    elif output.strip():
+                        output_lines.append(output.strip())
+            
+            if self.is_cancelled:
+                return False, "Descarga cancelada", []
+            
+            if return_code != 0 or info is None:
+                error_output = '\n'.join(output_lines[-10:])
+                return False, f"Error al expandir la lista:\n{error_output}", []
+            
+            entries = []
+            for entry in info.get('entries') or []:
+                url = entry.get('url') or entry.get('webpage_url') or ''
+                if not url.startswith(('http://', 'https://')):
+                    url = entry.get('webpage_url') or ''
+                if url:
+                    entries.append({'url': url, 'title': entry.get('title') or ''})
+            
+            title = info.get('title') or self.url
+            self.emit('log', f"📃 {title}: {len(entries)} entradas")
+            return True, f"Lista expandida:\n{title}\n\n{len(entries)} entradas añadidas a la cola", entries
+        except Exception as e:
+            return False, f"Error ejecutando yt-dlp: {str(e)}", []
+        finally:
+            self.release_ytdlp(warm_worker)
+    
+    def start_ytdlp(self, args):
+        """Lanza yt-dlp en un proceso precalentado o, si no se puede, en uno nuevo.
+        
+        Devuelve el proceso precalentado que se usó (None si se lanzó uno nuevo).
+        """
+        warm_worker = None
+        probe = probe_ytdlp()
+        if self.use_warm_pool and probe['warm']:
+            pool = get_ytdlp_pool()
+            warm_worker = pool.acquire()
+            pool.prewarm()
+        if warm_worker:
+            warm_worker.submit(args)
+            self.process = warm_worker.process
+        else:
+            # Sesión propia para poder detener también los ffmpeg que lance yt-dlp
+            self.process = subprocess.Popen(
+                probe['command'] + args,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                start_new_session=True
+            )
+        self._ytdlp_reader = YtdlpOutputReader(self.process.stdout)
+        # Si se canceló mientras arrancaba, cancel() no tenía aún proceso al que avisar
+        if self.is_cancelled:
+            signal_process(self.process)
+        return warm_worker
+    
+    def read_ytdlp_output(self, warm_worker):
+        """Lee lo que yt-dlp escriba en como mucho YTDLP_POLL_INTERVAL segundos.
+        
+        Devuelve (líneas, código de salida si terminó o None).
+        """
+        lines = []
+        for line in self._ytdlp_reader.read(YTDLP_POLL_INTERVAL):
+            if warm_worker:
+                return_code = warm_worker.parse_job_end(line)
+                if return_code is not None:
+                    return lines, return_code
+            lines.append(line)
+        if self._ytdlp_reader.eof:
+            return lines, self.process.wait()
+        return lines, None
+    
+    def handle_ytdlp_progress(self, progress, tracker, throttle):
+        """Aplica una actualización de progreso de yt-dlp (JSON de YTDLP_PROGRESS_TEMPLATE)"""
+        downloaded = progress.get('downloaded_bytes') or 0
+        total_size = progress.get('total_bytes') or progress.get('total_bytes_estimate') or 0
+        # Los bytes de yt-dlp también cuentan para el límite global; un formato nuevo empieza de cero
+        added = downloaded - tracker.downloaded if downloaded >= tracker.downloaded else downloaded
+        if added > 0:
+            throttle.account(added)
+            self.metrics.add_bytes(added)
+            self.adapt_bytes(added)
+        
+        snapshot = tracker.update(int(downloaded), int(total_size))
+        if snapshot is None:
+            return
+        # yt-dlp ya calcula la velocidad y el tiempo restante (también con fragmentos)
+        if progress.get('speed'):
+            snapshot['speed'] = snapshot['avg_speed'] = progress['speed']
+        if progress.get('eta') is not None:
+            snapshot['eta'] = progress['eta']
+        if progress.get('fragment_index') and progress.get('fragment_count'):
+            snapshot['fragments'] = (progress['fragment_index'], progress['fragment_count'])
+        self.report_progress(snapshot)
+    
+    def release_ytdlp(self, warm_worker):
+        """Devuelve el proceso precalentado al grupo o detiene el proceso propio.
+        
+        Si la descarga se canceló, yt-dlp se detiene con un tiempo máximo
+        aunque esté en mitad de un post-procesado.
+        """
+        process, self.process = self.process, None
+        if self._ytdlp_reader:
+            self._ytdlp_reader.close()
+            self._ytdlp_reader = None
+        if warm_worker:
+            if self.is_cancelled:
+                warm_worker.stop()
+            get_ytdlp_pool().release(warm_worker)
+        elif process:
+            if process.poll() is None:
+                stop_process(process)
+            process.stdout.close()
+    
+    def download_direct_file(self):
+        """Descarga archivos directos usando requests"""
+        final_path = None
+        part_state = None
+        try:
+            self.emit('log', f"🔄 Descarga directa: {self.url}")
+            self._throttle = self.limiter.register((urlparse(self.url).hostname or '').lower())
+            
+            # Si ya se descargó, pedirla solo si cambió desde entonces
+            previous = self.history_entry()
+            request_headers = previous.conditional_headers() if previous else {}
+            
+            response = self.get_with_retry(self.url, headers=request_headers, stream=True, timeout=30)
+            if response.status_code == 304 and previous:
+                response.close()
+                self.emit('log', "📌 Sin cambios en el servidor (304), no se vuelve a descargar")
+                return True, f"Sin cambios desde la última descarga:\n{os.path.basename(previous.path)}\n\nUbicación: {os.path.dirname(previous.path)}", previous.path
+            
+            if self.is_cancelled:
+                return False, "Descarga cancelada", ""
+            
+            # Obtener información del archivo
+            content_disposition = response.headers.get('Content-Disposition')
+            filename = self.get_filename_from_url(self.url, content_disposition)
+            
+            # Sin extensión conocida, el tipo sale de los primeros bytes o del Content-Type
+            filename, sniffed = self.resolve_filename(filename, response)
+            if sniffed:
+                self.emit('log', f"🔍 Tipo detectado por el contenido: {sniffed}")
+            
+            if self.custom_name:
+                # Usar nombre personalizado pero conservar extensión
+                original_ext = Path(filename).suffix
+                safe_name = re.sub(r'[^\w\s-]', '', self.custom_name)
+                filename = f"{safe_name}{original_ext}" if original_ext else f"{safe_name}.bin"
+            
+            # Determinar carpeta de destino
+            category_folder = self.get_file_category(filename, sniffed)
+            dest_folder = os.path.join(self.download_path, category_folder)
+            os.makedirs(dest_folder, exist_ok=True)
+            
+            # Obtener tamaño del archivo
+            total_size = int(response.headers.get('Content-Length', 0))
+            if response.headers.get('Content-Encoding', 'identity').lower() not in ('', 'identity'):
+                # Con compresión el Content-Length no es el tamaño final del archivo
+                total_size = 0
+            
+            # Reanudar una descarga parcial de esta URL o reservar un nombre nuevo
+            final_path, part_state = self.find_partial_download(dest_folder, filename)
+            if final_path and not self.validate_part_state(part_state, response, total_size):
+                self.emit('log', "♻️ El archivo remoto cambió, se descarta la descarga parcial")
+                self.discard_partial(final_path)
+                part_state = None
+            if not final_path:
+                final_path = reserve_filepath(dest_folder, filename)
+            
+            self.emit('log', f"📄 Archivo: {os.path.basename(final_path)}")
+            self.emit('log', f"📁 Guardando en: {category_folder}/")
+            
+            if total_size > 0:
+                self.emit('log', f"📏 Tamaño: {self.format_bytes(total_size)}")
+            
+            accepts_ranges = self.server_accepts_ranges(response, total_size)
+            if part_state and not accepts_ranges:
+                self.emit('log', "⚠️ El servidor no admite rangos, la descarga empieza de cero")
+                part_state = None
+            
+            # Si el servidor anuncia el hash y ese contenido ya está en disco no hace falta descargarlo
+            reused_path = self.reuse_known_content(response, total_size, final_path)
+            if reused_path:
+                response.close()
+                self.discard_partial(final_path)
+                self.record_history(reused_path, total_size, response.headers.get('ETag'),
+                                    response.headers.get('Last-Modified'))
+                return True, f"Contenido ya descargado:\n{os.path.basename(reused_path)}\n\nUbicación: {os.path.dirname(reused_path)}", reused_path
+            
+            # Hash esperado: indicado por el usuario, anunciado por el servidor o en un .sha256 / SHA256SUMS
+            self.expected_checksum = self.resolve_checksum(response, total_size)
+            if self.expected_checksum:
+                self.emit('log', f"🔐 Se verificará el {self.expected_checksum.label} "
+                                 f"({self.expected_checksum.source})")
+            
+            if part_state:
+                done = self.completed_bytes(part_state['completed'])
+                self.emit('log', f"🔁 Reanudando descarga: {self.format_bytes(done)} ya descargados")
+            else:
+                part_state = self.new_part_state(response, total_size)
+            self._hasher = self.new_hasher(final_path, part_state)
+            
+            # Un único descriptor para todas las conexiones, con el espacio ya reservado
+            self._part_fd = self.open_part_file(final_path, total_size)
+            
+            # Descargar archivo (en paralelo por rangos si el servidor lo permite)
+            missing = self.missing_ranges(part_state['completed'], total_size)
+            use_ranges = accepts_ranges and (part_state['completed'] or self.supports_segmented(total_size))
+            
+            while True:
+                try:
+                    if use_ranges:
+                        response.close()
+                        self._body_prefix = b''
+                        completed = self.download_ranges(final_path, missing, part_state)
+                    else:
+                        completed = self.download_single_stream(response, final_path, part_state)
+                    break
+                except RangeNotSupported:
+                    self.emit('log', "⚠️ El servidor no respetó los rangos, usando una sola conexión")
+                    self.metrics.add_retry()
+                    accepts_ranges = use_ranges = False
+                    part_state = self.restart_part(final_path, response, total_size)
+                    response = self.get_with_retry(self.url, stream=True, timeout=30)
+                except requests.RequestException as e:
+                    response.close()
+                    if self._segment_failed:
+                        # Un segmento agotó sus reintentos: no se anuncia otro que no va a ocurrir
+                        raise
+                    delay = self.retry_delay(e, "Descarga interrumpida")
+                    if delay is None or not self.wait_retry(delay):
+                        raise
+                    if accepts_ranges and total_size > 0:
+                        # Continuar desde el último byte bueno; solo se piden los huecos
+                        missing = self.missing_ranges(part_state['completed'], total_size)
+                        use_ranges = True
+                    else:
+                        self.emit('log', "⚠️ El servidor no admite rangos, la descarga empieza de cero")
+                        part_state = self.restart_part(final_path, response, total_size)
+                        response = self.get_with_retry(self.url, stream=True, timeout=30)
+            
+            if not completed:
+                self.save_part_state(final_path, part_state)
+                self.emit('log', "💾 Descarga parcial guardada, se reanudará en el próximo intento")
+                return False, "Descarga cancelada", ""
+            
+            # Verificación, publicación y deduplicación cuentan como post-procesado
+            self.metrics.start_postprocess()
+            
+            # Hashes del contenido calculados durante la transferencia
+            digests = self._hasher.finish() if self._hasher else {}
+            expected = self.expected_checksum
+            if expected and not expected.matches(digests):
+                # El contenido está corrupto: no se conserva para reanudar
+                self.discard_partial(final_path)
+                self.emit('log', f"❌ {expected.label} incorrecto: se esperaba {expected.hexdigest} "
+                                 f"({expected.source}) y se obtuvo {digests.get(expected.algorithm)}")
+                return False, f"El {expected.label} del archivo descargado no coincide ({expected.source})", ""
+            if expected:
+                self.emit('log', f"✅ {expected.label} verificado: {expected.hexdigest}")
+            digest = digests.get(DEDUP_ALGORITHM) if self.dedup_policy != DEDUP_OFF else None
+            
+            # Publicar el archivo completo con su nombre definitivo
+            os.replace(final_path + '.part', final_path)
+            self.remove_part_state(final_path)
+            
+            if digest:
+                final_path = self.apply_dedup_policy(final_path, os.path.getsize(final_path), digest)
+            self.record_history(final_path, os.path.getsize(final_path), part_state.get('etag'),
+                                part_state.get('last_modified'))
+            
+            stats = http_pool_stats()
+            self.emit('log', f"🔌 Conexiones de la sesión: {stats['reused_connections']} reutilizadas, "
+                                  f"{stats['new_connections']} nuevas")
+            
+            filename_result = os.path.basename(final_path)
+            return True, f"Archivo descargado exitosamente:\n{filename_result}\n\nGuardado en: {category_folder}/", final_path
+        
+        except requests.RequestException as e:
+            if part_state and final_path:
+                self.save_part_state(final_path, part_state)
+            self.drop_empty_reservation(final_path)
+            if self.is_cancelled:
+                return False, "Descarga cancelada", ""
+            retries = self.retry.summary()
+            return False, f"Error de conexión: {str(e)}" + (f" (tras {retries})" if retries else ""), ""
+        except Exception as e:
+            self.drop_empty_reservation(final_path)
+            return False, f"Error inesperado: {str(e)}", ""
+        finally:
+            if self._part_fd is not None:
+                os.close(self._part_fd)
+                self._part_fd = None
+            if self._throttle:
+                self._throttle.close()
+                self._throttle = None
+    
+    def get_with_retry(self, url, **kwargs):
+        """GET que falla con los códigos de error HTTP y reintenta los fallos pasajeros"""
+        while True:
+            try:
+                response = self.http_get(url, **kwargs)
+                response.raise_for_status()
+                return response
+            except requests.RequestException as e:
+                if e.response is not None:
+                    e.response.close()
+                delay = self.retry_delay(e, "Petición fallida")
+                if delay is None or not self.wait_retry(delay):
+                    raise
+    
+    def retry_delay(self, error, what, attempt=None):
+        """Anota un reintento tras error y devuelve cuánto esperar, o None si no se reintenta"""
+        if self.is_cancelled:
+            return None
+        error_class, delay = self.retry.next_delay(error, attempt)
+        if delay is None:
+            return None
+        self.metrics.add_retry()
+        self.adapt_error(error_class)
+        summary = self.retry.summary()
+        self.emit('log', f"🔁 {what} ({ERROR_CLASS_LABELS[error_class]}, {self.metrics.host}): {error}. "
+                         f"Reintento en {delay:.1f} s · {summary}")
+        self.emit('status', f"Reintentando en {delay:.0f} s... · 🔁 {summary}")
+        return delay
+    
+    def segment_controller(self):
+        """Controlador de conexiones del servidor de la descarga, o None sin ajuste automático"""
+        if not self.adaptive:
+            return None
+        return get_concurrency_tuner().host_controller(self.metrics.host, self.segments)
+    
+    def adapt_bytes(self, size):
+        """Cuenta los bytes recibidos en el goodput de los controladores de concurrencia"""
+        for controller in (self._job_concurrency, self._segment_concurrency):
+            if controller:
+                decision = controller.add_bytes(size)
+                if decision:
+                    self.emit('log', f"🎛️ {decision}")
+    
+    def adapt_error(self, error_class):
+        """Un fallo reduce las conexiones de la descarga o, si no es segmentada, las descargas simultáneas"""
+        controller = self._segment_concurrency or self._job_concurrency
+        if controller:
+            decision = controller.add_error(f"{ERROR_CLASS_LABELS[error_class]} en {self.metrics.host}")
+            if decision:
+                self.emit('log', f"🎛️ {decision}")
+    
+    def wait_retry(self, delay):
+        """Espera antes de reintentar atendiendo la cancelación. Devuelve False si se interrumpió"""
+        deadline = time.monotonic() + delay
+        while not (self.is_cancelled or self._segment_failed):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return True
+            time.sleep(min(remaining, 0.2))
+        return False
+    
+    def restart_part(self, final_path, response, total_size):
+        """Vuelve a empezar el .part desde cero (el servidor no permite continuar). Devuelve el estado nuevo"""
+        part_state = self.new_part_state(response, total_size)
+        self._hasher = self.new_hasher(final_path, part_state)
+        self._segment_failed = False
+        if not total_size:
+            # Sin tamaño conocido no hay espacio reservado: se descarta lo ya escrito
+            os.ftruncate(self._part_fd, 0)
+        return part_state
+    
+    def http_get(self, url, **kwargs):
+        """GET con la sesión compartida anotando conexiones nuevas y TTFB en las métricas"""
+        _request_context.metrics = self.metrics
+        try:
+            response = get_http_session(self.pool_size).get(url, **kwargs)
+        finally:
+            _request_context.metrics = None
+        self.metrics.add_response(response)
+        return response
+    
+    def drop_empty_reservation(self, final_path):
+        """Libera el nombre reservado si la descarga falló antes de escribir nada"""
+        if not final_path or os.path.exists(final_path + '.part.json'):
+            return
+        try:
+            if os.path.getsize(final_path + '.part') == 0:
+                os.remove(final_path + '.part')
+        except OSError:
+            pass
+    
+    def history_entry(self, require_validators=True):
+        """Última descarga de esta URL si su archivo sigue intacto en disco"""
+        if not self.use_history:
+            return None
+        try:
+            entry = get_download_history(HISTORY_DB_PATH).get(self.url)
+        except Exception as e:
+            self.emit('log', f"⚠️ Historial de descargas no disponible: {e}")
+            return None
+        if not entry or not entry.file_is_intact():
+            return None
+        if require_validators and not (entry.etag or entry.last_modified):
+            return None
+        return entry
+    
+    def record_history(self, path, size=None, etag=None, last_modified=None):
+        """Guarda la descarga completada para repetirla de forma condicional"""
+        if not self.use_history:
+            return
+        try:
+            if size is None:
+                size = os.path.getsize(path)
+            get_download_history(HISTORY_DB_PATH).record(self.url, path, size, etag, last_modified)
+        except Exception as e:
+            self.emit('log', f"⚠️ Historial de descargas no disponible: {e}")
+    
+    def new_hasher(self, final_path, state):
+        """Prepara el hash en streaming del .part (los rangos ya descargados se leen de disco).
+        
+        Se calculan a la vez el SHA-256 de la deduplicación y el algoritmo del
+        checksum esperado, en una sola pasada sobre los datos.
+        """
+        algorithms = set()
+        if self.dedup_policy != DEDUP_OFF:
+            algorithms.add(DEDUP_ALGORITHM)
+        if self.expected_checksum:
+            algorithms.add(self.expected_checksum.algorithm)
+        if not algorithms:
+            return None
+        hasher = StreamHasher(final_path + '.part', sorted(algorithms))
+        for start, end in self.merge_ranges(state['completed']):
+            hasher.mark_written(start, end + 1)
+        return hasher
+    
+    def reuse_known_content(self, response, total_size, final_path):
+        """Evita la transferencia si el hash anunciado por el servidor ya está en el índice"""
+        if self.dedup_policy not in (DEDUP_HARDLINK, DEDUP_SKIP) or total_size <= 0:
+            return None
+        digest = representation_digests(response.headers).get(DEDUP_ALGORITHM)
+        if not digest:
+            return None
+        try:
+            existing = get_dedup_index(DEDUP_DB_PATH).lookup(total_size, digest)
+        except Exception as e:
+            self.emit('log', f"⚠️ Índice de duplicados no disponible: {e}")
+            return None
+        if not existing:
+            return None
+        self.emit('log', f"♻️ El servidor anuncia un contenido ya descargado: {existing}")
+        return self.apply_dedup_policy(final_path, total_size, digest)
+    
+    def resolve_checksum(self, response, total_size):
+        """Devuelve el ExpectedChecksum con el que se verificará la descarga, o None"""
+        if self.checksum:
+            return parse_checksum(self.checksum)
+        
+        advertised = representation_digests(response.headers)
+        algorithm = strongest(advertised)
+        if algorithm:
+            return ExpectedChecksum(algorithm, advertised[algorithm], "anunciado por el servidor")
+        
+        if total_size >= CHECKSUM_DISCOVERY_MIN_SIZE:
+            return self.discover_checksum()
+        return None
+    
+    def discover_checksum(self):
+        """Busca el hash en archivos hermanos (.sha256, SHA256SUMS...) pidiéndolos en paralelo"""
+        candidates = checksum_file_urls(self.url)
+        filename = url_filename(self.url)
+        with ThreadPoolExecutor(max_workers=len(candidates)) as executor:
+            found = list(executor.map(lambda candidate: self.fetch_checksum_file(filename, *candidate),
+                                      candidates))
+        # Candidatos ordenados del algoritmo más fuerte al más débil
+        return next((checksum for checksum in found if checksum), None)
+    
+    def fetch_checksum_file(self, filename, url, algorithm, is_list):
+        """Descarga un archivo de checksums pequeño y extrae el hash de filename"""
+        try:
+            session = get_http_session(self.pool_size)
+            with session.get(url, stream=True, timeout=10) as response:
+                if response.status_code != 200:
+                    return None
+                if int(response.headers.get('Content-Length', 0)) > CHECKSUM_FILE_MAX_SIZE:
+                    return None
+                text = response.raw.read(CHECKSUM_FILE_MAX_SIZE, decode_content=True)
+        except (requests.RequestException, ValueError):
+            return None
+        
+        hexdigest = parse_checksum_file(text.decode('utf-8', 'replace'), filename, algorithm, is_list)
+        if not hexdigest:
+            return None
+        return ExpectedChecksum(algorithm, hexdigest, f"según {url_filename(url)}")
+    
+    def apply_dedup_policy(self, final_path, size, digest):
+        """Registra el archivo en el índice y resuelve los duplicados según la política.
+        
+        Devuelve la ruta con la que queda el contenido (la existente si se omite la copia).
+        """
+        try:
+            index = get_dedup_index(DEDUP_DB_PATH)
+            existing = index.lookup(size, digest, exclude=os.path.abspath(final_path))
+            if not existing:
+                index.add(final_path, size, digest)
+                return final_path
+            
+            if self.dedup_policy == DEDUP_SKIP:
+                if os.path.exists(final_path):
+                    os.remove(final_path)
+                self.emit('log', f"♻️ Contenido duplicado, se conserva el archivo existente: {existing}")
+                return existing
+            
+            if self.dedup_policy == DEDUP_HARDLINK:
+                temp_path = final_path + '.dedup'
+                try:
+                    os.link(existing, temp_path)
+                    os.replace(temp_path, final_path)
+                    self.emit('log', f"🔗 Contenido duplicado, enlazado a: {existing}")
+                except OSError as e:
+                    # Otro sistema de archivos o sin soporte de enlaces: se conserva la copia
+                    self.emit('log', f"⚠️ No se pudo crear el enlace duro ({e}), se conserva la copia")
+            else:
+                self.emit('log', f"ℹ️ Mismo contenido que: {existing}")
+            
+            index.add(final_path, size, digest)
+        except Exception as e:
+            self.emit('log', f"⚠️ Índice de duplicados no disponible: {e}")
+        return final_path
+    
+    def new_part_state(self, response, total_size):
+        """Crea el registro de estado de una descarga parcial"""
+        return {
+            'url': self.url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'total_size': total_size,
+            'completed': []
+        }
+    
+    def load_part_state(self, final_path):
+        """Lee el archivo de estado (.part.json) asociado a una descarga parcial"""
+        try:
+            with open(final_path + '.part.json', 'r', encoding='utf-8') as state_file:
+                return json.load(state_file)
+        except (OSError, ValueError):
+            return None
+    
+    def save_part_state(self, final_path, state):
+        """Guarda el estado de forma atómica para sobrevivir a un cierre inesperado"""
+        state_path = final_path + '.part.json'
+        temp_path = state_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as state_file:
+                json.dump(state, state_file)
+            os.replace(temp_path, state_path)
+        except OSError:
+            pass
+    
+    def remove_part_state(self, final_path):
+        try:
+            os.remove(final_path + '.part.json')
+        except OSError:
+            pass
+    
+    def discard_partial(self, final_path):
+        """Elimina el .part y su estado cuando ya no se pueden reanudar"""
+        self.remove_part_state(final_path)
+        try:
+            os.remove(final_path + '.part')
+        except OSError:
+            pass
+    
+    def find_partial_download(self, directory, filename):
+        """Busca un .part previo de esta misma URL entre los nombres candidatos"""
+        base_name = os.path.splitext(filename)[0]
+        extension = os.path.splitext(filename)[1]
+        counter = 1
+        candidate = os.path.join(directory, filename)
+        
+        while os.path.exists(candidate) or os.path.exists(candidate + '.part'):
+            if not os.path.exists(candidate) and os.path.exists(candidate + '.part'):
+                state = self.load_part_state(candidate)
+                if state and state.get('url') == self.url:
+                    return candidate, state
+            candidate = os.path.join(directory, f"{base_name}_{counter}{extension}")
+            counter += 1
+        
+        return None, None
+    
+    def validate_part_state(self, state, response, total_size):
+        """Comprueba que el recurso remoto no cambió desde la descarga parcial"""
+        if state.get('total_size') != total_size or total_size <= 0:
+            return False
+        
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if state.get('etag') and etag:
+            return state['etag'] == etag
+        if state.get('last_modified') and last_modified:
+            return state['last_modified'] == last_modified
+        # Sin validadores no hay forma de asegurar que el contenido es el mismo
+        return False
+    
+    def completed_bytes(self, completed):
+        return sum(end - start + 1 for start, end in completed)
+    
+    def merge_ranges(self, ranges):
+        """Une rangos (inicio, fin) solapados o contiguos"""
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return merged
+    
+    def missing_ranges(self, completed, total_size):
+        """Calcula los huecos que faltan por descargar"""
+        missing = []
+        position = 0
+        for start, end in self.merge_ranges(completed):
+            if start > position:
+                missing.append((position, start - 1))
+            position = max(position, end + 1)
+        if position < total_size:
+            missing.append((position, total_size - 1))
+        return missing
+    
+    def server_accepts_ranges(self, response, total_size):
+        """Indica si el servidor permite pedir rangos de bytes del archivo"""
+        if total_size <= 0:
+            return False
+        if response.headers.get('Accept-Ranges', '').lower() != 'bytes':
+            return False
+        # Con compresión el Content-Length no corresponde a los bytes finales
+        content_encoding = response.headers.get('Content-Encoding', 'identity').lower()
+        return content_encoding in ('', 'identity')
+    
+    def supports_segmented(self, total_size):
+        """Indica si merece la pena dividir una descarga nueva en varias conexiones"""
+        return self.segments >= 2 and total_size >= self.min_segment_size * 2
+    
+    def download_single_stream(self, response, final_path, state):
+        """Descarga el archivo por una única conexión. Devuelve False si se canceló"""
+        tracker = TransferProgress(state['total_size'])
+        progress = {'downloaded': 0, 'last_save': time.monotonic()}
+        
+        def on_read(size):
+            progress['downloaded'] += size
+            self.report_progress(tracker.update(progress['downloaded']))
+        
+        def on_write(position):
+            state['completed'] = [[0, position - 1]]
+            if time.monotonic() - progress['last_save'] >= 1.0:
+                self.save_part_state(final_path, state)
+                progress['last_save'] = time.monotonic()
+        
+        # Lo leído para reconocer el tipo de archivo es el principio del cuerpo
+        prefix, self._body_prefix = self._body_prefix, b''
+        if prefix:
+            os.pwrite(self._part_fd, prefix, 0)
+            if self._hasher:
+                self._hasher.feed(0, prefix)
+            self.adapt_bytes(len(prefix))
+            on_read(len(prefix))
+            on_write(len(prefix))
+        
+        position = self.copy_response(response, len(prefix), None, on_read, on_write)
+        if position is None:
+            return False
+        if state['total_size'] and position != state['total_size']:
+            raise IncompleteDownload(
+                f"Descarga incompleta: {self.format_bytes(position)} de {self.format_bytes(state['total_size'])}")
+        
+        self.report_progress(tracker.update(progress['downloaded'], force=True))
+        return True
+    
+    def open_part_file(self, final_path, total_size):
+        """Abre el .part una sola vez para todas las conexiones y reserva su tamaño en disco.
+        
+        Con posix_fallocate el sistema de archivos asigna el espacio de una vez
+        (menos fragmentación en ext4/btrfs y error inmediato si no cabe).
+        """
+        fd = os.open(final_path + '.part', os.O_RDWR | os.O_CREAT, 0o644)
+        if total_size > 0 and os.fstat(fd).st_size < total_size:
+            try:
+                os.posix_fallocate(fd, 0, total_size)
+            except AttributeError:
+                # Sistema sin posix_fallocate: archivo disperso
+                os.ftruncate(fd, total_size)
+            except OSError as e:
+                if e.errno not in FALLOCATE_UNSUPPORTED:
+                    # Sin espacio (ENOSPC) o archivo demasiado grande (EFBIG): falla antes de transferir nada
+                    os.close(fd)
+                    raise
+                # Sin soporte (tmpfs antiguo, NFS): archivo disperso
+                os.ftruncate(fd, total_size)
+        return fd
+    
+    def raw_reader(self, response):
+        """Devuelve una función readinto(view) para leer el cuerpo sin crear objetos por bloque.
+        
+        Si el cuerpo no viene comprimido se lee directamente del http.client
+        subyacente; si no, se usan los bloques ya descomprimidos de urllib3.
+        """
+        reader = getattr(response, 'archdl_reader', None)
+        if reader:
+            # Ya se empezó a leer (para reconocer el tipo): se sigue con el mismo lector
+            return reader
+        raw = response.raw
+        content_encoding = response.headers.get('Content-Encoding', 'identity').lower()
+        fp = getattr(raw, '_fp', None)
+        if content_encoding in ('', 'identity') and hasattr(fp, 'readinto'):
+            return fp.readinto, True
+        
+        chunks = raw.stream(READ_SIZE, decode_content=True)
+        leftover = [b'']
+        
+        def readinto(view):
+            data = leftover[0]
+            while not data:
+                data = next(chunks, None)
+                if data is None:
+                    return 0
+            size = min(len(view), len(data))
+            view[:size] = data[:size]
+            leftover[0] = data[size:]
+            return size
+        response.archdl_reader = readinto, False
+        return response.archdl_reader
+    
+    def copy_response(self, response, start, end, on_read, on_write, part_hash=None, segment=None):
+        """Copia el cuerpo de la respuesta al .part a partir de start (hasta end incluido, si se indica).
+        
+        Lee con readinto sobre un búfer reutilizable y escribe con pwrite en
+        bloques alineados de WRITE_BLOCK_SIZE sobre el descriptor compartido.
+        on_read(bytes) se llama en cada lectura y on_write(posición) tras cada
+        escritura. Con part_hash los datos se acumulan en ese hash en lugar del
+        del archivo (segmentos que se verifican por separado). Con segment, el
+        final se relee de segment.end en cada bloque y la copia se detiene si se
+        marca segment.stopped. Devuelve la posición final o None si se canceló.
+        """
+        buffer = bytearray(WRITE_BLOCK_SIZE)
+        view = memoryview(buffer)
+        readinto, direct = self.raw_reader(response)
+        block_start = start
+        filled = 0
+        finished = False
+        stopped = False
+        requested_end = end
+        
+        def flush():
+            written = 0
+            while written < filled:
+                written += os.pwrite(self._part_fd, view[written:filled], block_start + written)
+            if part_hash is not None:
+                part_hash.update(view[:filled])
+            elif self._hasher:
+                self._hasher.feed(block_start, view[:filled])
+        
+        try:
+            while True:
+                if self.is_cancelled or self._segment_failed:
+                    break
+                if segment is not None:
+                    if segment.stopped:
+                        stopped = True
+                        break
+                    end = segment.end
+                
+                # El bloque termina en el siguiente múltiplo de WRITE_BLOCK_SIZE
+                target = WRITE_BLOCK_SIZE - block_start % WRITE_BLOCK_SIZE
+                if end is not None:
+                    target = min(target, end + 1 - block_start)
+                    if target <= 0:
+                        finished = True
+                        break
+                
+                try:
+                    size = readinto(view[filled:min(target, filled + READ_SIZE)])
+                except (socket.timeout, ReadTimeoutError) as e:
+                    raise requests.exceptions.ReadTimeout(e)
+                except (OSError, ProtocolError) as e:
+                    # Conexión cortada a mitad del cuerpo: lo recibido ya cuenta para continuar
+                    raise requests.ConnectionError(e)
+                if not size:
+                    finished = True
+                    break
+                self._throttle.consume(size, lambda: self.is_cancelled)
+                self.metrics.add_bytes(size)
+                self.adapt_bytes(size)
+                filled += size
+                on_read(size)
+                
+                if filled == target:
+                    flush()
+                    block_start += filled
+                    filled = 0
+                    on_write(block_start)
+        finally:
+            # Guardar lo ya recibido para que la reanudación no lo pida otra vez
+            if filled:
+                flush()
+                block_start += filled
+                filled = 0
+                on_write(block_start)
+        
+        if not (finished or stopped):
+            return None
+        if finished and direct and end == requested_end:
+            # Cuerpo leído por completo: la conexión vuelve al pool para reutilizarse
+            response.raw.release_conn()
+        return block_start
+    
+    def split_ranges(self, missing, count=None):
+        """Reparte los huecos pendientes en como máximo count rangos (por defecto self.segments)"""
+        total_missing = sum(end - start + 1 for start, end in missing)
+        count = max(1, min(count or self.segments, total_missing // self.min_segment_size))
+        ranges = []
+        for gap_start, gap_end in missing:
+            gap_size = gap_end - gap_start + 1
+            pieces = max(1, min(round(count * gap_size / total_missing), gap_size // self.min_segment_size))
+            piece_size = gap_size // pieces
+            start = gap_start
+            for index in range(pieces):
+                end = gap_end if index == pieces - 1 else start + piece_size - 1
+                ranges.append((start, end))
+                start = end + 1
+        return ranges
+    
+    def download_segment(self, segment, final_path, validator):
+        """Descarga un rango de bytes y lo escribe en su posición dentro del archivo.
+        
+        Si la conexión falla, el segmento se reintenta por su cuenta desde el
+        último byte escrito; el resto de segmentos siguen descargando. Devuelve
+        False si se canceló (un segmento detenido con stopped devuelve True).
+        """
+        start = segment.start
+        segment_headers = {}
+        if validator:
+            # Si el recurso cambió el servidor responde 200 con el archivo nuevo
+            segment_headers['If-Range'] = validator
+        
+        def on_read(size):
+            with self._segment_lock:
+                self._segment_downloaded += size
+        
+        def on_write(position):
+            with self._segment_lock:
+                self._segment_positions[start] = position
+        
+        def rewind():
+            # Los datos del rango no se pueden verificar a trozos: se vuelve a pedir entero
+            with self._segment_lock:
+                self._segment_downloaded -= self._segment_positions.get(start, start) - start
+                self._segment_positions[start] = start
+        
+        resume = start
+        corrupt = 0
+        failures = 0  # Fallos seguidos sin avanzar: marcan la espera antes de reintentar
+        while True:
+            if segment.stopped:
+                return True
+            part_hash = None
+            try:
+                segment_headers['Range'] = f'bytes={resume}-{segment.end}'
+                with self.http_get(self.url, headers=segment_headers, stream=True, timeout=30) as response:
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        raise RangeNotSupported(f"Respuesta {response.status_code} a una petición de rango")
+                    
+                    # Si el servidor anuncia el hash del rango, el segmento se verifica por separado
+                    advertised = content_digests(response.headers) if resume == start else {}
+                    algorithm = strongest(advertised)
+                    part_hash = hashlib.new(algorithm) if algorithm else None
+                    segment.splittable = part_hash is None
+                    position = self.copy_response(response, resume, segment.end, on_read, on_write,
+                                                  part_hash, segment)
+                
+                if position is None:
+                    return False
+                if segment.stopped:
+                    return True
+                if position <= segment.end:
+                    raise IncompleteDownload(f"Segmento {start}-{segment.end} incompleto")
+            except requests.RequestException as e:
+                with self._segment_lock:
+                    progressed = self._segment_positions.get(start, start) > resume
+                failures = 0 if progressed else failures + 1
+                delay = self.retry_delay(e, f"Segmento {start}-{segment.end}", failures)
+                if delay is None or not self.wait_retry(delay):
+                    raise
+                if part_hash is not None:
+                    rewind()
+                with self._segment_lock:
+                    resume = self._segment_positions.get(start, start)
+                continue
+            
+            if part_hash is None or part_hash.hexdigest() == advertised[algorithm]:
+                break
+            
+            # Solo se repite este rango; el resto del archivo no se toca
+            corrupt += 1
+            if corrupt > SEGMENT_VERIFY_RETRIES:
+                raise requests.RequestException(
+                    f"Segmento {start}-{segment.end} corrupto tras {SEGMENT_VERIFY_RETRIES} reintentos")
+            self.emit('log', f"⚠️ Segmento {start}-{segment.end} corrupto, se descarga de nuevo")
+            self.metrics.add_retry()
+            rewind()
+            resume = start
+        
+        if part_hash is not None and self._hasher:
+            # El rango ya verificado se hashea desde disco (normalmente desde la caché de páginas)
+            self._hasher.mark_written(start, position)
+        return True
+    
+    def snapshot_part_state(self, state, previous_completed):
+        """Añade al estado los bytes escritos por los segmentos en curso"""
+        with self._segment_lock:
+            written = [[start, position - 1] for start, position in self._segment_positions.items()
+                       if position > start]
+        state['completed'] = self.merge_ranges(previous_completed + written)
+    
+    def split_segment(self, segments):
+        """Parte en dos el segmento al que más le queda y devuelve la mitad final, o None.
+        
+        El corte cae en un múltiplo de WRITE_BLOCK_SIZE por delante del bloque
+        que el segmento está escribiendo, así que basta con acortar su end.
+        """
+        with self._segment_lock:
+            best, best_position, remaining = None, 0, 0
+            for segment in segments:
+                if segment.stopped or not segment.splittable:
+                    continue
+                position = self._segment_positions.get(segment.start, segment.start)
+                if segment.end + 1 - position > remaining:
+                    best, best_position, remaining = segment, position, segment.end + 1 - position
+            if best is None:
+                return None
+            middle = (best_position + remaining // 2) // WRITE_BLOCK_SIZE * WRITE_BLOCK_SIZE
+            if middle < best_position + 2 * WRITE_BLOCK_SIZE or best.end + 1 - middle < self.min_segment_size:
+                return None
+            new_segment = RangeSegment(middle, best.end)
+            best.end = middle - 1
+            best.shortened = True
+            return new_segment
+    
+    def download_ranges(self, final_path, missing, state):
+        """Descarga los rangos pendientes con varias conexiones sobre el archivo .part.
+        
+        Con ajuste automático el número de conexiones sigue al controlador del
+        servidor: si sube, la conexión nueva se queda con la mitad final del
+        segmento al que más le falta; si baja, se detienen los segmentos más
+        recientes y lo que les faltaba vuelve a la cola.
+        """
+        controller = self._segment_concurrency = self.segment_controller()
+        queue = deque(self.split_ranges(missing, controller.limit if controller else None))
+        fixed_limit = len(queue)
+        total_size = state['total_size']
+        previous_completed = [list(item) for item in state['completed']]
+        if controller:
+            self.emit('log', f"⚡ Descarga segmentada: {controller.limit} conexiones "
+                             f"(ajuste automático, máximo {controller.maximum})")
+        elif len(queue) > 1:
+            self.emit('log', f"⚡ Descarga segmentada: {len(queue)} conexiones")
+        
+        self.save_part_state(final_path, state)
+        
+        validator = state.get('etag') or state.get('last_modified')
+        self._segment_downloaded = self.completed_bytes(previous_completed)
+        tracker = TransferProgress(total_size)
+        tracker.sample_bytes = self._segment_downloaded
+        self._segment_positions = {}
+        self._segment_failed = False
+        last_save = time.monotonic()
+        segments = {}  # future → RangeSegment
+        start_after = 0.0
+        
+        with ThreadPoolExecutor(max_workers=max(self.segments, fixed_limit)) as executor:
+            try:
+                while True:
+                    limit = controller.limit if controller else fixed_limit
+                    while len(segments) < limit and not self.is_cancelled and time.monotonic() >= start_after:
+                        if queue:
+                            segment = RangeSegment(*queue.popleft())
+                        else:
+                            segment = self.split_segment(segments.values()) if controller else None
+                            if segment is None:
+                                break
+                        segments[executor.submit(self.download_segment, segment, final_path, validator)] = segment
+                        if controller:
+                            controller.acquire()
+                    if not segments:
+                        break
+                    
+                    # Sobran conexiones: las más recientes paran y devuelven lo que les falta
+                    excess = len([segment for segment in segments.values() if not segment.stopped]) - limit
+                    for segment in reversed(list(segments.values())):
+                        if excess <= 0:
+                            break
+                        if segment.splittable and not segment.stopped:
+                            segment.stopped = True
+                            excess -= 1
+                    
+                    done, _ = wait(segments, timeout=tracker.interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        segment = segments.pop(future)
+                        if controller:
+                            controller.release()
+                        future.result()
+                        if segment.stopped or segment.shortened:
+                            start_after = time.monotonic() + SEGMENT_CLOSE_GRACE
+                        if segment.stopped:
+                            with self._segment_lock:
+                                position = self._segment_positions.get(segment.start, segment.start)
+                            if position <= segment.end:
+                                queue.append((position, segment.end))
+                    
+                    if time.monotonic() - last_save >= 1.0:
+                        self.snapshot_part_state(state, previous_completed)
+                        self.save_part_state(final_path, state)
+                        last_save = time.monotonic()
+                    
+                    with self._segment_lock:
+                        downloaded_size = self._segment_downloaded
+                    self.report_progress(tracker.update(downloaded_size, force=not segments))
+            except Exception:
+                # Detener el resto de segmentos antes de propagar el error
+                self._segment_failed = True
+                raise
+            finally:
+                if controller:
+                    for _ in segments:
+                        controller.release()
+                self._segment_concurrency = None
+                self.snapshot_part_state(state, previous_completed)
+        
+        return not self.is_cancelled
+    
+    def get_filename_from_url(self, url, content_disposition=None):
+        """Extrae el nombre del archivo de la URL o del header Content-Disposition"""
+        if content_disposition:
+            if 'filename=' in content_disposition:
+                filename = content_disposition.split('filename=')[1].strip('"\'')
+                return unquote(filename)
+        
+        parsed_url = urlparse(url)
+        filename = os.path.basename(parsed_url.path)
+        
+        if filename:
+            # Sin extensión (URLs de CDN) se completa después con el tipo del contenido
+            return unquote(filename)
+        
+        return "archivo_descargado"
+    
+    def report_progress(self, snapshot):
+        """Emite una instantánea de TransferProgress hacia la interfaz"""
+        if snapshot is None:
+            return
+        
+        self.emit('transfer', snapshot)
+        self.emit('progress', snapshot['percent'])
+        
+        parts = []
+        if snapshot['total'] > 0:
+            parts.append(f"{snapshot['percent']}%")
+        else:
+            parts.append(self.format_bytes(snapshot['downloaded']))
+        if snapshot['avg_speed'] > 0:
+            parts.append(f"{self.format_bytes(snapshot['avg_speed'])}/s")
+        if snapshot['eta'] is not None:
+            parts.append(f"ETA {self.format_duration(snapshot['eta'])}")
+        if snapshot.get('fragments'):
+            parts.append("fragmento {}/{}".format(*snapshot['fragments']))
+        if self.retry.total:
+            parts.append(f"🔁 {self.retry.total}")
+        self.emit('status', "Descargando... " + " · ".join(parts))
+    
+    @staticmethod
+    def format_duration(seconds):
+        """Convierte segundos a formato h:mm:ss o m:ss"""
+        seconds = int(seconds)
+        hours, remainder = divmod(seconds, 3600)
+        minutes, seconds = divmod(remainder, 60)
+        if hours:
+            return f"{hours}:{minutes:02d}:{seconds:02d}"
+        return f"{minutes}:{seconds:02d}"
+    
+    @staticmethod
+    def format_bytes(bytes_size):
+        """Convierte bytes a formato legible"""
+        for unit in ['B', 'KB', 'MB', 'GB']:
+            if bytes_size < 1024.0:
+                return f"{bytes_size:.1f} {unit}"
+            bytes_size /= 1024.0
+        return f"{bytes_size:.1f} TB"
+    
+    def emit(self, event, value):
+        """Notifica un evento de la descarga al listener, si hay uno"""
+        if self.listener:
+            self.listener(event, value)
+    
+    def start_metrics(self, kind):
+        self.metrics.set_kind(kind)
+        get_metrics_recorder().job_started(self.metrics)
+    
+    def finish_metrics(self, success, message):
+        """Cierra las métricas del trabajo, las acumula y las añade al JSONL"""
+        if self.metrics.outcome is not None or not self.metrics.kind:
+            return
+        if success:
+            outcome = OUTCOME_OK
+        elif self.is_cancelled:
+            outcome = OUTCOME_CANCELLED
+        else:
+            outcome = OUTCOME_FAILED
+        error = ' | '.join(line.strip() for line in message.split('\n') if line.strip())
+        self.metrics.finish(outcome, '' if success else error[:500])
+        get_metrics_recorder().record(self.metrics, self.metrics_path)
+    
+    def finish_job(self, success, message, filepath):
+        """Cierra las métricas y avisa del resultado final del trabajo"""
+        self.finish_metrics(success, message)
+        if success:
+            self.emit('progress', 100)
+            self.emit('status', "✅ Descarga completada")
+            self.emit('log', f"✅ {message}")
+            if filepath:
+                self.emit('log', f"📍 Ubicación: {filepath}")
+        return success, message, filepath
+    
+    def execute(self, wait_postprocess=True):
+        """Ejecuta la descarga y devuelve (éxito, mensaje, ruta del archivo).
+        
+        Si el archivo necesita post-procesado, con wait_postprocess=False
+        se vuelve en cuanto se entrega (postprocess_future queda pendiente y
+        wait_postprocess() da el resultado final); por defecto se espera.
+        """
+        success, message, filepath = self.download_stage()
+        if self.postprocess_future is None or not wait_postprocess:
+            return success, message, filepath
+        return self.wait_postprocess()
+    
+    def download_stage(self):
+        """Etapa de red: descarga y, si hace falta, entrega el archivo al post-procesado"""
+        # Con ajuste automático la descarga ocupa una plaza del controlador de descargas simultáneas
+        self._job_concurrency = get_concurrency_tuner().jobs if self.adaptive else None
+        if self._job_concurrency:
+            self._job_concurrency.acquire()
+        try:
+            self.emit('status', "Analizando URL...")
+            self.emit('progress', 0)
+            
+            # Las listas y canales se expanden en entradas que la cola descarga por separado
+            if is_playlist_url(self.url):
+                self.start_metrics('lista')
+                success, message, self.playlist_entries = self.expand_playlist()
+                self.finish_metrics(success, message)
+                return success, message, ""
+            
+            # Detectar si es plataforma de video
+            if self.is_video_platform or self.detect_video_platform(self.url):
+                self.start_metrics('yt-dlp')
+                self.emit('log', "🎥 Plataforma de video detectada")
+                if self.checksum:
+                    self.emit('log', "⚠️ El checksum solo se verifica en descargas directas")
+                success, message, filepath = self.download_with_ytdlp()
+                if success and self.postprocess_task:
+                    self.start_postprocess()
+                    return success, message, filepath
+            else:
+                self.start_metrics('directa')
+                self.emit('log', "📁 Descarga directa detectada")
+                success, message, filepath = self.download_direct_file()
+                if self.retry.total:
+                    self.emit('log', f"🔁 {self.metrics.host}: {self.retry.summary()}")
+            
+            return self.finish_job(success, message, filepath)
+        
+        except Exception as e:
+            error_msg = f"Error inesperado: {str(e)}"
+            self.emit('log', f"❌ {error_msg}")
+            self.emit('status', "Error inesperado")
+            self.finish_metrics(False, error_msg)
+            return False, error_msg, ""
+        finally:
+            if self._job_concurrency:
+                self._job_concurrency.release()
+                self._job_concurrency = None
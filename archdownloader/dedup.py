@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Deduplicación por contenido de las descargas directas
+El hash se calcula mientras llegan los datos y se guarda en un índice SQLite
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+import threading
+
+# Qué hacer cuando el contenido descargado ya existe en otra ruta
+DEDUP_OFF = 'off'            # No calcular hashes
+DEDUP_INDEX = 'index'        # Solo registrar el contenido, conservar las copias
+DEDUP_HARDLINK = 'hardlink'  # Sustituir la copia por un enlace duro al archivo existente
+DEDUP_SKIP = 'skip'          # Borrar la copia y devolver el archivo existente
+
+DEDUP_POLICIES = [DEDUP_OFF, DEDUP_INDEX, DEDUP_HARDLINK, DEDUP_SKIP]
+
+DEDUP_POLICY_LABELS = {
+    DEDUP_OFF: 'Desactivada',
+    DEDUP_INDEX: 'Solo indexar',
+    DEDUP_HARDLINK: 'Enlace duro',
+    DEDUP_SKIP: 'Omitir copia'
+}
+
+# Algoritmo con el que se indexa el contenido
+DEDUP_ALGORITHM = 'sha256'
+
+class StreamHasher:
+    """Calcula hashes de un archivo a medida que se escribe, aunque sea por rangos.
+    
+    Los datos contiguos al cursor se hashean directamente desde memoria. Los
+    que llegan adelantados (otros segmentos) se guardan en un búfer acotado y,
+    si no caben, se leen del .part cuando el cursor los alcanza, mientras la
+    descarga sigue en curso (normalmente desde la caché de páginas). Esa
+    lectura se hace sin el cerrojo: los demás segmentos siguen entregando
+    datos, que esperan en el búfer hasta que el cursor llega a ellos.
+    """
+    
+    def __init__(self, path, algorithms=(DEDUP_ALGORITHM,), max_buffer=16 * 1024 * 1024):
+        self.path = path
+        self.max_buffer = max_buffer
+        self.position = 0
+        self._hashes = {name: hashlib.new(name) for name in algorithms}
+        self._pending = {}   # offset -> bytes adelantados en memoria
+        self._buffered = 0
+        self._written = []   # [inicio, fin) ya escritos en disco pero sin hashear
+        self._reading_end = None  # Fin del rango que otro hilo está leyendo del disco
+        self._reader = None
+        self._lock = threading.Lock()
+    
+    def mark_written(self, start, end):
+        """Registra un rango [start, end) que ya está en disco (p. ej. al reanudar)"""
+        with self._lock:
+            self._add_written(start, end)
+            self._advance()
+    
+    def feed(self, offset, data):
+        """Recibe un trozo recién escrito en la posición offset del archivo"""
+        end = offset + len(data)
+        with self._lock:
+            # Mientras otro hilo lee del disco, el cursor efectivo es el final de esa lectura
+            cursor = self.position if self._reading_end is None else self._reading_end
+            if end <= cursor:
+                return
+            if offset < cursor:
+                data = memoryview(data)[cursor - offset:]
+                offset = cursor
+            if offset == self.position and self._reading_end is None:
+                self._update(data)
+                self._advance()
+            elif self._buffered + len(data) <= self.max_buffer:
+                # Copia: el búfer de escritura se reutiliza para el siguiente bloque
+                self._pending[offset] = bytes(data)
+                self._buffered += len(data)
+            else:
+                self._add_written(offset, end)
+    
+    def finish(self):
+        """Hashea lo que quede en disco y devuelve {algoritmo: hexdigest}"""
+        with self._lock:
+            self._pending.clear()
+            self._buffered = 0
+            self._written = []
+            self._read_from_disk(self.position, None)
+            if self._reader:
+                self._reader.close()
+                self._reader = None
+            return {name: digest.hexdigest() for name, digest in self._hashes.items()}
+    
+    def _update(self, data):
+        for digest in self._hashes.values():
+            digest.update(data)
+        self.position += len(data)
+    
+    def _add_written(self, start, end):
+        for interval in self._written:
+            if interval[1] == start:
+                interval[1] = end
+                return
+        self._written.append([start, end])
+    
+    def _advance(self):
+        """Avanza el cursor con los datos contiguos disponibles en memoria o en disco.
+        
+        Se llama con el cerrojo tomado; lo suelta mientras lee del disco.
+        """
+        while self._reading_end is None:
+            data = self._pending.pop(self.position, None)
+            if data is not None:
+                self._buffered -= len(data)
+                self._update(data)
+                continue
+            
+            interval = next((item for item in self._written
+                             if item[0] <= self.position < item[1]), None)
+            if interval is None:
+                break
+            self._written.remove(interval)
+            self._reading_end = interval[1]
+            self._lock.release()
+            try:
+                # Solo este hilo toca los hashes y el cursor hasta que _reading_end vuelve a None
+                self._read_from_disk(self.position, interval[1])
+            finally:
+                self._lock.acquire()
+                self._reading_end = None
+    
+    def _read_from_disk(self, start, end):
+        """Hashea desde el archivo entre start (el cursor) y end (None = hasta el final)"""
+        if self._reader is None:
+            self._reader = open(self.path, 'rb', buffering=0)
+        self._reader.seek(start)
+        while end is None or self.position < end:
+            size = 1024 * 1024 if end is None else min(1024 * 1024, end - self.position)
+            data = self._reader.read(size)
+            if not data:
+                break
+            self._update(data)
+
+class DedupIndex:
+    """Índice SQLite de hash de contenido → rutas de archivos descargados"""
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''CREATE TABLE IF NOT EXISTS contents (
+                                path TEXT PRIMARY KEY,
+                                digest TEXT NOT NULL,
+                                size INTEGER NOT NULL,
+                                mtime REAL NOT NULL,
+                                added REAL NOT NULL)''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS contents_size_digest ON contents (size, digest)')
+        self._db.commit()
+    
+    def lookup(self, size, digest, exclude=None):
+        """Devuelve la ruta de un archivo existente con ese tamaño y hash, o None.
+        
+        Las entradas cuyo archivo desapareció o cambió se eliminan del índice.
+        """
+        with self._lock:
+            rows = self._db.execute('SELECT path, mtime FROM contents WHERE size = ? AND digest = ?',
+                                    (size, digest)).fetchall()
+            stale = []
+            found = None
+            for path, mtime in rows:
+                if path == exclude:
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    stale.append(path)
+                    continue
+                if stat.st_size != size or stat.st_mtime != mtime:
+                    stale.append(path)
+                    continue
+                found = path
+                break
+            if stale:
+                self._db.executemany('DELETE FROM contents WHERE path = ?', [(path,) for path in stale])
+                self._db.commit()
+            return found
+    
+    def contains(self, size, digest):
+        """Indica si el contenido ya está en disco (antes de terminar una transferencia)"""
+        return self.lookup(size, digest) is not None
+    
+    def add(self, path, size, digest):
+        """Registra (o actualiza) el contenido de un archivo terminado"""
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO contents (path, digest, size, mtime, added) '
+                             'VALUES (?, ?, ?, ?, ?)', (path, digest, size, mtime, time.time()))
+            self._db.commit()
+    
+    def forget(self, path):
+        with self._lock:
+            self._db.execute('DELETE FROM contents WHERE path = ?', (os.path.abspath(path),))
+            self._db.commit()
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_dedup_indexes = {}
+_dedup_lock = threading.Lock()
+
+def get_dedup_index(db_path):
+    """Devuelve el índice compartido por todas las descargas para esa base de datos"""
+    with _dedup_lock:
+        if db_path not in _dedup_indexes:
+            _dedup_indexes[db_path] = DedupIndex(db_path)
+        return _dedup_indexes[db_path]
@@ -0,0 +1,1570 @@
+# -*- coding: utf-8 -*-
+"""
+Interfaz gráfica PyQt6 del Descargador Universal
+Es una capa sobre el núcleo (archdownloader.core) que se ejecuta en hilos Qt.
+El núcleo (requests, urllib3), yt-dlp y las métricas se importan la primera
+vez que hacen falta, no al arrancar
+"""
+
+import sys
+import os
+from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
+                            QHBoxLayout, QLabel, QLineEdit, QPushButton, 
+                            QProgressBar, QPlainTextEdit, QGroupBox, QFileDialog,
+                            QMessageBox, QGridLayout, QFrame, QSplitter,
+                            QStatusBar, QMenuBar, QMenu, QComboBox, QCheckBox,
+                            QTabWidget, QSpinBox, QTableWidget, QTableWidgetItem,
+                            QHeaderView, QAbstractItemView)
+from PyQt6.QtCore import QThread, pyqtSignal, Qt, QTimer, QSize
+from PyQt6.QtGui import QFont, QIcon, QPixmap, QPalette, QColor, QAction
+
+from .paths import APP_DATA_DIR, CATEGORIES_PATH, DEFAULT_DOWNLOAD_PATH
+from .categories import FILE_CATEGORIES, get_category_index
+from .dedup import DEDUP_OFF, DEDUP_POLICIES, DEDUP_POLICY_LABELS
+from .bandwidth import get_bandwidth_limiter
+from .checksums import parse_checksum
+from .concurrency import ADAPT_WINDOW, get_concurrency_tuner
+from .logbuffer import LOG_MAX_LINES, LogBuffer
+from .startup import get_startup_profile
+from .jobs import (JOB_QUEUED, JOB_RUNNING, JOB_POSTPROCESSING, JOB_PAUSED, JOB_FAILED, JOB_DONE,
+                   JOB_STATE_LABELS, DownloadQueue)
+
+# Cada cuánto se pintan en el panel los mensajes acumulados
+LOG_FLUSH_INTERVAL_MS = 150
+
+# Copia del registro en disco (opcional, con rotación)
+LOG_FILE_PATH = os.path.join(APP_DATA_DIR, 'registro.log')
+
+# Calidades fijas del selector; detrás se añaden los formatos del video si se piden
+QUALITY_PRESETS = ["Mejor disponible", "720p", "480p", "360p"]
+
+# Opciones de las descargas mientras la pestaña de configuración no se ha abierto
+# (son también los valores con los que se crean sus controles)
+SETTINGS_DEFAULTS = {
+    'segments': 4,
+    'retries': None,
+    'adaptive': False,
+    'dedup_policy': DEDUP_OFF,
+    'use_history': True
+}
+
+# Tema oscuro; se aplica una sola vez a toda la aplicación antes de crear los widgets
+DARK_STYLESHEET = """
+QMainWindow {
+    background-color: #1e1e1e;
+    color: #ffffff;
+}
+
+QTabWidget::pane {
+    border: 2px solid #3b3b3b;
+    border-radius: 8px;
+    background-color: #2b2b2b;
+}
+
+QTabWidget::tab-bar {
+    alignment: center;
+}
+
+QTabBar::tab {
+    background-color: #3b3b3b;
+    color: #ffffff;
+    padding: 12px 24px;
+    margin-right: 2px;
+    border-top-left-radius: 8px;
+    border-top-right-radius: 8px;
+}
+
+QTabBar::tab:selected {
+    background-color: #0078d4;
+}
+
+QTabBar::tab:hover {
+    background-color: #4b4b4b;
+}
+
+QGroupBox {
+    font-weight: bold;
+    border: 2px solid #3b3b3b;
+    border-radius: 8px;
+    margin-top: 1ex;
+    padding-top: 15px;
+    background-color: #2b2b2b;
+    color: #ffffff;
+}
+
+QGroupBox::title {
+    subcontrol-origin: margin;
+    left: 15px;
+    padding: 0 8px 0 8px;
+    color: #ffffff;
+    font-size: 14px;
+}
+
+QLabel#title {
+    font-size: 28px;
+    font-weight: bold;
+    color: #00d4ff;
+    margin: 15px;
+}
+
+QLabel#subtitle {
+    font-size: 14px;
+    color: #cccccc;
+    margin-bottom: 25px;
+}
+
+QLineEdit {
+    background-color: #3b3b3b;
+    border: 2px solid #555555;
+    border-radius: 8px;
+    padding: 12px;
+    color: #ffffff;
+    font-size: 12px;
+}
+
+QLineEdit:focus {
+    border: 2px solid #00d4ff;
+}
+
+QComboBox {
+    background-color: #3b3b3b;
+    border: 2px solid #555555;
+    border-radius: 8px;
+    padding: 8px 12px;
+    color: #ffffff;
+    font-size: 12px;
+}
+
+QComboBox:focus {
+    border: 2px solid #00d4ff;
+}
+
+QComboBox::drop-down {
+    border: none;
+    width: 30px;
+}
+
+QComboBox::down-arrow {
+    image: url(data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAwAAAAGCAYAAAD37n+BAAAABHNCSVQICAgIfAhkiAAAAAlwSFlzAAAAdgAAAHYBTnsmCAAAABl0RVh0U29mdHdhcmUAd3d3Lmlua3NjYXBlLm9yZ5vuPBoAAAFKSURBVBiVY/j//z8DJQAggBhIBQABBBBADKQCgABiIBUABBADqQAggBhIBQABxEAqAAgghv///xMNAAQQw7+/f4kGAAKI4d/fP0QDAAHEQCoACCAGUgFAADGQCgACiIFUABBADKQCgABiIBUABBADqQAggBhIBQABxEAqAAgghv///xMNAAQQA6kAIIAYSAUAAcRAKgAIIAZSAUAAMZAKAAKIgVQAEEAMpAKAAGIgFQAEEAOpACCAGEgFAAHEQCoACCAGUgFAADGQCgACiIFUABBADKQCgABiIBUABBADqQAggBhIBQABxEAqAAgghv///xMNAAQQA6kAIIAYSAUAAcRAKgAIIAZSAUAAMZAKAAKIgVQAEEAMpAKAAGIgFQAEEAOpACCAGEgFAAHEQCoACCAGUgFAADGQCgACiIFUABBADKQCgABiIBUABBADqYD/AwwMAGCKP7VmSKm9AAAAAElFTkSuQmCC);
+}
+
+QComboBox QAbstractItemView {
+    background-color: #3b3b3b;
+    border: 1px solid #555555;
+    selection-background-color: #0078d4;
+    color: #ffffff;
+}
+
+QCheckBox {
+    color: #ffffff;
+    font-size: 12px;
+    spacing: 8px;
+}
+
+QCheckBox::indicator {
+    width: 18px;
+    height: 18px;
+    border: 2px solid #555555;
+    border-radius: 4px;
+    background-color: #3b3b3b;
+}
+
+QCheckBox::indicator:checked {
+    background-color: #00d4ff;
+    border-color: #00d4ff;
+}
+
+QPushButton {
+    background-color: #0078d4;
+    color: white;
+    border: none;
+    border-radius: 8px;
+    padding: 12px 24px;
+    font-weight: bold;
+    font-size: 12px;
+    min-height: 20px;
+}
+
+QPushButton:hover {
+    background-color: #106ebe;
+}
+
+QPushButton:pressed {
+    background-color: #005a9e;
+}
+
+QPushButton:disabled {
+    background-color: #555555;
+    color: #888888;
+}
+
+QPushButton#download_btn {
+    background-color: #16c60c;
+    font-size: 14px;
+    padding: 15px 30px;
+}
+
+QPushButton#download_btn:hover {
+    background-color: #13a10e;
+}
+
+QPushButton#cancel_btn {
+    background-color: #d13438;
+}
+
+QPushButton#cancel_btn:hover {
+    background-color: #a4272a;
+}
+
+QProgressBar {
+    border: 2px solid #555555;
+    border-radius: 8px;
+    background-color: #2b2b2b;
+    text-align: center;
+    color: #ffffff;
+    font-weight: bold;
+    font-size: 12px;
+    height: 25px;
+}
+
+QProgressBar::chunk {
+    background-color: #00d4ff;
+    border-radius: 6px;
+}
+
+QPlainTextEdit {
+    background-color: #1e1e1e;
+    border: 2px solid #555555;
+    border-radius: 8px;
+    color: #00ff00;
+    padding: 12px;
+    font-family: 'Consolas', 'Monaco', monospace;
+}
+
+QStatusBar {
+    background-color: #2b2b2b;
+    border-top: 1px solid #555555;
+    color: #ffffff;
+    padding: 5px;
+}
+
+QMenuBar {
+    background-color: #2b2b2b;
+    color: #ffffff;
+    border-bottom: 1px solid #555555;
+    padding: 2px;
+}
+
+QMenuBar::item {
+    background-color: transparent;
+    padding: 6px 12px;
+    border-radius: 4px;
+}
+
+QMenuBar::item:selected {
+    background-color: #0078d4;
+}
+
+QMenu {
+    background-color: #2b2b2b;
+    color: #ffffff;
+    border: 2px solid #555555;
+    border-radius: 6px;
+    padding: 4px;
+}
+
+QMenu::item {
+    padding: 8px 16px;
+    border-radius: 4px;
+}
+
+QMenu::item:selected {
+    background-color: #0078d4;
+}
+"""
+
+class UniversalDownloadWorker(QThread):
+    """Worker thread para manejar descargas universales sin bloquear la UI"""
+    progress_updated = pyqtSignal(int)
+    status_updated = pyqtSignal(str)
+    log_updated = pyqtSignal(str)
+    transfer_updated = pyqtSignal(object)  # Instantánea de TransferProgress
+    stage_updated = pyqtSignal(str)  # Etapa del trabajo (post-procesado)
+    download_finished = pyqtSignal(bool, str, str)
+    
+    def __init__(self, url, download_path, file_categories, **options):
+        super().__init__()
+        from .core import DownloadEngine
+        self.engine = DownloadEngine(url, download_path, file_categories,
+                                     listener=self.forward_event, **options)
+        self.signals = {
+            'progress': self.progress_updated,
+            'status': self.status_updated,
+            'log': self.log_updated,
+            'transfer': self.transfer_updated,
+            'stage': self.stage_updated
+        }
+    
+    def forward_event(self, event, value):
+        """Traduce los eventos del núcleo a señales Qt"""
+        self.signals[event].emit(value)
+    
+    def cancel(self):
+        self.engine.cancel()
+    
+    def run(self):
+        success, message, filepath = self.engine.execute()
+        self.download_finished.emit(success, message, filepath)
+
+class FormatProbeWorker(QThread):
+    """Obtiene los formatos de un video (de la caché o con yt-dlp) sin bloquear la UI"""
+    formats_ready = pyqtSignal(bool, str, object)
+    
+    def __init__(self, url, file_categories):
+        super().__init__()
+        from .core import DownloadEngine
+        self.engine = DownloadEngine(url, DEFAULT_DOWNLOAD_PATH, file_categories)
+    
+    def run(self):
+        success, message, info = self.engine.extract_info()
+        self.formats_ready.emit(success, message, info)
+
+class UniversalDownloaderGUI(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.active_workers = {}
+        self.finishing_workers = set()
+        self.format_worker = None
+        self.format_choices_url = None
+        self.batch_results = []
+        
+        # Registro acotado: los mensajes se acumulan y se pintan por lotes
+        self.log_buffer = LogBuffer(LOG_MAX_LINES)
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.setSingleShot(True)
+        self.log_flush_timer.setInterval(LOG_FLUSH_INTERVAL_MS)
+        self.log_flush_timer.timeout.connect(self.flush_log)
+        
+        # Cola persistente de descargas
+        self.download_queue = DownloadQueue(os.path.join(APP_DATA_DIR, 'cola.json'))
+        self.download_queue.load()
+        get_bandwidth_limiter().expected_jobs = self.download_queue.max_concurrent
+        
+        # Con ajuste automático el límite de descargas simultáneas cambia solo: se revisa la cola cada ventana
+        self.adapt_timer = QTimer(self)
+        self.adapt_timer.setInterval(int(ADAPT_WINDOW * 1000))
+        self.adapt_timer.timeout.connect(self.schedule_downloads)
+        
+        # Configuración de carpetas por tipo
+        self.file_categories = FILE_CATEGORIES
+        
+        self.download_path = DEFAULT_DOWNLOAD_PATH
+        profile = get_startup_profile()
+        profile.mark("cola de descargas")
+        self.setup_style()
+        profile.mark("hoja de estilo")
+        self.init_ui()
+        profile.mark("construir la ventana")
+    
+    def init_ui(self):
+        self.setWindowTitle("🌐 Descargador Universal - YouTube & Archivos Directos")
+        self.setGeometry(100, 100, 1200, 800)
+        self.setMinimumSize(900, 700)
+        
+        # Widget central con tabs
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+        
+        # Layout principal
+        main_layout = QVBoxLayout(central_widget)
+        main_layout.setSpacing(15)
+        main_layout.setContentsMargins(20, 20, 20, 20)
+        
+        # Título y subtítulo
+        self.create_header(main_layout)
+        
+        # Crear tabs
+        self.tabs = QTabWidget()
+        main_layout.addWidget(self.tabs)
+        
+        # Tab principal de descarga
+        self.create_download_tab()
+        
+        # Tab de transferencias (cola de descargas)
+        self.create_transfers_tab()
+        
+        # Tab de configuración: se construye la primera vez que se abre
+        self.settings_built = False
+        self.settings_widget = QWidget()
+        self.settings_index = self.tabs.addTab(self.settings_widget, "⚙️ Configuración")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
+        
+        # Barra de estado
+        self.status_bar = QStatusBar()
+        self.setStatusBar(self.status_bar)
+        self.status_bar.showMessage("Listo para descargar")
+        
+        # Menu bar
+        self.create_menu_bar()
+        
+        # Retomar las descargas pendientes de la sesión anterior
+        pending = self.download_queue.count(JOB_QUEUED)
+        if pending:
+            self.log(f"📋 {pending} descargas pendientes restauradas de la sesión anterior")
+        QTimer.singleShot(0, self.schedule_downloads)
+    
+    def create_header(self, layout):
+        header_frame = QFrame()
+        header_layout = QVBoxLayout(header_frame)
+        header_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        
+        title_label = QLabel("🌐 Descargador Universal by SWAT")
+        title_label.setObjectName("title")
+        title_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        
+        subtitle_label = QLabel("YouTube, TikTok, Instagram, Vimeo + Archivos Directos")
+        subtitle_label.setObjectName("subtitle")
+        subtitle_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        
+        header_layout.addWidget(title_label)
+        header_layout.addWidget(subtitle_label)
+        layout.addWidget(header_frame)
+    
+    def create_download_tab(self):
+        download_widget = QWidget()
+        download_layout = QVBoxLayout(download_widget)
+        
+        # Crear splitter
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        download_layout.addWidget(splitter)
+        
+        # Panel superior
+        top_widget = QWidget()
+        top_layout = QVBoxLayout(top_widget)
+        
+        # Grupo de URL y opciones
+        self.create_url_group(top_layout)
+        
+        # Grupo de opciones de video
+        self.create_video_options_group(top_layout)
+        
+        # Grupo de formatos soportados
+        self.create_platforms_group(top_layout)
+        
+        splitter.addWidget(top_widget)
+        
+        # Panel inferior con progreso y log
+        bottom_widget = QWidget()
+        bottom_layout = QVBoxLayout(bottom_widget)
+        
+        # Grupo de progreso
+        self.create_progress_group(bottom_layout)
+        
+        splitter.addWidget(bottom_widget)
+        
+        # Configurar proporciones del splitter
+        splitter.setSizes([500, 300])
+        
+        self.tabs.addTab(download_widget, "🎬 Descarga")
+    
+    def on_tab_changed(self, index):
+        if index == self.settings_index:
+            self.create_settings_tab()
+    
+    def create_settings_tab(self):
+        """Rellena la pestaña de configuración (solo la primera vez)"""
+        if self.settings_built:
+            return
+        self.settings_built = True
+        settings_layout = QVBoxLayout(self.settings_widget)
+        
+        # Grupo de configuración de carpeta
+        self.create_folder_config_group(settings_layout)
+        
+        # Grupo de rendimiento
+        self.create_performance_group(settings_layout)
+        
+        # Grupo de formatos soportados
+        self.create_formats_group(settings_layout)
+        
+        # Espaciador
+        settings_layout.addStretch()
+    
+    def create_transfers_tab(self):
+        transfers_widget = QWidget()
+        transfers_layout = QVBoxLayout(transfers_widget)
+        
+        # Tabla de trabajos
+        self.transfers_table = QTableWidget(0, 7)
+        self.transfers_table.setHorizontalHeaderLabels(["#", "Estado", "Archivo / URL", "Progreso",
+                                                        "Velocidad", "ETA", "Detalle"])
+        self.transfers_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.transfers_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.transfers_table.verticalHeader().setVisible(False)
+        header = self.transfers_table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Stretch)
+        
+        # Profundidad de las dos etapas: red (descargas) y CPU (post-procesado)
+        self.queue_depth_label = QLabel()
+        
+        # Botones de control de la cola
+        buttons_layout = QHBoxLayout()
+        
+        pause_btn = QPushButton("⏸️ Pausar")
+        pause_btn.clicked.connect(self.pause_selected_jobs)
+        
+        resume_btn = QPushButton("▶️ Reanudar / Reintentar")
+        resume_btn.clicked.connect(self.resume_selected_jobs)
+        
+        remove_btn = QPushButton("🗑️ Quitar")
+        remove_btn.clicked.connect(self.remove_selected_jobs)
+        
+        clear_done_btn = QPushButton("🧹 Limpiar completadas")
+        clear_done_btn.clicked.connect(self.clear_finished_jobs)
+        
+        buttons_layout.addWidget(pause_btn)
+        buttons_layout.addWidget(resume_btn)
+        buttons_layout.addWidget(remove_btn)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(clear_done_btn)
+        
+        transfers_layout.addWidget(self.transfers_table)
+        transfers_layout.addWidget(self.queue_depth_label)
+        transfers_layout.addLayout(buttons_layout)
+        
+        self.tabs.addTab(transfers_widget, "📋 Transferencias")
+        self.refresh_transfers_table()
+    
+    def create_url_group(self, layout):
+        url_group = QGroupBox("🔗 URL a Descargar")
+        url_layout = QVBoxLayout(url_group)
+        
+        # URL input
+        url_input_layout = QHBoxLayout()
+        url_label = QLabel("URL:")
+        self.url_edit = QLineEdit()
+        self.url_edit.setPlaceholderText("Pega aquí la URL de YouTube, TikTok, Instagram, archivo directo...")
+        self.url_edit.returnPressed.connect(self.start_download)
+        self.url_edit.textChanged.connect(self.url_changed)
+        
+        url_input_layout.addWidget(url_label)
+        url_input_layout.addWidget(self.url_edit, 1)
+        
+        # Nombre personalizado
+        name_layout = QHBoxLayout()
+        name_label = QLabel("Nombre personalizado (opcional):")
+        self.custom_name_edit = QLineEdit()
+        self.custom_name_edit.setPlaceholderText("Deja vacío para usar el nombre original")
+        
+        name_layout.addWidget(name_label)
+        name_layout.addWidget(self.custom_name_edit, 1)
+        
+        # Checksum esperado
+        checksum_layout = QHBoxLayout()
+        checksum_label = QLabel("Checksum (opcional):")
+        self.checksum_edit = QLineEdit()
+        self.checksum_edit.setPlaceholderText("sha256:… / md5:… (vacío = buscar .sha256, SHA256SUMS o cabeceras del servidor)")
+        
+        checksum_layout.addWidget(checksum_label)
+        checksum_layout.addWidget(self.checksum_edit, 1)
+        
+        url_layout.addLayout(url_input_layout)
+        url_layout.addLayout(name_layout)
+        url_layout.addLayout(checksum_layout)
+        
+        layout.addWidget(url_group)
+    
+    def create_video_options_group(self, layout):
+        options_group = QGroupBox("🎥 Opciones de Video")
+        options_layout = QHBoxLayout(options_group)
+        
+        # Calidad de video
+        quality_layout = QVBoxLayout()
+        quality_label = QLabel("Calidad de video:")
+        self.quality_combo = QComboBox()
+        self.quality_combo.addItems(QUALITY_PRESETS)
+        self.quality_combo.setCurrentIndex(0)
+        
+        # Formatos del video: salen de la caché de información si ya se extrajo
+        self.formats_btn = QPushButton("🔎 Ver formatos")
+        self.formats_btn.setToolTip("Añade al selector los formatos disponibles del video")
+        self.formats_btn.clicked.connect(self.probe_formats)
+        
+        quality_layout.addWidget(quality_label)
+        quality_layout.addWidget(self.quality_combo)
+        quality_layout.addWidget(self.formats_btn)
+        
+        # Solo audio
+        audio_layout = QVBoxLayout()
+        audio_label = QLabel("Descargar:")
+        self.audio_only_check = QCheckBox("Solo audio (MP3)")
+        self.audio_only_check.stateChanged.connect(self.toggle_audio_only)
+        
+        audio_layout.addWidget(audio_label)
+        audio_layout.addWidget(self.audio_only_check)
+        
+        # Botones de acción
+        buttons_layout = QVBoxLayout()
+        buttons_label = QLabel("Acciones:")
+        
+        self.download_btn = QPushButton("⬇️ Descargar")
+        self.download_btn.clicked.connect(self.start_download)
+        self.download_btn.setObjectName("download_btn")
+        
+        self.cancel_btn = QPushButton("❌ Cancelar")
+        self.cancel_btn.clicked.connect(self.cancel_download)
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.setObjectName("cancel_btn")
+        
+        clear_btn = QPushButton("🗑️ Limpiar")
+        clear_btn.clicked.connect(self.clear_inputs)
+        
+        buttons_layout.addWidget(buttons_label)
+        buttons_layout.addWidget(self.download_btn)
+        buttons_layout.addWidget(self.cancel_btn)
+        buttons_layout.addWidget(clear_btn)
+        
+        options_layout.addLayout(quality_layout)
+        options_layout.addLayout(audio_layout)
+        options_layout.addLayout(buttons_layout)
+        options_layout.addStretch()
+        
+        layout.addWidget(options_group)
+    
+    def create_platforms_group(self, layout):
+        platforms_group = QGroupBox("🌐 Plataformas Soportadas")
+        platforms_layout = QGridLayout(platforms_group)
+        
+        platforms = [
+            ("🎥", "YouTube", "Videos, listas, canales"),
+            ("🎵", "TikTok", "Videos cortos, audio"),
+            ("📸", "Instagram", "Posts, stories, reels"),
+            ("🐦", "Twitter/X", "Videos, GIFs"),
+            ("📺", "Vimeo", "Videos HD"),
+            ("🎮", "Twitch", "Clips, VODs"),
+            ("📁", "Archivos directos", "PDF, ZIP, MP4, etc.")
+        ]
+        
+        for i, (icon, name, description) in enumerate(platforms):
+            row = i // 3
+            col = (i % 3) * 3
+            
+            icon_label = QLabel(icon)
+            icon_label.setFont(QFont("Arial", 16))
+            name_label = QLabel(f"<b>{name}</b>")
+            desc_label = QLabel(description)
+            desc_label.setStyleSheet("color: #aaa;")
+            
+            platforms_layout.addWidget(icon_label, row, col)
+            platforms_layout.addWidget(name_label, row, col + 1)
+            platforms_layout.addWidget(desc_label, row, col + 2)
+        
+        layout.addWidget(platforms_group)
+    
+    def create_folder_config_group(self, layout):
+        config_group = QGroupBox("📁 Configuración de Carpetas")
+        config_layout = QVBoxLayout(config_group)
+        
+        # Ruta principal
+        path_layout = QHBoxLayout()
+        path_label = QLabel("Carpeta de descarga:")
+        self.path_edit = QLineEdit(self.download_path)
+        browse_btn = QPushButton("Examinar")
+        browse_btn.clicked.connect(self.browse_folder)
+        
+        path_layout.addWidget(path_label)
+        path_layout.addWidget(self.path_edit, 1)
+        path_layout.addWidget(browse_btn)
+        
+        config_layout.addLayout(path_layout)
+        
+        # Información de organización
+        info_label = QLabel("""
+        <b>Organización automática por carpetas:</b><br>
+        • Videos de plataformas → Videos/<br>
+        • Audio extraído → Música/<br>
+        • Archivos directos → según su tipo<br>
+        • Archivos sin categoría → Otros/
+        """)
+        info_label.setWordWrap(True)
+        config_layout.addWidget(info_label)
+        
+        layout.addWidget(config_group)
+    
+    def create_performance_group(self, layout):
+        performance_group = QGroupBox("⚡ Rendimiento")
+        performance_layout = QVBoxLayout(performance_group)
+        
+        # Conexiones simultáneas por archivo
+        segments_layout = QHBoxLayout()
+        segments_label = QLabel("Conexiones por descarga directa:")
+        self.segments_spin = QSpinBox()
+        self.segments_spin.setRange(1, 16)
+        self.segments_spin.setValue(SETTINGS_DEFAULTS['segments'])
+        
+        # Reintentos por tipo de error (conexión, timeout, servidor, incompleta)
+        retries_label = QLabel("Reintentos por tipo de error:")
+        self.retries_spin = QSpinBox()
+        self.retries_spin.setRange(-1, 50)
+        self.retries_spin.setValue(-1)
+        self.retries_spin.setSpecialValueText("Por defecto")
+        from .retry import DEFAULT_RETRY_BUDGETS
+        self.retries_spin.setToolTip(", ".join(f"{name}: {count}" for name, count in DEFAULT_RETRY_BUDGETS.items()))
+        
+        segments_layout.addWidget(segments_label)
+        segments_layout.addWidget(self.segments_spin)
+        segments_layout.addWidget(retries_label)
+        segments_layout.addWidget(self.retries_spin)
+        segments_layout.addStretch()
+        
+        # Límites de la cola de descargas
+        concurrency_layout = QHBoxLayout()
+        concurrency_label = QLabel("Descargas simultáneas:")
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 16)
+        self.concurrency_spin.setValue(self.download_queue.max_concurrent)
+        self.concurrency_spin.valueChanged.connect(self.update_queue_limits)
+        
+        per_host_label = QLabel("Máximo por servidor (0 = sin límite):")
+        self.per_host_spin = QSpinBox()
+        self.per_host_spin.setRange(0, 16)
+        self.per_host_spin.setValue(self.download_queue.max_per_host)
+        self.per_host_spin.valueChanged.connect(self.update_queue_limits)
+        
+        concurrency_layout.addWidget(concurrency_label)
+        concurrency_layout.addWidget(self.concurrency_spin)
+        concurrency_layout.addWidget(per_host_label)
+        concurrency_layout.addWidget(self.per_host_spin)
+        
+        # Conexiones y descargas simultáneas según el goodput medido (los valores anteriores son el máximo)
+        self.adaptive_check = QCheckBox("Ajuste automático")
+        self.adaptive_check.setToolTip("Sube conexiones y descargas simultáneas mientras la velocidad total mejora "
+                                       "y las reduce ante errores o si deja de mejorar")
+        self.adaptive_check.setChecked(SETTINGS_DEFAULTS['adaptive'])
+        self.adaptive_check.toggled.connect(self.update_queue_limits)
+        concurrency_layout.addWidget(self.adaptive_check)
+        concurrency_layout.addStretch()
+        
+        # Contenido repetido bajo otras URLs o nombres
+        dedup_layout = QHBoxLayout()
+        dedup_label = QLabel("Archivos duplicados:")
+        self.dedup_combo = QComboBox()
+        for policy in DEDUP_POLICIES:
+            self.dedup_combo.addItem(DEDUP_POLICY_LABELS[policy], policy)
+        self.dedup_combo.setCurrentIndex(DEDUP_POLICIES.index(SETTINGS_DEFAULTS['dedup_policy']))
+        self.dedup_combo.setToolTip("Con enlace duro las copias comparten el archivo: editar una cambia también la otra")
+        
+        # Repetir descargas solo si el recurso cambió (ETag / Last-Modified)
+        self.history_check = QCheckBox("Omitir URLs ya descargadas que no han cambiado")
+        self.history_check.setChecked(SETTINGS_DEFAULTS['use_history'])
+        
+        dedup_layout.addWidget(dedup_label)
+        dedup_layout.addWidget(self.dedup_combo)
+        dedup_layout.addWidget(self.history_check)
+        dedup_layout.addStretch()
+        
+        # Límites de velocidad (se aplican en caliente a las descargas en curso)
+        bandwidth_layout = QHBoxLayout()
+        self.global_limit_spin = QSpinBox()
+        self.per_host_limit_spin = QSpinBox()
+        self.per_job_limit_spin = QSpinBox()
+        for spin in (self.global_limit_spin, self.per_host_limit_spin, self.per_job_limit_spin):
+            spin.setRange(0, 1000000)
+            spin.setSingleStep(100)
+            spin.setSuffix(" KB/s")
+            spin.setSpecialValueText("Sin límite")
+            spin.valueChanged.connect(self.update_bandwidth_limits)
+        
+        bandwidth_layout.addWidget(QLabel("Velocidad máxima total:"))
+        bandwidth_layout.addWidget(self.global_limit_spin)
+        bandwidth_layout.addWidget(QLabel("Por servidor:"))
+        bandwidth_layout.addWidget(self.per_host_limit_spin)
+        bandwidth_layout.addWidget(QLabel("Por descarga:"))
+        bandwidth_layout.addWidget(self.per_job_limit_spin)
+        bandwidth_layout.addStretch()
+        
+        # Métricas de las descargas para Prometheus (el JSONL se guarda siempre)
+        metrics_layout = QHBoxLayout()
+        metrics_label = QLabel("Puerto de métricas Prometheus:")
+        self.metrics_port_spin = QSpinBox()
+        self.metrics_port_spin.setRange(0, 65535)
+        self.metrics_port_spin.setSpecialValueText("Desactivado")
+        self.metrics_port_spin.editingFinished.connect(self.update_metrics_port)
+        
+        metrics_layout.addWidget(metrics_label)
+        metrics_layout.addWidget(self.metrics_port_spin)
+        metrics_layout.addStretch()
+        
+        # Registro: líneas que se conservan y copia opcional en disco
+        log_layout = QHBoxLayout()
+        self.log_lines_spin = QSpinBox()
+        self.log_lines_spin.setRange(500, 200000)
+        self.log_lines_spin.setSingleStep(1000)
+        self.log_lines_spin.setValue(self.log_buffer.max_lines)
+        self.log_lines_spin.setSuffix(" líneas")
+        self.log_lines_spin.editingFinished.connect(self.update_log_settings)
+        self.log_file_check = QCheckBox("Guardar el log en archivo")
+        self.log_file_check.setToolTip(LOG_FILE_PATH)
+        self.log_file_check.toggled.connect(self.update_log_settings)
+        
+        log_layout.addWidget(QLabel("Líneas del log:"))
+        log_layout.addWidget(self.log_lines_spin)
+        log_layout.addWidget(self.log_file_check)
+        log_layout.addStretch()
+        
+        performance_layout.addLayout(segments_layout)
+        performance_layout.addLayout(concurrency_layout)
+        performance_layout.addLayout(bandwidth_layout)
+        performance_layout.addLayout(dedup_layout)
+        performance_layout.addLayout(metrics_layout)
+        performance_layout.addLayout(log_layout)
+        
+        info_label = QLabel("Los archivos grandes se dividen en rangos y se descargan en paralelo "
+                            "cuando el servidor lo permite (Accept-Ranges). La detección de duplicados "
+                            "es opcional: solo si se elige una opción en «Archivos duplicados» se calcula "
+                            "el hash del contenido mientras se descarga.")
+        info_label.setWordWrap(True)
+        performance_layout.addWidget(info_label)
+        
+        layout.addWidget(performance_group)
+    
+    def create_formats_group(self, layout):
+        formats_group = QGroupBox("📋 Tipos de Archivo Soportados")
+        formats_group.setToolTip(f"Categorías y reglas propias (por servidor, patrón o extensión): {CATEGORIES_PATH}")
+        formats_layout = QGridLayout(formats_group)
+        
+        # Incluye las categorías añadidas por el usuario en categorias.json
+        category_index = get_category_index(self.file_categories, CATEGORIES_PATH)
+        if category_index.load_error:
+            self.log(f"⚠️ No se pudieron cargar las categorías propias: {category_index.load_error}")
+        
+        row = 0
+        for category, info in category_index.categories.items():
+            if category == 'otros':
+                continue
+            
+            icon_label = QLabel(info['icon'])
+            icon_label.setFont(QFont("Arial", 16))
+            
+            name_label = QLabel(f"<b>{info['folder']}:</b>")
+            
+            extensions_text = ", ".join(info['extensions'][:8])
+            if len(info['extensions']) > 8:
+                extensions_text += f" (+{len(info['extensions']) - 8} más)"
+            
+            ext_label = QLabel(extensions_text)
+            ext_label.setWordWrap(True)
+            
+            formats_layout.addWidget(icon_label, row, 0)
+            formats_layout.addWidget(name_label, row, 1)
+            formats_layout.addWidget(ext_label, row, 2)
+            
+            row += 1
+        
+        layout.addWidget(formats_group)
+    
+    def create_progress_group(self, layout):
+        progress_group = QGroupBox("📊 Progreso y Log")
+        progress_layout = QVBoxLayout(progress_group)
+        
+        # Barra de progreso
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setMinimum(0)
+        self.progress_bar.setMaximum(100)
+        self.progress_bar.setValue(0)
+        
+        # Log de descargas
+        self.log_text = QPlainTextEdit()
+        self.log_text.setReadOnly(True)
+        self.log_text.setUndoRedoEnabled(False)
+        self.log_text.setMaximumBlockCount(self.log_buffer.max_lines)
+        self.log_text.setMaximumHeight(250)
+        self.log_text.setFont(QFont("Consolas", 9))
+        
+        progress_layout.addWidget(self.progress_bar)
+        progress_layout.addWidget(self.log_text)
+        
+        layout.addWidget(progress_group)
+        
+        # Log inicial
+        self.log("🚀 Descargador Universal iniciado correctamente")
+        self.log(f"📁 Carpeta de descarga: {self.download_path}")
+        self.log("🎥 Soporta: YouTube, TikTok, Instagram, Vimeo, archivos directos")
+        self.log("🐧 Sistema: Arch Linux")
+    
+    def create_menu_bar(self):
+        menubar = self.menuBar()
+        
+        # Menú Archivo
+        file_menu = menubar.addMenu('Archivo')
+        
+        change_folder_action = QAction('Cambiar carpeta de descarga', self)
+        change_folder_action.triggered.connect(self.browse_folder)
+        file_menu.addAction(change_folder_action)
+        
+        file_menu.addSeparator()
+        
+        exit_action = QAction('Salir', self)
+        exit_action.triggered.connect(self.close)
+        file_menu.addAction(exit_action)
+        
+        # Menú Herramientas
+        tools_menu = menubar.addMenu('Herramientas')
+        
+        check_ytdlp_action = QAction('Verificar yt-dlp', self)
+        check_ytdlp_action.triggered.connect(self.check_ytdlp_status)
+        tools_menu.addAction(check_ytdlp_action)
+        
+        install_ytdlp_action = QAction('Instalar/Actualizar yt-dlp', self)
+        install_ytdlp_action.triggered.connect(self.install_ytdlp_manual)
+        tools_menu.addAction(install_ytdlp_action)
+        
+        pool_stats_action = QAction('Estadísticas de conexiones', self)
+        pool_stats_action.triggered.connect(self.show_pool_stats)
+        tools_menu.addAction(pool_stats_action)
+        
+        # Menú Ayuda
+        help_menu = menubar.addMenu('Ayuda')
+        
+        about_action = QAction('Acerca de', self)
+        about_action.triggered.connect(self.show_about)
+        help_menu.addAction(about_action)
+    
+    def toggle_audio_only(self, state):
+        """Desactiva opciones de calidad cuando se selecciona solo audio"""
+        if state == Qt.CheckState.Checked.value:
+            self.quality_combo.setEnabled(False)
+            self.formats_btn.setEnabled(False)
+            self.log("🎵 Modo solo audio activado - descargará MP3")
+        else:
+            self.quality_combo.setEnabled(True)
+            self.formats_btn.setEnabled(self.format_worker is None)
+            self.log("🎥 Modo video activado")
+    
+    def check_ytdlp_status(self):
+        """Verifica el estado de yt-dlp"""
+        from .ytdlp_pool import probe_ytdlp
+        probe = probe_ytdlp(refresh=True)
+        if probe['available']:
+            via = " (Python)" if probe['command'][0] == sys.executable else ""
+            QMessageBox.information(self, "yt-dlp Status", 
+                                  f"✅ yt-dlp está instalado{via}\nVersión: {probe['version']}")
+            self.log(f"✅ yt-dlp disponible{via}: {probe['version']}")
+        else:
+            QMessageBox.warning(self, "yt-dlp Status", 
+                              "❌ yt-dlp no está instalado\n\n"
+                              "Para instalar:\n"
+                              "• sudo pacman -S yt-dlp\n"
+                              "• pip install --user yt-dlp")
+    
+    def show_pool_stats(self):
+        """Muestra cuántas peticiones reutilizaron una conexión del pool compartido"""
+        from .core import http_pool_stats
+        stats = http_pool_stats()
+        text = (f"Peticiones: {stats['requests']}\n"
+                f"Conexiones reutilizadas (aciertos): {stats['reused_connections']}\n"
+                f"Conexiones nuevas (fallos): {stats['new_connections']}")
+        limits = get_concurrency_tuner().limits()
+        if limits:
+            text += "\n\nAjuste automático:\n" + "\n".join(f"{name}: {limit}" for name, limit in limits.items())
+        QMessageBox.information(self, "Conexiones HTTP", text)
+    
+    def install_ytdlp_manual(self):
+        """Instala yt-dlp manualmente"""
+        reply = QMessageBox.question(self, "Instalar yt-dlp", 
+                                   "¿Deseas instalar/actualizar yt-dlp?\n\n"
+                                   "Esto ejecutará:\nsudo pacman -S yt-dlp\n\n"
+                                   "¿Continuar?",
+                                   QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            self.log("🔧 Instalando yt-dlp...")
+            import subprocess
+            try:
+                result = subprocess.run(['sudo', 'pacman', '-S', '--noconfirm', 'yt-dlp'],
+                                      capture_output=True, text=True, timeout=60)
+                if result.returncode == 0:
+                    QMessageBox.information(self, "Éxito", "✅ yt-dlp instalado correctamente")
+                    self.log("✅ yt-dlp instalado con pacman")
+                else:
+                    QMessageBox.warning(self, "Error", f"❌ Error al instalar:\n{result.stderr}")
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"❌ Error: {str(e)}")
+    
+    def setup_style(self):
+        """Configura el tema oscuro moderno.
+        
+        La hoja de estilo se asigna a la aplicación y no a la ventana: Qt la
+        analiza una vez y, como se aplica antes de crear los widgets, no hay
+        que volver a pulir los que ya existían.
+        """
+        app = QApplication.instance()
+        if app.styleSheet() != DARK_STYLESHEET:
+            app.setStyleSheet(DARK_STYLESHEET)
+    
+    def browse_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Seleccionar carpeta de descarga", self.download_path)
+        if folder:
+            self.download_path = folder
+            if self.settings_built:
+                self.path_edit.setText(folder)
+            self.log(f"📁 Carpeta de descarga cambiada a: {folder}")
+    
+    def clear_inputs(self):
+        self.url_edit.clear()
+        self.custom_name_edit.clear()
+        self.checksum_edit.clear()
+        self.audio_only_check.setChecked(False)
+        self.clear_format_choices()
+        self.quality_combo.setCurrentIndex(0)
+        self.log("🗑️ Campos limpiados")
+    
+    def log(self, message):
+        self.log_buffer.append(message)
+        if not self.log_flush_timer.isActive():
+            self.log_flush_timer.start()
+    
+    def flush_log(self):
+        """Pinta de una vez los mensajes acumulados desde el último lote"""
+        dropped = self.log_buffer.dropped
+        lines = self.log_buffer.drain()
+        if not lines:
+            return
+        if dropped:
+            self.log_buffer.dropped = 0
+            lines.insert(0, f"… {dropped} mensajes omitidos en pantalla")
+        # Solo se baja al final si el usuario no se había desplazado hacia arriba
+        scrollbar = self.log_text.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum() - 2
+        self.log_text.appendPlainText('\n'.join(lines))
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+    
+    def update_log_settings(self):
+        """Aplica el máximo de líneas del registro y la copia en archivo"""
+        max_lines = self.log_lines_spin.value()
+        self.log_buffer.set_max_lines(max_lines)
+        self.log_text.setMaximumBlockCount(max_lines)
+        self.log_buffer.set_spill_path(LOG_FILE_PATH if self.log_file_check.isChecked() else None)
+    
+    def url_changed(self, text):
+        """Los formatos del selector solo valen para la URL con la que se pidieron"""
+        if self.format_choices_url and text.strip() != self.format_choices_url:
+            self.clear_format_choices()
+    
+    def clear_format_choices(self):
+        if self.quality_combo.currentIndex() >= len(QUALITY_PRESETS):
+            self.quality_combo.setCurrentIndex(0)
+        while self.quality_combo.count() > len(QUALITY_PRESETS):
+            self.quality_combo.removeItem(self.quality_combo.count() - 1)
+        self.format_choices_url = None
+    
+    def probe_formats(self):
+        """Pide en segundo plano los formatos del video de la URL"""
+        text = self.url_edit.text().strip()
+        if not text:
+            QMessageBox.warning(self, "Advertencia", "Por favor, ingresa una URL")
+            return
+        from .core import normalize_url, is_playlist_url
+        url = normalize_url(text)
+        if is_playlist_url(url):
+            self.log("📃 Es una lista: la calidad elegida se aplica a todas sus entradas")
+            return
+        
+        self.log(f"🔎 Obteniendo formatos: {url}")
+        self.formats_btn.setEnabled(False)
+        worker = FormatProbeWorker(url, self.file_categories)
+        worker.formats_ready.connect(
+            lambda success, message, info, text=text, worker=worker: self.show_formats(text, worker, success, message, info))
+        self.format_worker = worker
+        worker.start()
+    
+    def show_formats(self, text, worker, success, message, info):
+        """Añade al selector de calidad los formatos recibidos"""
+        worker.wait()
+        self.format_worker = None
+        self.formats_btn.setEnabled(not self.audio_only_check.isChecked())
+        if not success:
+            self.log(f"❌ {message}")
+            return
+        if self.url_edit.text().strip() != text:
+            return
+        
+        from .infocache import format_choices
+        choices = format_choices(info)
+        self.clear_format_choices()
+        for spec, label in choices:
+            self.quality_combo.addItem(f"🎞️ {label}", spec)
+        self.format_choices_url = text
+        title = info.get('title') or text
+        if not choices:
+            self.log(f"🎞️ «{title}» no ofrece formatos para elegir: se usa la calidad seleccionada")
+            return
+        origin = "caché" if message == "Información en caché" else "yt-dlp"
+        self.log(f"🎞️ {len(choices)} formatos de «{title}» ({origin})")
+        self.quality_combo.setCurrentIndex(len(QUALITY_PRESETS))
+        self.quality_combo.showPopup()
+    
+    def get_video_quality_setting(self):
+        """Convierte la selección del combo a formato yt-dlp"""
+        # Formato elegido de la lista del video: se pasa tal cual a yt-dlp
+        if self.quality_combo.currentData():
+            return self.quality_combo.currentData()
+        quality_map = {
+            "Mejor disponible": "best",
+            "720p": "720p",
+            "480p": "480p", 
+            "360p": "360p"
+        }
+        return quality_map.get(self.quality_combo.currentText(), "best")
+    
+    def start_download(self):
+        url = self.url_edit.text().strip()
+        
+        if not url:
+            QMessageBox.warning(self, "Advertencia", "Por favor, ingresa una URL")
+            return
+        
+        # Agregar https:// si no tiene protocolo
+        from .core import normalize_url
+        url = normalize_url(url)
+        self.url_edit.setText(url)
+        
+        # Actualizar ruta de descarga
+        if self.settings_built:
+            self.download_path = self.path_edit.text()
+        
+        # Obtener configuraciones
+        custom_name = self.custom_name_edit.text().strip()
+        checksum = self.checksum_edit.text().strip()
+        if checksum:
+            try:
+                parse_checksum(checksum)
+            except ValueError as e:
+                QMessageBox.warning(self, "Advertencia", str(e))
+                return
+        video_quality = self.get_video_quality_setting()
+        audio_only = self.audio_only_check.isChecked()
+        
+        # Log de inicio
+        if audio_only:
+            self.log(f"🎵 Añadida a la cola (audio): {url}")
+        else:
+            self.log(f"🎥 Añadida a la cola: {url} (Calidad: {video_quality})")
+        
+        # Encolar el trabajo; el planificador decide cuándo arranca
+        self.download_queue.add(
+            url,
+            self.download_path,
+            video_quality=video_quality,
+            audio_only=audio_only,
+            custom_name=custom_name,
+            checksum=checksum
+        )
+        self.url_edit.clear()
+        self.custom_name_edit.clear()
+        self.checksum_edit.clear()
+        self.refresh_transfers_table()
+        self.schedule_downloads()
+    
+    def schedule_downloads(self):
+        """Arranca los trabajos en cola que quepan en los límites de concurrencia"""
+        limit = None
+        if self.job_settings()['adaptive']:
+            limit = get_concurrency_tuner().job_controller(self.download_queue.max_concurrent).limit
+        for job in self.download_queue.runnable_jobs(limit):
+            self.start_job(job)
+        self.update_queue_controls()
+    
+    def start_job(self, job):
+        """Crea el worker que ejecuta un trabajo de la cola"""
+        job.progress = 0
+        job.retries = 0
+        self.download_queue.set_state(job.job_id, JOB_RUNNING, "")
+        self.log(f"⬇️ [#{job.job_id}] Iniciando descarga: {job.url}")
+        
+        from .ytdlp_pool import get_ytdlp_pool
+        get_ytdlp_pool(self.download_queue.max_concurrent)
+        settings = self.job_settings()
+        worker = UniversalDownloadWorker(
+            url=job.url,
+            download_path=job.download_path,
+            file_categories=self.file_categories,
+            video_quality=job.video_quality,
+            audio_only=job.audio_only,
+            custom_name=job.custom_name,
+            checksum=job.checksum,
+            retries=settings['retries'],
+            adaptive=settings['adaptive'],
+            is_video_platform=job.parent_id is not None,
+            segments=settings['segments'],
+            dedup_policy=settings['dedup_policy'],
+            use_history=settings['use_history'],
+            pool_size=self.download_queue.max_concurrent * settings['segments']
+        )
+        
+        job_id = job.job_id
+        worker.progress_updated.connect(
+            lambda value, job_id=job_id, worker=worker: self.job_progress(job_id, worker, value))
+        worker.status_updated.connect(
+            lambda message, job_id=job_id, worker=worker: self.job_status(job_id, worker, message))
+        worker.transfer_updated.connect(
+            lambda snapshot, job_id=job_id, worker=worker: self.job_transfer(job_id, worker, snapshot))
+        worker.stage_updated.connect(
+            lambda stage, job_id=job_id, worker=worker: self.job_stage(job_id, worker, stage))
+        worker.log_updated.connect(lambda message, job_id=job_id: self.log(f"[#{job_id}] {message}"))
+        worker.download_finished.connect(
+            lambda success, message, filepath, job_id=job_id, worker=worker:
+                self.job_finished(job_id, worker, success, message, filepath))
+        worker.finished.connect(lambda worker=worker: self.finishing_workers.discard(worker))
+        
+        self.active_workers[job_id] = worker
+        self.refresh_transfers_table()
+        worker.start()
+    
+    def stop_job(self, job_id, state):
+        """Detiene un trabajo en curso dejando su descarga parcial para reanudarla"""
+        worker = self.active_workers.pop(job_id, None)
+        self.download_queue.set_state(job_id, state, "Detenida por el usuario")
+        if worker:
+            self.finishing_workers.add(worker)
+            worker.cancel()
+    
+    def job_progress(self, job_id, worker, value):
+        # Ignorar señales tardías de un worker que ya fue detenido
+        if self.active_workers.get(job_id) is not worker:
+            return
+        job = self.download_queue.get(job_id)
+        job.progress = value
+        self.update_transfer_row(job)
+        
+        # La barra principal muestra el progreso medio de las descargas activas
+        running = [job for job in self.download_queue.jobs if job.state == JOB_RUNNING]
+        if running:
+            self.progress_bar.setValue(int(sum(job.progress for job in running) / len(running)))
+    
+    def job_transfer(self, job_id, worker, snapshot):
+        """Guarda la velocidad y el ETA; la fila se repinta con la señal de progreso"""
+        if self.active_workers.get(job_id) is not worker:
+            return
+        job = self.download_queue.get(job_id)
+        job.speed = snapshot['avg_speed']
+        job.eta = snapshot['eta']
+    
+    def job_stage(self, job_id, worker, stage):
+        """El archivo pasó al post-procesado: su plaza de descarga queda libre para otro trabajo"""
+        if self.active_workers.get(job_id) is not worker:
+            return
+        job = self.download_queue.get(job_id)
+        job.speed = 0.0
+        job.eta = None
+        self.download_queue.set_state(job_id, JOB_POSTPROCESSING)
+        self.update_transfer_row(job)
+        self.schedule_downloads()
+    
+    def job_status(self, job_id, worker, message):
+        if self.active_workers.get(job_id) is not worker:
+            return
+        job = self.download_queue.get(job_id)
+        job.message = message
+        self.update_transfer_row(job)
+        self.status_bar.showMessage(f"[#{job_id}] {message}")
+        if job.state == JOB_POSTPROCESSING:
+            self.update_queue_depth()
+    
+    def job_finished(self, job_id, worker, success, message, filepath):
+        if self.active_workers.get(job_id) is not worker:
+            # Worker detenido por el usuario: el estado del trabajo ya se actualizó
+            self.update_queue_controls()
+            return
+        del self.active_workers[job_id]
+        self.finishing_workers.add(worker)
+        
+        job = self.download_queue.get(job_id)
+        if job and success and worker.engine.playlist_entries is not None:
+            # Lista expandida: cada entrada pasa a ser un trabajo de la cola
+            entries = worker.engine.playlist_entries
+            self.download_queue.add_playlist_entries(job, entries)
+            self.log(f"📃 [#{job_id}] {len(entries)} entradas añadidas a la cola")
+        elif job:
+            job.filepath = filepath
+            job.retries = worker.engine.retry.total
+            if success:
+                job.progress = 100
+                self.download_queue.set_state(job_id, JOB_DONE, message.split('\n')[0].rstrip(':'))
+            else:
+                self.download_queue.set_state(job_id, JOB_FAILED, message.split('\n')[0])
+                self.log(f"❌ [#{job_id}] {message}")
+            if job.parent_id:
+                self.download_queue.update_playlist(job.parent_id)
+            self.batch_results.append((success, message, filepath))
+        
+        self.refresh_transfers_table()
+        self.schedule_downloads()
+        
+        if not self.download_queue.count(JOB_QUEUED, JOB_RUNNING, JOB_POSTPROCESSING):
+            self.download_batch_finished()
+    
+    def download_batch_finished(self):
+        """Informa al usuario cuando la cola queda vacía"""
+        results = self.batch_results
+        self.batch_results = []
+        self.status_bar.showMessage("Listo para descargar")
+        
+        if len(results) == 1:
+            success, message, filepath = results[0]
+            if success:
+                QMessageBox.information(self, "✅ Éxito", message)
+                self.status_bar.showMessage("Descarga completada")
+                # Ofrecer abrir carpeta
+                if filepath and os.path.exists(filepath):
+                    reply = QMessageBox.question(self, "Abrir carpeta", 
+                                               "¿Deseas abrir la carpeta de destino?",
+                                               QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+                    if reply == QMessageBox.StandardButton.Yes:
+                        import subprocess
+                        try:
+                            subprocess.run(['xdg-open', os.path.dirname(filepath)])
+                        except:
+                            pass
+            elif "cancelada" not in message.lower():
+                QMessageBox.critical(self, "❌ Error", message)
+        elif results:
+            completed = sum(1 for success, _, _ in results if success)
+            failed = len(results) - completed
+            self.status_bar.showMessage("Cola de descargas terminada")
+            QMessageBox.information(self, "📋 Cola terminada",
+                                    f"✅ Completadas: {completed}\n❌ Con errores: {failed}\n\n"
+                                    "Consulta la pestaña Transferencias para ver el detalle.")
+    
+    def cancel_download(self):
+        """Detiene todas las descargas en curso y pausa las que esperan en la cola"""
+        running = list(self.active_workers)
+        if not running and not self.download_queue.count(JOB_QUEUED):
+            return
+        
+        self.log("⏹️ Cancelando descargas...")
+        for job_id in running:
+            self.stop_job(job_id, JOB_PAUSED)
+        for job in self.download_queue.jobs:
+            if job.state == JOB_QUEUED:
+                job.state = JOB_PAUSED
+        self.download_queue.save()
+        self.log("❌ Descargas canceladas por el usuario (pueden reanudarse desde Transferencias)")
+        
+        self.refresh_transfers_table()
+        self.update_queue_controls()
+        self.status_bar.showMessage("Listo para descargar")
+    
+    def selected_job_ids(self):
+        """IDs seleccionados; una lista seleccionada incluye todas sus entradas"""
+        rows = {index.row() for index in self.transfers_table.selectionModel().selectedRows()}
+        job_ids = []
+        for row in sorted(rows):
+            job_id = int(self.transfers_table.item(row, 0).text())
+            for selected_id in [job_id] + self.download_queue.descendants(job_id):
+                if selected_id not in job_ids:
+                    job_ids.append(selected_id)
+        return job_ids
+    
+    def pause_selected_jobs(self):
+        for job_id in self.selected_job_ids():
+            job = self.download_queue.get(job_id)
+            if job.state in (JOB_RUNNING, JOB_POSTPROCESSING):
+                self.stop_job(job_id, JOB_PAUSED)
+            elif job.state == JOB_QUEUED:
+                self.download_queue.set_state(job_id, JOB_PAUSED)
+        self.refresh_transfers_table()
+        self.schedule_downloads()
+    
+    def resume_selected_jobs(self):
+        for job_id in self.selected_job_ids():
+            job = self.download_queue.get(job_id)
+            if job.state in (JOB_PAUSED, JOB_FAILED):
+                self.download_queue.set_state(job_id, JOB_QUEUED, "")
+        self.refresh_transfers_table()
+        self.schedule_downloads()
+    
+    def remove_selected_jobs(self):
+        for job_id in self.selected_job_ids():
+            if job_id in self.active_workers:
+                self.stop_job(job_id, JOB_PAUSED)
+            job = self.download_queue.get(job_id)
+            self.download_queue.remove(job_id)
+            if job and job.parent_id:
+                self.download_queue.update_playlist(job.parent_id)
+        self.refresh_transfers_table()
+        self.schedule_downloads()
+    
+    def clear_finished_jobs(self):
+        self.download_queue.clear_finished()
+        self.refresh_transfers_table()
+    
+    def retry_budgets(self):
+        """Intentos por tipo de error elegidos en la configuración (None = valores por defecto)"""
+        retries = self.retries_spin.value()
+        if retries < 0:
+            return None
+        from .retry import DEFAULT_RETRY_BUDGETS
+        return {error_class: retries for error_class in DEFAULT_RETRY_BUDGETS}
+    
+    def job_settings(self):
+        """Opciones de la pestaña de configuración para las descargas nuevas"""
+        if not self.settings_built:
+            return dict(SETTINGS_DEFAULTS)
+        return {
+            'segments': self.segments_spin.value(),
+            'retries': self.retry_budgets(),
+            'adaptive': self.adaptive_check.isChecked(),
+            'dedup_policy': self.dedup_combo.currentData(),
+            'use_history': self.history_check.isChecked()
+        }
+    
+    def update_queue_limits(self):
+        self.download_queue.max_concurrent = self.concurrency_spin.value()
+        self.download_queue.max_per_host = self.per_host_spin.value()
+        self.download_queue.save()
+        from .ytdlp_pool import get_ytdlp_pool
+        get_ytdlp_pool(self.download_queue.max_concurrent)
+        get_bandwidth_limiter().expected_jobs = self.download_queue.max_concurrent
+        if self.adaptive_check.isChecked():
+            get_concurrency_tuner().job_controller(self.download_queue.max_concurrent)
+            self.adapt_timer.start()
+        else:
+            self.adapt_timer.stop()
+        self.schedule_downloads()
+    
+    def update_bandwidth_limits(self):
+        """Aplica los límites de velocidad; el ancho de banda se reparte de nuevo al momento"""
+        get_bandwidth_limiter().set_limits(
+            global_rate=self.global_limit_spin.value() * 1024,
+            per_host_rate=self.per_host_limit_spin.value() * 1024,
+            per_job_rate=self.per_job_limit_spin.value() * 1024
+        )
+    
+    def update_metrics_port(self):
+        """Abre (o cierra con 0) el servidor local de métricas en formato Prometheus"""
+        port = self.metrics_port_spin.value()
+        from .metrics import start_metrics_server
+        try:
+            start_metrics_server(port)
+        except OSError as e:
+            self.log(f"❌ No se pudo abrir el puerto de métricas {port}: {e}")
+            self.metrics_port_spin.setValue(0)
+            return
+        if port:
+            self.log(f"📈 Métricas en http://127.0.0.1:{port}/metrics")
+    
+    def update_queue_controls(self):
+        self.cancel_btn.setEnabled(bool(self.active_workers) or bool(self.download_queue.count(JOB_QUEUED)))
+        self.update_queue_depth()
+    
+    def update_queue_depth(self):
+        """Trabajos en marcha y en espera en cada etapa"""
+        cpu_waiting = cpu_running = 0
+        if self.download_queue.count(JOB_POSTPROCESSING):
+            from .postprocess import get_postprocess_pool
+            cpu_waiting, cpu_running = get_postprocess_pool().depth()
+        self.queue_depth_label.setText(
+            f"🌐 Red: {self.download_queue.count(JOB_RUNNING)} descargando · "
+            f"{self.download_queue.count(JOB_QUEUED)} en cola   |   "
+            f"⚙️ CPU: {cpu_running} post-procesando · {cpu_waiting} esperando")
+    
+    def refresh_transfers_table(self):
+        """Reconstruye la tabla de transferencias a partir de la cola"""
+        self.transfers_table.setRowCount(len(self.download_queue.jobs))
+        self.transfer_rows = {}
+        for row, job in enumerate(self.download_queue.jobs):
+            self.transfer_rows[job.job_id] = row
+            self.transfers_table.setItem(row, 0, QTableWidgetItem(str(job.job_id)))
+            self.update_transfer_row(job)
+    
+    def update_transfer_row(self, job):
+        row = self.transfer_rows.get(job.job_id)
+        if row is None:
+            return
+        name = os.path.basename(job.filepath) if job.filepath else (job.custom_name or job.title or job.url)
+        if job.parent_id:
+            name = f"↳ {name}"
+        self.transfers_table.setItem(row, 1, QTableWidgetItem(JOB_STATE_LABELS.get(job.state, job.state)))
+        self.transfers_table.setItem(row, 2, QTableWidgetItem(name))
+        self.transfers_table.setItem(row, 3, QTableWidgetItem(f"{job.progress}%"))
+        
+        speed_text = eta_text = ""
+        if job.state == JOB_RUNNING:
+            from .core import DownloadEngine
+            if job.speed:
+                speed_text = f"{DownloadEngine.format_bytes(job.speed)}/s"
+            if job.eta is not None:
+                eta_text = DownloadEngine.format_duration(job.eta)
+        self.transfers_table.setItem(row, 4, QTableWidgetItem(speed_text))
+        self.transfers_table.setItem(row, 5, QTableWidgetItem(eta_text))
+        message = f"{job.message} · 🔁 {job.retries}" if job.retries and job.state != JOB_RUNNING else job.message
+        self.transfers_table.setItem(row, 6, QTableWidgetItem(message))
+    
+    def show_about(self):
+        QMessageBox.about(self, "Acerca del Descargador Universal", 
+                         """
+                         <h2>🌐 Descargador Universal by SWAT</h2>
+                         <p><b>Versión:</b> 2.0</p>
+                         <p><b>Sistema:</b> Arch Linux</p>
+                         <br>
+                         <p><b>Características:</b></p>
+                         <ul>
+                         <li>✅ YouTube, TikTok, Instagram, Vimeo</li>
+                         <li>✅ Descargas directas de archivos</li>
+                         <li>✅ Organización automática por tipo</li>
+                         <li>✅ Múltiples calidades de video</li>
+                         <li>✅ Extracción de audio a MP3</li>
+                         <li>✅ Nombres personalizados</li>
+                         <li>✅ Interfaz moderna y oscura</li>
+                         </ul>
+                         <br>
+                         <p><b>Tecnologías:</b> PyQt6, yt-dlp, requests</p>
+                         <p><b>Licencia:</b> Software libre</p>
+                         """)
+    
+    def closeEvent(self, event):
+        self.flush_log()
+        if self.active_workers:
+            reply = QMessageBox.question(self, "Confirmar salida", 
+                                       "Hay descargas en curso. ¿Deseas detenerlas y salir?\n\n"
+                                       "Se reanudarán la próxima vez que abras la aplicación.",
+                                       QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply == QMessageBox.StandardButton.Yes:
+                workers = list(self.active_workers.values())
+                for job_id in list(self.active_workers):
+                    self.stop_job(job_id, JOB_QUEUED)
+                for worker in workers:
+                    worker.wait(3000)
+                event.accept()
+            else:
+                event.ignore()
+        else:
+            event.accept()
+
+def run_gui(argv=None, startup_profile=False):
+    """Abre la ventana principal; con startup_profile imprime en stderr el desglose del arranque"""
+    profile = get_startup_profile()
+    profile.mark("importar la interfaz")
+    app = QApplication(argv if argv is not None else sys.argv)
+    app.setApplicationName("Descargador Universal")
+    app.setApplicationVersion("2.0")
+    
+    # Configurar tema oscuro nativo si está disponible
+    app.setStyle('Fusion')
+    profile.mark("QApplication")
+    
+    window = UniversalDownloaderGUI()
+    window.show()
+    profile.mark("mostrar la ventana")
+    
+    if startup_profile:
+        # El primer ciclo de eventos pinta la ventana; entonces el arranque ha terminado
+        def report():
+            profile.mark("primer ciclo de eventos")
+            print(profile.report(), file=sys.stderr, flush=True)
+        QTimer.singleShot(0, report)
+    
+    return app.exec()
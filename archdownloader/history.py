@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Historial de descargas por URL
+Guarda los validadores HTTP (ETag / Last-Modified) para repetir descargas de forma condicional
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlunsplit
+
+def history_key(url):
+    """Normaliza la URL para usarla como clave (esquema y host en minúsculas, sin fragmento)"""
+    parts = urlsplit(url.strip())
+    netloc = parts.netloc.lower()
+    if parts.scheme.lower() == 'http' and netloc.endswith(':80'):
+        netloc = netloc[:-3]
+    elif parts.scheme.lower() == 'https' and netloc.endswith(':443'):
+        netloc = netloc[:-4]
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path or '/', parts.query, ''))
+
+class HistoryEntry:
+    """Última descarga completada de una URL"""
+    
+    def __init__(self, url, path, size=0, etag=None, last_modified=None, updated=0.0):
+        self.url = url
+        self.path = path
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.updated = updated
+    
+    def file_is_intact(self):
+        """Indica si el archivo guardado sigue en disco con el mismo tamaño"""
+        try:
+            return os.path.getsize(self.path) == self.size
+        except OSError:
+            return False
+    
+    def conditional_headers(self):
+        """Cabeceras para pedir el recurso solo si cambió desde la última descarga"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+class DownloadHistory:
+    """Historial persistente (SQLite) de URL → validadores, tamaño y ruta final"""
+    
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''CREATE TABLE IF NOT EXISTS history (
+                                url TEXT PRIMARY KEY,
+                                path TEXT NOT NULL,
+                                size INTEGER NOT NULL,
+                                etag TEXT,
+                                last_modified TEXT,
+                                updated REAL NOT NULL)''')
+        self._db.commit()
+    
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute('SELECT url, path, size, etag, last_modified, updated '
+                                   'FROM history WHERE url = ?', (history_key(url),)).fetchone()
+        return HistoryEntry(*row) if row else None
+    
+    def record(self, url, path, size=0, etag=None, last_modified=None):
+        """Guarda (o reemplaza) la última descarga completada de la URL"""
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO history (url, path, size, etag, last_modified, updated) '
+                             'VALUES (?, ?, ?, ?, ?, ?)',
+                             (history_key(url), os.path.abspath(path), size, etag, last_modified, time.time()))
+            self._db.commit()
+    
+    def forget(self, url):
+        with self._lock:
+            self._db.execute('DELETE FROM history WHERE url = ?', (history_key(url),))
+            self._db.commit()
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_histories = {}
+_histories_lock = threading.Lock()
+
+def get_download_history(db_path):
+    """Devuelve el historial compartido por todas las descargas para esa base de datos"""
+    with _histories_lock:
+        if db_path not in _histories:
+            _histories[db_path] = DownloadHistory(db_path)
+        return _histories[db_path]
@@ -0,0 +1,312 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de la información que extrae yt-dlp (info JSON)
+Evita repetir la extracción (página, JavaScript del reproductor, manifiestos)
+al reintentar, cambiar de calidad o volver a pedir el mismo video. Cada
+entrada caduca antes que las URLs firmadas de sus formatos y, si la caché
+pasa del tamaño máximo, se borran primero las que hace más que no se usan.
+"""
+
+import os
+import re
+import json
+import time
+import uuid
+import shutil
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime, timezone
+from urllib.parse import urlsplit, parse_qsl
+
+from .history import history_key
+
+# Validez de una entrada cuyas URLs no indican cuándo caducan
+INFO_CACHE_TTL = 6 * 3600
+
+# Margen antes de que caduquen las URLs firmadas: la descarga tiene que poder empezar y avanzar
+INFO_CACHE_EXPIRY_MARGIN = 15 * 60
+
+# Tamaño máximo de la caché (un info JSON de YouTube ocupa entre 0,3 y 1 MB)
+INFO_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Videos reconocidos por su ID, para que otras formas de la misma URL compartan entrada.
+# El ID tiene que acabar ahí: si no, dos IDs con el mismo principio compartirían entrada
+VIDEO_ID_PATTERNS = [
+    ('youtube', r'(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/)|youtu\.be/)([\w-]{11})(?![\w-])'),
+    ('vimeo', r'vimeo\.com/(?:video/)?(\d+)(?![\w-])'),
+    ('tiktok', r'tiktok\.com/@[^/]+/video/(\d+)(?![\w-])'),
+    ('twitter', r'(?:twitter|x)\.com/[^/]+/status/(\d+)(?![\w-])'),
+    ('instagram', r'instagram\.com/(?:[^/]+/)?(?:p|reel|reels|tv)/([\w-]+)(?![\w-])'),
+    ('dailymotion', r'(?:dailymotion\.com/video/|dai\.ly/)([a-z0-9]+)(?![\w-])'),
+    ('twitch', r'twitch\.tv/videos/(\d+)(?![\w-])')
+]
+
+# Parámetros de las URLs firmadas con la fecha de caducidad (segundos desde 1970)
+EXPIRY_PARAMS = {'expire', 'expires', 'exp', 'x-expires'}
+
+# Caducidad dentro de la ruta (/expire/1700000000/, manifiestos de YouTube) o de un token (exp=...~)
+EXPIRY_IN_PATH = re.compile(r'/expire/(\d{9,})')
+EXPIRY_IN_TOKEN = re.compile(r'(?:^|[~&])exp=(\d{9,})')
+
+def info_cache_key(url):
+    """Clave de la caché: plataforma e ID del video si se reconoce, si no la URL normalizada"""
+    for platform, pattern in VIDEO_ID_PATTERNS:
+        match = re.search(pattern, url, re.IGNORECASE)
+        if match:
+            return f"{platform}:{match.group(1)}"
+    return history_key(url)
+
+def url_expiry(url):
+    """Momento (epoch) en que caduca una URL firmada, o None si no lo indica"""
+    if not url:
+        return None
+    parts = urlsplit(url)
+    found = [int(value) for value in EXPIRY_IN_PATH.findall(parts.path)]
+    params = dict((key.lower(), value) for key, value in parse_qsl(parts.query))
+    for key, value in params.items():
+        if key in EXPIRY_PARAMS and value.isdigit() and len(value) >= 9:
+            found.append(int(value))
+        elif key in ('hdnea', 'hdnts', '__token__'):
+            found.extend(int(exp) for exp in EXPIRY_IN_TOKEN.findall(value))
+    if 'x-amz-date' in params and params.get('x-amz-expires', '').isdigit():
+        try:
+            signed = datetime.strptime(params['x-amz-date'], '%Y%m%dT%H%M%SZ').replace(tzinfo=timezone.utc)
+            found.append(int(signed.timestamp()) + int(params['x-amz-expires']))
+        except ValueError:
+            pass
+    return min(found) if found else None
+
+def info_expiry(info):
+    """Primera caducidad entre las URLs de la información y de todos sus formatos"""
+    urls = [info.get('url'), info.get('manifest_url')]
+    for fmt in (info.get('formats') or []) + (info.get('requested_formats') or []):
+        urls.extend([fmt.get('url'), fmt.get('manifest_url'), fmt.get('fragment_base_url')])
+    expiries = [expiry for expiry in map(url_expiry, urls) if expiry]
+    return min(expiries) if expiries else None
+
+class InfoCacheEntry:
+    """Información guardada de un video"""
+    
+    def __init__(self, key, url, path, size, extracted, expires, last_used):
+        self.key = key
+        self.url = url
+        self.path = path
+        self.size = size
+        self.extracted = extracted  # Momento de la extracción (epoch de yt-dlp)
+        self.expires = expires
+        self.last_used = last_used
+    
+    @property
+    def age(self):
+        return time.time() - self.extracted
+    
+    @property
+    def remaining(self):
+        return self.expires - time.time()
+
+class InfoCache:
+    """Caché persistente de info JSON: archivos en una carpeta e índice en SQLite.
+    
+    El índice guarda tamaño, caducidad y último uso de cada entrada; las
+    caducadas se descartan al pedirlas y, al guardar, se borran las menos
+    usadas recientemente hasta que la caché vuelve a caber en max_bytes.
+    """
+    
+    def __init__(self, cache_dir, max_bytes=INFO_CACHE_MAX_BYTES, ttl=INFO_CACHE_TTL,
+                 expiry_margin=INFO_CACHE_EXPIRY_MARGIN):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.expiry_margin = expiry_margin
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, 'indice.sqlite3'), check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''CREATE TABLE IF NOT EXISTS info (
+                                key TEXT PRIMARY KEY,
+                                url TEXT NOT NULL,
+                                path TEXT NOT NULL,
+                                size INTEGER NOT NULL,
+                                extracted REAL NOT NULL,
+                                expires REAL NOT NULL,
+                                last_used REAL NOT NULL)''')
+        self._db.commit()
+    
+    def temp_path(self):
+        """Ruta sin usar dentro de la caché para que yt-dlp escriba el info JSON (-o infojson:...)"""
+        return os.path.join(self.cache_dir, f"nuevo-{uuid.uuid4().hex}.info.json")
+    
+    def get(self, url):
+        """Entrada válida de la URL (y la marca como usada) o None"""
+        key = info_cache_key(url)
+        with self._lock:
+            row = self._db.execute('SELECT key, url, path, size, extracted, expires, last_used '
+                                   'FROM info WHERE key = ?', (key,)).fetchone()
+            if not row:
+                return None
+            entry = InfoCacheEntry(*row)
+            if entry.expires <= time.time() or not os.path.exists(entry.path):
+                self._remove(entry.key, entry.path)
+                self._db.commit()
+                return None
+            entry.last_used = time.time()
+            self._db.execute('UPDATE info SET last_used = ? WHERE key = ?', (entry.last_used, key))
+            self._db.commit()
+        return entry
+    
+    def load(self, url):
+        """Información del video si está en la caché y sigue siendo válida, o None"""
+        entry = self.get(url)
+        if not entry:
+            return None
+        try:
+            with open(entry.path, 'r', encoding='utf-8') as info_file:
+                return json.load(info_file)
+        except (OSError, ValueError):
+            self.forget(url)
+            return None
+    
+    def copy_to(self, url, path):
+        """Copia la información válida de la URL a path para pasársela a yt-dlp.
+        
+        yt-dlp lee su propia copia, así que una limpieza de la caché mientras
+        arranca no le quita el archivo. Devuelve la entrada o None.
+        """
+        entry = self.get(url)
+        if not entry:
+            return None
+        try:
+            shutil.copyfile(entry.path, path)
+        except OSError:
+            return None
+        return entry
+    
+    def store(self, url, path):
+        """Guarda en la caché el info JSON que yt-dlp escribió en path (lo mueve).
+        
+        No se guardan listas ni directos: sus manifiestos cambian mientras
+        duran. Devuelve la entrada o None si no se guardó.
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as info_file:
+                info = json.load(info_file)
+        except (OSError, ValueError):
+            self.discard(path)
+            return None
+        if not isinstance(info, dict) or info.get('_type', 'video') != 'video' or info.get('is_live'):
+            self.discard(path)
+            return None
+        
+        key = info_cache_key(url)
+        final_path = os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.info.json')
+        now = time.time()
+        extracted = min(float(info.get('epoch') or now), now)
+        expires = extracted + self.ttl
+        signed_expiry = info_expiry(info)
+        if signed_expiry:
+            expires = min(expires, signed_expiry - self.expiry_margin)
+        if expires <= now:
+            self.discard(path)
+            return None
+        
+        with self._lock:
+            os.replace(path, final_path)
+            size = os.path.getsize(final_path)
+            self._db.execute('INSERT OR REPLACE INTO info (key, url, path, size, extracted, expires, last_used) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)', (key, url, final_path, size, extracted, expires, now))
+            self._evict(now)
+            self._db.commit()
+        return InfoCacheEntry(key, url, final_path, size, extracted, expires, now)
+    
+    def store_info(self, url, info):
+        """Guarda una información ya cargada (la de --dump-single-json)"""
+        path = self.temp_path()
+        try:
+            with open(path, 'w', encoding='utf-8') as info_file:
+                json.dump(info, info_file, ensure_ascii=False)
+        except OSError:
+            self.discard(path)
+            return None
+        return self.store(url, path)
+    
+    def forget(self, url):
+        key = info_cache_key(url)
+        with self._lock:
+            row = self._db.execute('SELECT path FROM info WHERE key = ?', (key,)).fetchone()
+            if row:
+                self._remove(key, row[0])
+                self._db.commit()
+    
+    def discard(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
+    def stats(self):
+        """(entradas, bytes) de la caché"""
+        with self._lock:
+            count, size = self._db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM info').fetchone()
+        return count, size
+    
+    def _remove(self, key, path):
+        self._db.execute('DELETE FROM info WHERE key = ?', (key,))
+        self.discard(path)
+    
+    def _evict(self, now):
+        """Borra las entradas caducadas y, si aún no cabe, las usadas hace más tiempo"""
+        for key, path in self._db.execute('SELECT key, path FROM info WHERE expires <= ?', (now,)).fetchall():
+            self._remove(key, path)
+        total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM info').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, path, size in self._db.execute('SELECT key, path, size FROM info '
+                                                'ORDER BY last_used ASC').fetchall():
+            if total <= self.max_bytes:
+                break
+            self._remove(key, path)
+            total -= size
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_info_cache(cache_dir):
+    """Devuelve la caché compartida por todas las descargas para esa carpeta"""
+    with _caches_lock:
+        if cache_dir not in _caches:
+            _caches[cache_dir] = InfoCache(cache_dir)
+        return _caches[cache_dir]
+
+def format_choices(info, limit=12):
+    """Formatos de video para elegir en la interfaz: [(formato de yt-dlp, descripción)].
+    
+    Uno por resolución y contenedor (el de más bitrate), de mayor a menor.
+    Los formatos solo de video se piden junto con el mejor audio.
+    """
+    best = {}
+    for fmt in info.get('formats') or []:
+        if fmt.get('vcodec') in (None, 'none') or not fmt.get('height') or not fmt.get('format_id'):
+            continue
+        key = (fmt['height'], fmt.get('ext'))
+        if key not in best or (fmt.get('tbr') or 0) > (best[key].get('tbr') or 0):
+            best[key] = fmt
+    
+    choices = []
+    for (height, extension), fmt in sorted(best.items(), key=lambda item: (item[0][0], item[1].get('tbr') or 0),
+                                           reverse=True)[:limit]:
+        has_audio = fmt.get('acodec') not in (None, 'none')
+        spec = fmt['format_id'] if has_audio else f"{fmt['format_id']}+bestaudio/best"
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        resolution = f"{height}p{int(fmt['fps'])}" if (fmt.get('fps') or 0) > 30 else f"{height}p"
+        details = [resolution, extension or '?', (fmt.get('vcodec') or '').split('.')[0]]
+        if size:
+            details.append(f"{size / 1024 ** 2:.1f} MB")
+        if not has_audio:
+            details.append("+ audio")
+        choices.append((spec, " · ".join(detail for detail in details if detail)))
+    return choices
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Cola persistente de descargas con límites de concurrencia
+"""
+
+import os
+import json
+from urllib.parse import urlparse
+
+# Estados de un trabajo en la cola de descargas
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_POSTPROCESSING = 'postprocessing'  # Descargado; ffmpeg trabaja sin ocupar plaza de descarga
+JOB_PAUSED = 'paused'
+JOB_FAILED = 'failed'
+JOB_DONE = 'done'
+JOB_EXPANDED = 'expanded'  # Lista o canal ya expandido: avanza con sus entradas
+
+JOB_STATE_LABELS = {
+    JOB_QUEUED: '⏳ En cola',
+    JOB_RUNNING: '⬇️ Descargando',
+    JOB_POSTPROCESSING: '⚙️ Post-procesando',
+    JOB_PAUSED: '⏸️ Pausada',
+    JOB_FAILED: '❌ Fallida',
+    JOB_DONE: '✅ Completada',
+    JOB_EXPANDED: '📃 Lista'
+}
+
+class DownloadJob:
+    """Una descarga de la cola con las opciones con las que se pidió"""
+    
+    def __init__(self, job_id, url, download_path, video_quality="best", audio_only=False,
+                 custom_name="", state=JOB_QUEUED, progress=0, message="", filepath="",
+                 parent_id=None, title="", checksum="", retries=0):
+        self.job_id = job_id
+        self.url = url
+        self.download_path = download_path
+        self.video_quality = video_quality
+        self.audio_only = audio_only
+        self.custom_name = custom_name
+        self.state = state
+        self.progress = progress
+        self.message = message
+        self.filepath = filepath
+        self.parent_id = parent_id  # Lista o canal del que sale esta entrada
+        self.title = title
+        self.checksum = checksum  # Hash esperado ('sha256:HEX', ...) o vacío para buscarlo
+        self.retries = retries  # Reintentos del último intento (servidores poco fiables)
+        # Datos de la transferencia en curso (no se guardan en disco)
+        self.speed = 0.0
+        self.eta = None
+    
+    @property
+    def host(self):
+        return (urlparse(self.url).hostname or '').lower()
+    
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'url': self.url,
+            'download_path': self.download_path,
+            'video_quality': self.video_quality,
+            'audio_only': self.audio_only,
+            'custom_name': self.custom_name,
+            'state': self.state,
+            'progress': self.progress,
+            'message': self.message,
+            'filepath': self.filepath,
+            'parent_id': self.parent_id,
+            'title': self.title,
+            'checksum': self.checksum,
+            'retries': self.retries
+        }
+    
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+class DownloadQueue:
+    """Lista de descargas con límites de concurrencia global y por servidor.
+    
+    Si se indica queue_file la cola se guarda en disco en cada cambio de estado;
+    sin archivo (modo por lotes) vive solo en memoria.
+    """
+    
+    def __init__(self, queue_file=None, max_concurrent=3, max_per_host=2):
+        self.queue_file = queue_file
+        self.max_concurrent = max_concurrent
+        self.max_per_host = max_per_host  # 0 = sin límite por servidor
+        self.jobs = []
+        self.next_id = 1
+    
+    def load(self):
+        """Carga la cola guardada. Las descargas que estaban en curso vuelven a la cola"""
+        if not self.queue_file:
+            return
+        try:
+            with open(self.queue_file, 'r', encoding='utf-8') as queue_file:
+                data = json.load(queue_file)
+        except (OSError, ValueError):
+            return
+        
+        self.max_concurrent = data.get('max_concurrent', self.max_concurrent)
+        self.max_per_host = data.get('max_per_host', self.max_per_host)
+        self.next_id = data.get('next_id', 1)
+        self.jobs = []
+        for item in data.get('jobs', []):
+            try:
+                job = DownloadJob.from_dict(item)
+            except TypeError:
+                continue
+            if job.state in (JOB_RUNNING, JOB_POSTPROCESSING):
+                job.state = JOB_QUEUED
+            self.jobs.append(job)
+    
+    def save(self):
+        """Guarda la cola de forma atómica"""
+        if not self.queue_file:
+            return
+        data = {
+            'max_concurrent': self.max_concurrent,
+            'max_per_host': self.max_per_host,
+            'next_id': self.next_id,
+            'jobs': [job.to_dict() for job in self.jobs]
+        }
+        temp_path = self.queue_file + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.queue_file), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as queue_file:
+                json.dump(data, queue_file, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.queue_file)
+        except OSError:
+            pass
+    
+    def add(self, url, download_path, **options):
+        job = DownloadJob(self.next_id, url, download_path, **options)
+        self.next_id += 1
+        self.jobs.append(job)
+        self.save()
+        return job
+    
+    def get(self, job_id):
+        for job in self.jobs:
+            if job.job_id == job_id:
+                return job
+        return None
+    
+    def remove(self, job_id):
+        """Quita un trabajo y, si es una lista, todas sus entradas"""
+        removed = {job_id} | set(self.descendants(job_id))
+        self.jobs = [job for job in self.jobs if job.job_id not in removed]
+        self.save()
+    
+    def children(self, job_id):
+        return [job for job in self.jobs if job.parent_id == job_id]
+    
+    def descendants(self, job_id):
+        """IDs de las entradas de una lista, incluidas las de sus sublistas"""
+        result = []
+        for child in self.children(job_id):
+            result.append(child.job_id)
+            result.extend(self.descendants(child.job_id))
+        return result
+    
+    def add_playlist_entries(self, parent, entries):
+        """Encola cada entrada de una lista expandida como un trabajo propio"""
+        for entry in entries:
+            job = DownloadJob(self.next_id, entry['url'], parent.download_path,
+                              video_quality=parent.video_quality, audio_only=parent.audio_only,
+                              parent_id=parent.job_id, title=entry.get('title', ''))
+            self.next_id += 1
+            self.jobs.append(job)
+        parent.state = JOB_EXPANDED
+        return self.update_playlist(parent.job_id)
+    
+    def update_playlist(self, job_id):
+        """Recalcula el progreso de una lista a partir de sus entradas.
+        
+        La lista pasa a completada cuando ya no quedan entradas pendientes (y
+        vuelve a estar en curso si se reintenta alguna) y el cambio se propaga
+        a la lista que la contiene, si la hay.
+        """
+        parent = self.get(job_id)
+        if not parent:
+            return None
+        children = self.children(job_id)
+        done = sum(1 for job in children if job.state == JOB_DONE)
+        failed = sum(1 for job in children if job.state == JOB_FAILED)
+        total = len(children)
+        
+        parent.progress = int(sum(100 if job.state == JOB_DONE else job.progress
+                                  for job in children) / total) if total else 100
+        parent.message = f"{done}/{total} completadas" + (f", {failed} con errores" if failed else "")
+        parent.state = JOB_DONE if done + failed == total else JOB_EXPANDED
+        self.save()
+        
+        if parent.parent_id:
+            self.update_playlist(parent.parent_id)
+        return parent
+    
+    def set_state(self, job_id, state, message=None):
+        job = self.get(job_id)
+        if job:
+            job.state = state
+            if message is not None:
+                job.message = message
+            self.save()
+        return job
+    
+    def clear_finished(self):
+        self.jobs = [job for job in self.jobs if job.state != JOB_DONE]
+        self.save()
+    
+    def count(self, *states):
+        return sum(1 for job in self.jobs if job.state in states)
+    
+    def runnable_jobs(self, limit=None):
+        """Devuelve los trabajos en cola que pueden arrancar sin superar los límites.
+        
+        limit, si se indica, rebaja max_concurrent (ajuste automático de concurrencia).
+        """
+        running = [job for job in self.jobs if job.state == JOB_RUNNING]
+        max_concurrent = self.max_concurrent if limit is None else min(limit, self.max_concurrent)
+        free_slots = max_concurrent - len(running)
+        per_host = {}
+        for job in running:
+            per_host[job.host] = per_host.get(job.host, 0) + 1
+        
+        selected = []
+        for job in self.jobs:
+            if free_slots <= 0:
+                break
+            if job.state != JOB_QUEUED:
+                continue
+            if self.max_per_host and per_host.get(job.host, 0) >= self.max_per_host:
+                continue
+            selected.append(job)
+            per_host[job.host] = per_host.get(job.host, 0) + 1
+            free_slots -= 1
+        return selected
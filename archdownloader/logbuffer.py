@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Registro acotado de mensajes
+Los mensajes se guardan en un búfer circular con un máximo de líneas y se
+entregan por lotes a la interfaz; opcionalmente se copian a un archivo que
+rota al llegar a un tamaño máximo
+"""
+
+import os
+import time
+import threading
+from collections import deque
+
+# Líneas que se conservan en memoria (y en el panel de la interfaz)
+LOG_MAX_LINES = 5000
+
+# Tamaño a partir del cual rota el archivo de registro y copias que se guardan
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+# Líneas que se acumulan antes de escribirlas en el archivo aunque la interfaz no vacíe el búfer
+LOG_FILE_BATCH = 500
+
+class LogBuffer:
+    """Búfer circular de líneas de registro con volcado opcional a archivo.
+    
+    append() se puede llamar desde cualquier hilo; drain() devuelve las
+    líneas nuevas desde la última llamada para pintarlas de una vez. Si la
+    interfaz no llega a vaciar el búfer, las líneas pendientes más antiguas
+    se descartan en lugar de crecer sin límite. El archivo no depende de
+    eso: recibe todas las líneas, por lotes, desde append() o drain().
+    """
+    
+    def __init__(self, max_lines=LOG_MAX_LINES, spill_path=None,
+                 max_bytes=LOG_FILE_MAX_BYTES, backups=LOG_FILE_BACKUPS):
+        self.max_lines = max_lines
+        self.spill_path = spill_path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0  # Líneas pendientes descartadas antes de llegar a la interfaz
+        self._pending = deque(maxlen=max_lines)
+        self._unspilled = []  # Líneas que aún no están en el archivo
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()  # Se toma antes que _lock
+    
+    def append(self, message):
+        """Añade un mensaje con la hora; devuelve la línea tal como se guarda"""
+        line = f"[{time.strftime('%H:%M:%S')}] {message}"
+        with self._lock:
+            if len(self._pending) == self._pending.maxlen:
+                self.dropped += 1
+            self._pending.append(line)
+            if self.spill_path:
+                self._unspilled.append(line)
+            spill = len(self._unspilled) >= LOG_FILE_BATCH
+        if spill:
+            self.flush()
+        return line
+    
+    def drain(self):
+        """Devuelve y olvida las líneas pendientes; también escribe en el archivo las que falten"""
+        with self._lock:
+            lines = list(self._pending)
+            self._pending.clear()
+            spill = bool(self._unspilled)
+        if spill:
+            self.flush()
+        return lines
+    
+    def flush(self):
+        """Escribe en el archivo de registro las líneas que aún no están en él"""
+        with self._file_lock:
+            with self._lock:
+                lines, self._unspilled = self._unspilled, []
+            if lines and self.spill_path:
+                self._spill(self.spill_path, lines)
+    
+    def clear(self):
+        with self._lock:
+            self._pending.clear()
+    
+    def set_max_lines(self, max_lines):
+        """Cambia el máximo de líneas conservando las más recientes"""
+        with self._lock:
+            self.max_lines = max_lines
+            self._pending = deque(self._pending, maxlen=max_lines)
+    
+    def set_spill_path(self, path):
+        """Activa (o con None desactiva) la copia del registro en un archivo"""
+        # Lo acumulado va al archivo con el que se registró
+        self.flush()
+        with self._file_lock:
+            self.spill_path = path
+    
+    def _spill(self, path, lines):
+        date = time.strftime('%Y-%m-%d')
+        text = ''.join(f"{date} {line}\n" for line in lines)
+        try:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            try:
+                if os.path.getsize(path) + len(text) > self.max_bytes:
+                    self._rotate(path)
+            except FileNotFoundError:
+                pass
+            with open(path, 'a', encoding='utf-8') as log_file:
+                log_file.write(text)
+        except OSError:
+            # El registro en disco es opcional: un fallo no debe afectar a la interfaz
+            pass
+    
+    def _rotate(self, path):
+        """registro.log → registro.log.1 → ... → registro.log.N (la más antigua se borra)"""
+        for index in range(self.backups - 1, 0, -1):
+            older = f"{path}.{index}"
+            if os.path.exists(older):
+                os.replace(older, f"{path}.{index + 1}")
+        if self.backups:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Métricas estructuradas por descarga
+Cada trabajo terminado se añade a un archivo JSONL y a contadores acumulados
+que se pueden exponer en formato de texto de Prometheus por un puerto local
+"""
+
+import os
+import json
+import time
+import threading
+import http.server
+from urllib.parse import urlparse
+
+# Segundos sin recibir datos a partir de los cuales una descarga cuenta como atascada
+STALL_THRESHOLD = 1.0
+
+# Ventana con la que se calcula la velocidad máxima
+PEAK_WINDOW = 1.0
+
+# Resultados de un trabajo
+OUTCOME_OK = 'ok'
+OUTCOME_FAILED = 'failed'
+OUTCOME_CANCELLED = 'cancelled'
+
+PLATFORM_ALIASES = {'youtu': 'youtube', 'x': 'twitter'}
+
+def platform_name(host):
+    """Nombre corto de la plataforma a partir del servidor (www.youtube.com → youtube)"""
+    labels = [label for label in host.split('.') if label not in ('www', 'm', 'mobile')]
+    if len(labels) < 2:
+        return host or 'desconocida'
+    name = labels[-2]
+    return PLATFORM_ALIASES.get(name, name)
+
+class JobMetrics:
+    """Tiempos, bytes y resultado de una descarga.
+    
+    Los segmentos de una descarga directa informan desde varios hilos, así
+    que los contadores de datos se protegen con un cerrojo.
+    """
+    
+    def __init__(self, url, kind='directa', recorder=None):
+        self.url = url
+        self.host = (urlparse(url).hostname or '').lower()
+        self.kind = kind  # 'directa', 'yt-dlp' o 'lista' (None hasta analizar la URL)
+        self.platform = 'directa' if kind == 'directa' else platform_name(self.host)
+        self.recorder = recorder
+        self.started = time.time()
+        self.duration_s = None
+        self.dns_s = None
+        self.connect_s = None
+        self.tls_s = None
+        self.ttfb_s = None
+        self.connections = 0
+        self.bytes = 0
+        self.peak_bps = 0.0
+        self.retries = 0
+        self.stall_s = 0.0
+        self.postprocess_s = None
+        self.outcome = None
+        self.error = ''
+        self._start = time.monotonic()
+        self._first_data = None
+        self._last_data = None
+        self._window_start = None
+        self._window_bytes = 0
+        self._postprocess_start = None
+        self._lock = threading.Lock()
+    
+    def set_kind(self, kind):
+        self.kind = kind
+        self.platform = 'directa' if kind == 'directa' else platform_name(self.host)
+    
+    def add_connection(self, dns, connect, tls=None):
+        """Registra una conexión nueva; se guardan los tiempos de la primera"""
+        with self._lock:
+            self.connections += 1
+            if self.connect_s is None:
+                self.dns_s, self.connect_s, self.tls_s = dns, connect, tls
+    
+    def add_response(self, response):
+        """Tiempo hasta las cabeceras de la primera respuesta (requests lo mide en elapsed)"""
+        if self.ttfb_s is None:
+            self.ttfb_s = response.elapsed.total_seconds()
+    
+    def add_bytes(self, amount):
+        """Cuenta bytes recibidos y actualiza atascos y velocidad máxima"""
+        now = time.monotonic()
+        with self._lock:
+            if self._first_data is None:
+                self._first_data = self._window_start = now
+            elif now - self._last_data >= STALL_THRESHOLD:
+                self.stall_s += now - self._last_data
+            self._last_data = now
+            self.bytes += amount
+            self._window_bytes += amount
+            if now - self._window_start >= PEAK_WINDOW:
+                self.peak_bps = max(self.peak_bps, self._window_bytes / (now - self._window_start))
+                self._window_start = now
+                self._window_bytes = 0
+        if self.recorder:
+            self.recorder.count_bytes(self, amount)
+    
+    def add_retry(self):
+        with self._lock:
+            self.retries += 1
+    
+    def start_postprocess(self):
+        if self._postprocess_start is None:
+            self._postprocess_start = time.monotonic()
+    
+    def end_postprocess(self):
+        if self._postprocess_start is not None and self.postprocess_s is None:
+            self.postprocess_s = time.monotonic() - self._postprocess_start
+    
+    def finish(self, outcome, error=''):
+        self.end_postprocess()
+        self.outcome = outcome
+        self.error = error
+        self.duration_s = time.monotonic() - self._start
+    
+    @property
+    def average_bps(self):
+        """Velocidad media mientras llegaban datos (sin contar conexión ni post-procesado)"""
+        if self._first_data is None:
+            return 0.0
+        elapsed = self._last_data - self._first_data
+        if elapsed < 1e-3:
+            # Todo llegó en una sola lectura: se cuenta desde el inicio del trabajo
+            elapsed = self._last_data - self._start
+        return self.bytes / elapsed if elapsed > 0 else 0.0
+    
+    def to_dict(self):
+        def rounded(value):
+            return round(value, 4) if value is not None else None
+        
+        # Descargas cortas: la velocidad máxima es la media si no se llegó a cerrar ninguna ventana
+        peak = max(self.peak_bps, self.average_bps)
+        return {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(self.started)),
+            'url': self.url,
+            'host': self.host,
+            'platform': self.platform,
+            'kind': self.kind,
+            'outcome': self.outcome,
+            'error': self.error,
+            'duration_s': rounded(self.duration_s),
+            'dns_s': rounded(self.dns_s),
+            'connect_s': rounded(self.connect_s),
+            'tls_s': rounded(self.tls_s),
+            'ttfb_s': rounded(self.ttfb_s),
+            'connections': self.connections,
+            'bytes': self.bytes,
+            'avg_bps': round(self.average_bps),
+            'peak_bps': round(peak),
+            'retries': self.retries,
+            'stall_s': rounded(self.stall_s),
+            'postprocess_s': rounded(self.postprocess_s)
+        }
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class MetricsRecorder:
+    """Guarda las métricas de cada trabajo en JSONL y acumula contadores para Prometheus"""
+    
+    # nombre → (tipo, ayuda)
+    METRICS = {
+        'archdl_jobs_total': ('counter', "Descargas terminadas por resultado"),
+        'archdl_jobs_active': ('gauge', "Descargas en curso"),
+        'archdl_bytes_total': ('counter', "Bytes recibidos"),
+        'archdl_job_duration_seconds_total': ('counter', "Duración acumulada de las descargas terminadas"),
+        'archdl_ttfb_seconds_total': ('counter', "Tiempo hasta el primer byte acumulado"),
+        'archdl_retries_total': ('counter', "Reintentos"),
+        'archdl_stall_seconds_total': ('counter', "Tiempo sin recibir datos durante las descargas"),
+        'archdl_postprocess_seconds_total': ('counter', "Tiempo de post-procesado")
+    }
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}  # (nombre, etiquetas) → valor
+    
+    def _add(self, name, labels, amount):
+        key = (name, tuple(sorted(labels.items())))
+        self._values[key] = self._values.get(key, 0) + amount
+    
+    def job_started(self, metrics):
+        with self._lock:
+            self._add('archdl_jobs_active', {'kind': metrics.kind}, 1)
+    
+    def count_bytes(self, metrics, amount):
+        with self._lock:
+            self._add('archdl_bytes_total', {'host': metrics.host, 'platform': metrics.platform}, amount)
+    
+    def record(self, metrics, jsonl_path=None):
+        """Acumula un trabajo terminado y lo añade al JSONL si se indica la ruta"""
+        labels = {'host': metrics.host, 'platform': metrics.platform}
+        with self._lock:
+            self._add('archdl_jobs_active', {'kind': metrics.kind}, -1)
+            self._add('archdl_jobs_total', dict(labels, outcome=metrics.outcome), 1)
+            self._add('archdl_job_duration_seconds_total', labels, metrics.duration_s or 0.0)
+            self._add('archdl_retries_total', labels, metrics.retries)
+            self._add('archdl_stall_seconds_total', labels, metrics.stall_s)
+            if metrics.ttfb_s is not None:
+                self._add('archdl_ttfb_seconds_total', labels, metrics.ttfb_s)
+            if metrics.postprocess_s is not None:
+                self._add('archdl_postprocess_seconds_total', labels, metrics.postprocess_s)
+            
+            if jsonl_path:
+                try:
+                    os.makedirs(os.path.dirname(jsonl_path) or '.', exist_ok=True)
+                    with open(jsonl_path, 'a', encoding='utf-8') as jsonl_file:
+                        jsonl_file.write(json.dumps(metrics.to_dict(), ensure_ascii=False) + '\n')
+                except OSError:
+                    pass
+    
+    def render_prometheus(self):
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)"""
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = []
+        for name, (metric_type, help_text) in self.METRICS.items():
+            samples = [(labels, value) for (sample_name, labels), value in values if sample_name == name]
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape_label(label)}"' for key, label in labels)
+                value = repr(round(value, 6)) if isinstance(value, float) else str(value)
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+        return '\n'.join(lines) + '\n'
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    recorder = None
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.recorder.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class MetricsServer:
+    """Servidor HTTP local que expone /metrics en un hilo aparte"""
+    
+    def __init__(self, recorder, port, address='127.0.0.1'):
+        handler = type('MetricsHandler', (_MetricsHandler,), {'recorder': recorder})
+        self.httpd = http.server.ThreadingHTTPServer((address, port), handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_port
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics', daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+_recorder = None
+_metrics_server = None
+_recorder_lock = threading.Lock()
+
+def get_metrics_recorder():
+    """Devuelve el registro de métricas compartido por todas las descargas del proceso"""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = MetricsRecorder()
+        return _recorder
+
+def start_metrics_server(port, address='127.0.0.1'):
+    """Expone las métricas en http://address:port/metrics (0 = detener el servidor)"""
+    global _metrics_server
+    recorder = get_metrics_recorder()
+    with _recorder_lock:
+        if _metrics_server and _metrics_server.port == port:
+            return _metrics_server
+        if _metrics_server:
+            _metrics_server.stop()
+            _metrics_server = None
+        if port:
+            _metrics_server = MetricsServer(recorder, port, address)
+        return _metrics_server
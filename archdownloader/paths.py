@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Rutas de los datos de la aplicación
+Solo usa os, así que la interfaz puede importarlas al arrancar sin cargar
+el motor de descargas
+"""
+
+import os
+
+# Datos persistentes de la aplicación (cola de descargas, etc.)
+APP_DATA_DIR = os.path.join(os.environ.get('XDG_DATA_HOME', os.path.expanduser('~/.local/share')),
+                            'descargador-archivos')
+
+# Índice de contenido descargado (hash → ruta) para detectar duplicados
+DEDUP_DB_PATH = os.path.join(APP_DATA_DIR, 'dedup.sqlite3')
+
+# Historial de URLs descargadas y archivos de yt-dlp con los IDs ya obtenidos
+HISTORY_DB_PATH = os.path.join(APP_DATA_DIR, 'historial.sqlite3')
+YTDLP_ARCHIVE_VIDEO = os.path.join(APP_DATA_DIR, 'ytdlp-archivo-video.txt')
+YTDLP_ARCHIVE_AUDIO = os.path.join(APP_DATA_DIR, 'ytdlp-archivo-audio.txt')
+
+# Caché de la información que extrae yt-dlp de cada video (info JSON)
+INFO_CACHE_DIR = os.path.join(APP_DATA_DIR, 'cache-info')
+
+# Métricas de cada descarga terminada (una línea JSON por trabajo)
+METRICS_PATH = os.path.join(APP_DATA_DIR, 'metricas.jsonl')
+
+# Categorías y reglas de clasificación definidas por el usuario
+CATEGORIES_PATH = os.path.join(APP_DATA_DIR, 'categorias.json')
+
+DEFAULT_DOWNLOAD_PATH = os.path.expanduser("~/Descargas")
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Etapa de post-procesado (CPU) separada de la descarga (red)
+Extracción de audio, cambio de contenedor e incrustación de metadatos con
+ffmpeg en un grupo de tantas plazas como núcleos; la descarga entrega el
+archivo en bruto y deja libre su plaza para la siguiente
+"""
+
+import os
+import shutil
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from .ytdlp_pool import signal_process, stop_process
+
+# Tipos de post-procesado
+POSTPROCESS_AUDIO = 'audio'  # Extraer el audio y convertirlo a MP3
+POSTPROCESS_REMUX = 'remux'  # Cambiar de contenedor sin recodificar (MPEG-TS de HLS → MP4)
+
+POSTPROCESS_LABELS = {
+    POSTPROCESS_AUDIO: 'Convirtiendo a MP3',
+    POSTPROCESS_REMUX: 'Reparando el contenedor'
+}
+
+# Calidad del MP3 (la que pedía antes yt-dlp con --audio-quality 192K)
+AUDIO_BITRATE = '192k'
+
+# Metadatos que se incrustan: clave de yt-dlp → etiqueta de ffmpeg
+METADATA_TAGS = {
+    'title': 'title',
+    'uploader': 'artist',
+    'webpage_url': 'comment'
+}
+
+_ffmpeg_path = None
+
+def find_ffmpeg(refresh=False):
+    """Ruta de ffmpeg o None si no está instalado (se busca una vez por sesión)"""
+    global _ffmpeg_path
+    if _ffmpeg_path is None or refresh:
+        _ffmpeg_path = shutil.which('ffmpeg') or ''
+    return _ffmpeg_path or None
+
+class PostProcessTask:
+    """Un archivo descargado que ffmpeg convierte en el archivo final.
+    
+    ffmpeg escribe en un temporal junto al destino; al terminar bien el
+    temporal pasa a ser el destino y el archivo en bruto se borra. Si falla
+    o se cancela, el archivo en bruto se conserva.
+    """
+    
+    def __init__(self, kind, source, target, metadata=None, audio_bitrate=AUDIO_BITRATE):
+        self.kind = kind
+        self.source = source
+        self.target = target
+        self.metadata = metadata or {}
+        self.audio_bitrate = audio_bitrate
+        self.cancelled = False
+        self.process = None
+        self._lock = threading.Lock()
+    
+    @property
+    def temp_path(self):
+        stem, extension = os.path.splitext(self.target)
+        return f"{stem}.temp{extension}"
+    
+    def command(self, ffmpeg):
+        cmd = [ffmpeg, '-hide_banner', '-nostdin', '-loglevel', 'error', '-y', '-i', self.source,
+               '-map_metadata', '0']
+        if self.kind == POSTPROCESS_AUDIO:
+            cmd.extend(['-vn', '-codec:a', 'libmp3lame', '-b:a', self.audio_bitrate])
+        else:
+            cmd.extend(['-map', '0', '-codec', 'copy'])
+        for key, tag in METADATA_TAGS.items():
+            if self.metadata.get(key):
+                cmd.extend(['-metadata', f"{tag}={self.metadata[key]}"])
+        cmd.append(self.temp_path)
+        return cmd
+    
+    def run(self, ffmpeg):
+        """Ejecuta ffmpeg; devuelve (éxito, mensaje de error)"""
+        with self._lock:
+            if self.cancelled:
+                return False, "Cancelado"
+            # Sesión propia para poder detener ffmpeg aunque esté en mitad de la conversión
+            self.process = subprocess.Popen(self.command(ffmpeg), stdin=subprocess.DEVNULL,
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                            text=True, errors='replace', start_new_session=True)
+        try:
+            _, errors = self.process.communicate()
+            return_code = self.process.returncode
+        finally:
+            with self._lock:
+                process, self.process = self.process, None
+            if process.poll() is None:
+                stop_process(process)
+        
+        if self.cancelled or return_code != 0:
+            self.remove_temp()
+            if self.cancelled:
+                return False, "Cancelado"
+            lines = [line for line in (errors or '').splitlines() if line.strip()]
+            return False, lines[-1] if lines else f"ffmpeg terminó con código {return_code}"
+        
+        os.replace(self.temp_path, self.target)
+        if os.path.abspath(self.source) != os.path.abspath(self.target):
+            try:
+                os.remove(self.source)
+            except OSError:
+                pass
+        return True, ""
+    
+    def cancel(self):
+        """Evita que empiece o detiene ffmpeg si ya está en marcha"""
+        with self._lock:
+            self.cancelled = True
+            signal_process(self.process)
+    
+    def remove_temp(self):
+        try:
+            os.remove(self.temp_path)
+        except OSError:
+            pass
+
+class PostProcessPool:
+    """Plazas de CPU para el post-procesado, separadas de las de descarga.
+    
+    Cada plaza vigila un proceso ffmpeg, que es quien hace el trabajo de
+    CPU, así que basta con hilos: el número de plazas (por defecto, los
+    núcleos) es el número de ffmpeg simultáneos. depth() da los trabajos
+    esperando y en marcha para mostrar la cola de CPU.
+    """
+    
+    def __init__(self, size=None):
+        self.size = max(1, size or os.cpu_count() or 1)
+        self.executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='archdl-postproceso')
+        self.waiting = 0
+        self.running = 0
+        self._lock = threading.Lock()
+    
+    def submit(self, function, *args):
+        """Encola function(*args) en la etapa de CPU y devuelve su Future"""
+        with self._lock:
+            self.waiting += 1
+        started = threading.Event()
+        future = self.executor.submit(self._run, started, function, args)
+        future.add_done_callback(lambda done: self._discard(started))
+        return future
+    
+    def _run(self, started, function, args):
+        with self._lock:
+            self.waiting -= 1
+            self.running += 1
+            started.set()
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+    
+    def _discard(self, started):
+        # Un Future cancelado antes de empezar nunca pasa por _run
+        with self._lock:
+            if not started.is_set():
+                self.waiting -= 1
+    
+    def depth(self):
+        """(esperando, en marcha)"""
+        with self._lock:
+            return self.waiting, self.running
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_postprocess_pool():
+    """Devuelve el grupo de post-procesado compartido por todas las descargas del proceso"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PostProcessPool()
+        return _pool
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Reintentos de las descargas directas
+Espera exponencial con jitter, respeta Retry-After y limita los intentos por
+tipo de error; quien reintenta continúa desde el último byte bueno
+"""
+
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# Tipos de error que se reintentan
+ERROR_CONNECTION = 'conexion'    # Conexión rechazada o cortada, DNS
+ERROR_TIMEOUT = 'timeout'        # El servidor no respondió a tiempo
+ERROR_SERVER = 'servidor'        # 5xx, 408 y 429
+ERROR_INCOMPLETE = 'incompleta'  # El cuerpo terminó antes de tiempo
+
+ERROR_CLASS_LABELS = {
+    ERROR_CONNECTION: 'conexión',
+    ERROR_TIMEOUT: 'timeout',
+    ERROR_SERVER: 'servidor',
+    ERROR_INCOMPLETE: 'incompleta'
+}
+
+# Intentos extra permitidos por tipo de error en una descarga
+DEFAULT_RETRY_BUDGETS = {
+    ERROR_CONNECTION: 5,
+    ERROR_TIMEOUT: 5,
+    ERROR_SERVER: 4,
+    ERROR_INCOMPLETE: 8
+}
+
+# Espera base y máxima entre intentos (se duplica en cada intento del mismo tipo)
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+
+# Si el servidor pide esperar más que esto con Retry-After, la descarga se da por fallida
+RETRY_AFTER_MAX = 300.0
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+class IncompleteDownload(requests.RequestException):
+    """La conexión se cerró antes de recibir todos los bytes pedidos"""
+
+def parse_retry_budgets(text):
+    """Convierte '3' (todos los tipos) o 'conexion=5,servidor=2' en {tipo: intentos}"""
+    budgets = dict(DEFAULT_RETRY_BUDGETS)
+    text = str(text).strip()
+    if text.isdigit():
+        return {error_class: int(text) for error_class in budgets}
+    for item in text.split(','):
+        name, _, value = item.partition('=')
+        name = name.strip().lower().replace('ó', 'o')
+        if name not in budgets or not value.strip().isdigit():
+            raise ValueError(f"Reintentos no válidos: {item.strip()} "
+                             f"(tipos: {', '.join(budgets)})")
+        budgets[name] = int(value)
+    return budgets
+
+def classify_error(error):
+    """Devuelve el tipo de error (ERROR_*) o None si reintentar no serviría de nada"""
+    if isinstance(error, IncompleteDownload):
+        return ERROR_INCOMPLETE
+    if isinstance(error, requests.HTTPError):
+        response = error.response
+        if response is not None and response.status_code in RETRYABLE_STATUS:
+            return ERROR_SERVER
+        return None
+    if isinstance(error, requests.exceptions.SSLError):
+        # Un certificado no válido no se arregla reintentando
+        return None
+    if isinstance(error, requests.Timeout):
+        return ERROR_TIMEOUT
+    if isinstance(error, (requests.exceptions.ChunkedEncodingError, requests.exceptions.ContentDecodingError)):
+        return ERROR_INCOMPLETE
+    if isinstance(error, requests.ConnectionError):
+        return ERROR_CONNECTION
+    return None
+
+def retry_after_seconds(response, now=None):
+    """Segundos que pide esperar la cabecera Retry-After (número o fecha HTTP), o None"""
+    value = response.headers.get('Retry-After') if response is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, date.timestamp() - (now if now is not None else time.time()))
+
+class RetryBudget:
+    """Reintentos de una descarga: cuántos quedan por tipo de error y cuánto esperar.
+    
+    La comparten todos los segmentos de la descarga, así que un servidor que
+    falla mucho agota el presupuesto aunque cada segmento falle poco. La
+    espera, en cambio, crece con los fallos seguidos de quien reintenta.
+    """
+    
+    def __init__(self, budgets=None, base_delay=RETRY_BASE_DELAY, max_delay=RETRY_MAX_DELAY, rng=None):
+        self.budgets = dict(DEFAULT_RETRY_BUDGETS)
+        self.budgets.update(budgets or {})
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.counts = {}
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+    
+    @property
+    def total(self):
+        with self._lock:
+            return sum(self.counts.values())
+    
+    def next_delay(self, error, attempt=None):
+        """Anota un reintento y devuelve (tipo, segundos de espera), o (tipo, None) si no se reintenta.
+        
+        attempt son los fallos seguidos de quien reintenta (por defecto, los
+        reintentos de ese tipo en toda la descarga).
+        """
+        error_class = classify_error(error)
+        if error_class is None:
+            return None, None
+        response = getattr(error, 'response', None)
+        retry_after = retry_after_seconds(response)
+        if retry_after is not None and retry_after > RETRY_AFTER_MAX:
+            return error_class, None
+        
+        with self._lock:
+            count = self.counts.get(error_class, 0)
+            if count >= self.budgets.get(error_class, 0):
+                return error_class, None
+            self.counts[error_class] = count + 1
+        if attempt is None:
+            attempt = count
+        
+        # Jitter completo: los segmentos y las descargas que fallan a la vez no vuelven a la vez
+        delay = self.rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return error_class, delay
+    
+    def summary(self):
+        """Texto como '3 reintentos (conexión: 2, servidor: 1)'"""
+        with self._lock:
+            counts = dict(self.counts)
+        total = sum(counts.values())
+        if not total:
+            return ""
+        detail = ', '.join(f"{ERROR_CLASS_LABELS[error_class]}: {count}"
+                           for error_class, count in counts.items() if count)
+        return f"{total} {'reintento' if total == 1 else 'reintentos'} ({detail})"
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+Perfil del arranque (--startup-profile)
+Mide cuánto tarda cada fase hasta que la ventana se muestra y cuánto tiempo
+propio se va en cada import, para vigilar el presupuesto de arranque
+"""
+
+import sys
+import time
+import builtins
+import threading
+import importlib.util
+
+# Presupuesto hasta que la ventana se muestra, en ms (lo comprueba benchmarks/startup.py)
+STARTUP_BUDGET_MS = 500
+
+# Imports que se listan en el desglose, de más a menos lento
+STARTUP_TOP_IMPORTS = 12
+
+# Paquete propio: sus módulos se listan uno a uno, los demás agrupados por paquete
+FIRST_PARTY_PACKAGE = 'archdownloader'
+
+class ImportTimer:
+    """Tiempo propio de cada import del hilo principal (sin los imports anidados).
+    
+    Sustituye builtins.__import__ mientras está instalado, así que solo se
+    usa con --startup-profile.
+    """
+    
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.times = {}  # módulo → segundos propios
+        self._stack = []
+        self._original = None
+    
+    def install(self):
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+    
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+    
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original or builtins.__import__
+        if threading.current_thread() is not threading.main_thread():
+            return original(name, globals, locals, fromlist, level)
+        if level:
+            package = (globals or {}).get('__package__') or ''
+            try:
+                module = importlib.util.resolve_name('.' * level + name, package)
+            except (ImportError, ValueError):
+                module = name
+        else:
+            module = name
+        if module in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        
+        start = self.clock()
+        self._stack.append(0.0)
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = self.clock() - start
+            nested = self._stack.pop()
+            self.times[module] = self.times.get(module, 0.0) + elapsed - nested
+            if self._stack:
+                self._stack[-1] += elapsed
+    
+    def grouped(self):
+        """{módulo o paquete: segundos}: los módulos propios por separado, el resto por paquete"""
+        groups = {}
+        for module, seconds in self.times.items():
+            top = module.partition('.')[0]
+            key = module if top == FIRST_PARTY_PACKAGE else top
+            groups[key] = groups.get(key, 0.0) + seconds
+        return groups
+
+class StartupProfile:
+    """Fases del arranque: cada mark() cierra la fase que empezó en el anterior"""
+    
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        self.phases = []  # (nombre, segundos)
+        self.imports = None
+        self._last = self.started
+    
+    def enable_imports(self):
+        """Empieza a medir los imports (solo con --startup-profile)"""
+        if self.imports is None:
+            self.imports = ImportTimer(self.clock)
+            self.imports.install()
+    
+    def mark(self, name):
+        now = self.clock()
+        self.phases.append((name, now - self._last))
+        self._last = now
+    
+    @property
+    def elapsed(self):
+        """Segundos desde el principio hasta el último mark()"""
+        return self._last - self.started
+    
+    def report(self, budget_ms=STARTUP_BUDGET_MS):
+        """Desglose legible de las fases y de los imports más lentos"""
+        lines = ["⏱️ Perfil de arranque", "  Fases:"]
+        for name, seconds in self.phases:
+            lines.append(f"    {name:<32} {seconds * 1000:8.1f} ms")
+        if self.imports is not None:
+            self.imports.uninstall()
+            groups = sorted(self.imports.grouped().items(), key=lambda item: item[1], reverse=True)
+            lines.append(f"  Imports más lentos (tiempo propio, total {sum(self.imports.times.values()) * 1000:.1f} ms):")
+            for module, seconds in groups[:STARTUP_TOP_IMPORTS]:
+                lines.append(f"    {module:<32} {seconds * 1000:8.1f} ms")
+        total_ms = self.elapsed * 1000
+        verdict = "dentro del" if total_ms <= budget_ms else "FUERA del"
+        lines.append(f"⏱️ Ventana visible en {total_ms:.0f} ms ({verdict} presupuesto de {budget_ms} ms)")
+        return "\n".join(lines)
+
+_profile = None
+_profile_lock = threading.Lock()
+
+def get_startup_profile():
+    """Devuelve el perfil del arranque del proceso (empieza a contar en la primera llamada)"""
+    global _profile
+    with _profile_lock:
+        if _profile is None:
+            _profile = StartupProfile()
+        return _profile
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Detección de yt-dlp con caché, grupo de procesos yt-dlp precalentados y
+lectura de su salida sin bloquear
+"""
+
+import sys
+import os
+import json
+import shutil
+import signal
+import selectors
+import subprocess
+import threading
+import importlib.util
+
+from .ytdlp_worker import READY_MARKER, JOB_END_MARKER
+
+# Tiempo máximo que se espera por una línea antes de volver a comprobar si se canceló
+YTDLP_POLL_INTERVAL = 0.2
+
+# Tiempo que se da a yt-dlp (y a sus ffmpeg) para terminar antes de matarlos
+YTDLP_STOP_TIMEOUT = 2.0
+
+READ_SIZE = 64 * 1024
+
+_probe_cache = {}
+_probe_lock = threading.Lock()
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+def probe_ytdlp(refresh=False):
+    """Comprueba si yt-dlp está disponible y cómo invocarlo.
+    
+    El resultado se guarda para toda la sesión con la ruta y la fecha de
+    modificación del binario/módulo como clave, así que solo se vuelve a
+    lanzar 'yt-dlp --version' si yt-dlp se instala o se actualiza.
+    Devuelve un dict con 'available', 'command', 'version' y 'warm' (si el
+    módulo se puede importar para usar procesos precalentados).
+    """
+    importlib.invalidate_caches()
+    binary = shutil.which('yt-dlp')
+    spec = importlib.util.find_spec('yt_dlp')
+    module_path = spec.origin if spec else None
+    key = (binary, _mtime(binary), module_path, _mtime(module_path))
+    
+    with _probe_lock:
+        if not refresh and key in _probe_cache:
+            return _probe_cache[key]
+    
+    result = {'available': False, 'command': None, 'version': '', 'warm': module_path is not None}
+    candidates = []
+    if binary:
+        candidates.append([binary])
+    if module_path:
+        candidates.append([sys.executable, '-m', 'yt_dlp'])
+    
+    for command in candidates:
+        try:
+            completed = subprocess.run(command + ['--version'], capture_output=True, text=True, timeout=15)
+        except (OSError, subprocess.SubprocessError):
+            continue
+        if completed.returncode == 0:
+            result.update(available=True, command=command, version=completed.stdout.strip())
+            break
+    
+    with _probe_lock:
+        _probe_cache.clear()
+        _probe_cache[key] = result
+    return result
+
+class YtdlpOutputReader:
+    """Lee la salida de un proceso yt-dlp sin quedarse bloqueado esperando una línea.
+    
+    read() espera como mucho timeout segundos a que haya datos y devuelve
+    las líneas completas recibidas (puede ser ninguna), así quien lee puede
+    comprobar entre medias si la descarga se canceló aunque yt-dlp esté
+    callado (uniendo formatos, extrayendo, con un fragmento atascado...).
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.fd = stream.fileno()
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.fd, selectors.EVENT_READ)
+        self.pending = []
+        self.eof = False
+    
+    def read(self, timeout=YTDLP_POLL_INTERVAL):
+        """Devuelve las líneas (sin salto de línea) que lleguen antes de timeout"""
+        if self.eof or not self.selector.select(timeout):
+            return []
+        chunk = os.read(self.fd, READ_SIZE)
+        if not chunk:
+            self.eof = True
+            rest, self.pending = b''.join(self.pending), []
+            return [rest.decode('utf-8', 'replace')] if rest else []
+        if b'\n' not in chunk:
+            # Línea larga (el JSON de una lista, por ejemplo): se junta al final, no en cada lectura
+            self.pending.append(chunk)
+            return []
+        *lines, rest = b''.join(self.pending + [chunk]).split(b'\n')
+        self.pending = [rest] if rest else []
+        return [line.decode('utf-8', 'replace').rstrip('\r') for line in lines]
+    
+    def close(self):
+        self.selector.close()
+
+def signal_process(process, signum=signal.SIGTERM):
+    """Envía una señal al proceso y a sus hijos (ffmpeg...) sin esperar a que terminen.
+    
+    Los procesos de yt-dlp se lanzan en su propia sesión, así que su pid
+    es también el de su grupo de procesos.
+    """
+    if process is None:
+        return
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signum)
+        elif signum == signal.SIGTERM:
+            process.terminate()
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+def stop_process(process, timeout=YTDLP_STOP_TIMEOUT):
+    """Termina un proceso de yt-dlp con sus hijos; si no acaba en timeout segundos, lo mata"""
+    signal_process(process, signal.SIGTERM)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        signal_process(process, getattr(signal, 'SIGKILL', signal.SIGTERM))
+        process.wait()
+
+class WarmYtdlpProcess:
+    """Un proceso de ytdlp_worker.py listo para recibir trabajos"""
+    
+    def __init__(self):
+        worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ytdlp_worker.py')
+        self.process = subprocess.Popen(
+            [sys.executable, '-u', worker_script],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            start_new_session=True
+        )
+        self.ready = False
+    
+    def is_alive(self):
+        return self.process.poll() is None
+    
+    def wait_ready(self):
+        """Espera a que el proceso termine de importar yt-dlp"""
+        while not self.ready:
+            line = self.process.stdout.readline()
+            if not line:
+                return False
+            if line.strip() == READY_MARKER:
+                self.ready = True
+        return True
+    
+    def submit(self, args):
+        """Envía un trabajo: los argumentos de yt-dlp sin el ejecutable"""
+        self.process.stdin.write(json.dumps({'args': args}) + '\n')
+        self.process.stdin.flush()
+    
+    def parse_job_end(self, line):
+        """Devuelve el código de salida si la línea marca el fin del trabajo, o None"""
+        if line.startswith(JOB_END_MARKER):
+            try:
+                return int(line[len(JOB_END_MARKER):].strip())
+            except ValueError:
+                return 1
+        return None
+    
+    def stop(self):
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+        stop_process(self.process)
+
+class YtdlpWorkerPool:
+    """Grupo de procesos yt-dlp precalentados que se reutilizan entre trabajos"""
+    
+    def __init__(self, size=2):
+        self.size = size
+        self.idle = []
+        self.busy = 0
+        self.lock = threading.Lock()
+    
+    def prewarm(self):
+        """Arranca procesos hasta tener 'size' entre libres y ocupados (se calientan en segundo plano)"""
+        with self.lock:
+            self.idle = [worker for worker in self.idle if worker.is_alive()]
+            while len(self.idle) + self.busy < self.size:
+                self.idle.insert(0, WarmYtdlpProcess())
+    
+    def acquire(self):
+        """Toma un proceso libre (o arranca uno) y espera a que esté listo"""
+        with self.lock:
+            worker = None
+            # El último devuelto es el más caliente (ya ejecutó algún trabajo)
+            while self.idle:
+                candidate = self.idle.pop()
+                if candidate.is_alive():
+                    worker = candidate
+                    break
+            self.busy += 1
+        if worker is None:
+            worker = WarmYtdlpProcess()
+        if not worker.wait_ready():
+            worker.stop()
+            with self.lock:
+                self.busy -= 1
+            return None
+        return worker
+    
+    def release(self, worker):
+        """Devuelve un proceso al grupo tras terminar su trabajo (o lo descarta si murió)"""
+        with self.lock:
+            self.busy -= 1
+            if worker.is_alive() and len(self.idle) + self.busy < self.size:
+                self.idle.append(worker)
+                return
+        worker.stop()
+    
+    def shutdown(self):
+        with self.lock:
+            workers, self.idle = self.idle, []
+        for worker in workers:
+            worker.stop()
+
+# Cada proceso precalentado ocupa memoria: el grupo se mantiene pequeño
+MAX_WARM_WORKERS = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_ytdlp_pool(size=None):
+    """Devuelve el grupo compartido de procesos yt-dlp, ajustando su tamaño si se indica"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = YtdlpWorkerPool()
+        if size is not None:
+            _pool.size = max(1, min(size, MAX_WARM_WORKERS))
+        return _pool
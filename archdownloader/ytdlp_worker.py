@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+Proceso yt-dlp precalentado
+
+Importa yt_dlp y sus extractores una sola vez y luego ejecuta trabajos que
+recibe por stdin (una línea JSON con los argumentos de la línea de comandos).
+La salida de yt-dlp sale por stdout y cada trabajo termina con una línea
+JOB_END_MARKER seguida del código de salida.
+"""
+
+import sys
+import json
+
+READY_MARKER = '@@ARCHDL-READY@@'
+JOB_END_MARKER = '@@ARCHDL-JOB-END@@'
+
+def run_job(args):
+    """Ejecuta yt-dlp como lo haría la línea de comandos y devuelve su código de salida"""
+    import yt_dlp
+    try:
+        yt_dlp.main(args)
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        return e.code if isinstance(e.code, int) else 1
+    except Exception as e:
+        print(f"ERROR: {e}", flush=True)
+        return 1
+    return 0
+
+def main():
+    sys.stdout.reconfigure(line_buffering=True)
+    sys.stderr.reconfigure(line_buffering=True)
+    
+    # Precalentar: importar yt-dlp, cargar los extractores y compilar sus patrones de URL
+    import yt_dlp
+    import yt_dlp.extractor
+    for extractor in yt_dlp.extractor.gen_extractor_classes():
+        extractor.suitable('https://example.com/')
+    yt_dlp.YoutubeDL({'quiet': True}).close()
+    print(READY_MARKER, flush=True)
+    
+    for line in sys.stdin:
+        try:
+            job = json.loads(line)
+        except ValueError:
+            continue
+        code = run_job(job.get('args', []))
+        sys.stdout.flush()
+        sys.stderr.flush()
+        print(f"{JOB_END_MARKER} {code}", flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Límite de velocidad global con varias descargas
+
+Arranca el servidor sintético (benchmarks/server.py) sin límite propio y
+lanza varias descargas directas a la vez con un límite global, en dos
+escenarios:
+
+  iguales    archivos del mismo tamaño: deben terminar casi a la vez
+  distintos  tamaños 1x, 2x, 3x...: al terminar las pequeñas, su parte del
+             límite pasa a las que quedan y el total se mantiene
+
+En cada uno compara la velocidad total (bytes / tiempo hasta la última
+descarga) con el límite y termina con código 1 si se separa más de la
+tolerancia.
+
+Uso: python benchmarks/bandwidth.py --jobs 4 --limit 4M --size 4M --tolerance 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from archdownloader.bandwidth import get_bandwidth_limiter, parse_rate
+
+def run_scenario(name, port, sizes, limit, destination):
+    """Descarga a la vez un archivo de cada tamaño; devuelve el resultado del escenario"""
+    from archdownloader.core import DownloadEngine, FILE_CATEGORIES
+    from archdownloader.dedup import DEDUP_OFF
+    
+    limiter = get_bandwidth_limiter()
+    limiter.expected_jobs = len(sizes)
+    limiter.set_limits(global_rate=limit, per_host_rate=0, per_job_rate=0)
+    engines = [DownloadEngine(f'http://127.0.0.1:{port}/{name}-{index}.bin', os.path.join(destination, name),
+                              FILE_CATEGORIES, use_history=False, dedup_policy=DEDUP_OFF, metrics_path=None)
+               for index in range(len(sizes))]
+    started = time.monotonic()
+    
+    def run(engine):
+        success, _, _ = engine.execute()
+        return success, time.monotonic() - started
+    
+    with ThreadPoolExecutor(max_workers=len(engines)) as executor:
+        results = list(executor.map(run, engines))
+    elapsed = max(finished for _, finished in results)
+    rate = sum(sizes) / elapsed
+    finish_times = [round(finished, 2) for _, finished in results]
+    return {
+        'scenario': name,
+        'jobs': len(sizes),
+        'completed': sum(1 for success, _ in results if success),
+        'limit_bps': limit,
+        'rate_bps': round(rate),
+        'deviation': round((rate - limit) / limit, 4),
+        'finish_s': finish_times,
+        # Diferencia entre la primera y la última en terminar, relativa a la última
+        'spread': round((max(finish_times) - min(finish_times)) / max(finish_times), 4)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Velocidad total de varias descargas con un límite global")
+    parser.add_argument('--jobs', type=int, default=4, help="Descargas simultáneas (por defecto 4)")
+    parser.add_argument('--limit', default='4M', help="Límite global (por defecto 4M)")
+    parser.add_argument('--size', default='4M', help="Tamaño base de cada archivo (por defecto 4M)")
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="Desviación máxima de la velocidad total respecto al límite (por defecto 0.05)")
+    args = parser.parse_args()
+    
+    limit = parse_rate(args.limit)
+    size = parse_rate(args.size)
+    scenarios = {
+        'iguales': [size] * args.jobs,
+        'distintos': [size * (index + 1) // 2 for index in range(args.jobs)]
+    }
+    arguments = []
+    for name, sizes in scenarios.items():
+        for index, file_size in enumerate(sizes):
+            arguments += ['--file', f'{name}-{index}.bin:{file_size}']
+    
+    data_dir = tempfile.mkdtemp(prefix='archdl-limite-')
+    os.environ['XDG_DATA_HOME'] = os.path.join(data_dir, '.datos')
+    server = subprocess.Popen([sys.executable, os.path.join(BENCHMARKS_DIR, 'server.py')] + arguments,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    results = []
+    try:
+        port = int(server.stdout.readline().split()[1])
+        for name, sizes in scenarios.items():
+            result = run_scenario(name, port, sizes, limit, data_dir)
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        server.kill()
+        server.wait()
+        get_bandwidth_limiter().set_limits(global_rate=0)
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    failed = False
+    for result in results:
+        print(f"{result['scenario']}: {result['rate_bps'] / 1024 / 1024:.2f} MiB/s con un límite de "
+              f"{limit / 1024 / 1024:.2f} MiB/s ({result['deviation']:+.1%})")
+        if result['completed'] != result['jobs'] or abs(result['deviation']) > args.tolerance:
+            print(f"❌ {result['scenario']}: la velocidad total se separa del límite más de un {args.tolerance:.0%}")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Convergencia del ajuste automático de concurrencia
+
+Con --modo simulado (por defecto) el controlador se alimenta con el goodput
+de un modelo de servidor (ancho de banda por conexión y total, latencia y
+límite de conexiones con 429) sobre un reloj simulado, así que cada perfil
+tarda milisegundos. Con --modo real se arranca benchmarks/server.py con el
+mismo perfil y se descarga un archivo con el motor y adaptive=True.
+
+En ambos casos se compara el número de conexiones elegido (la mediana de
+la segunda mitad) con el óptimo del perfil: el mínimo que consigue el 90 %
+del goodput máximo sin errores.
+
+Uso: python benchmarks/concurrency.py
+     python benchmarks/concurrency.py --modo real --perfil enlace_32M_conexion_8M
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from archdownloader.concurrency import ConcurrencyController, get_concurrency_tuner
+
+MB = 1024 * 1024
+
+# Ventana de TCP con la que la latencia limita lo que da cada conexión
+TCP_WINDOW = 1 * MB
+
+# Ancho de banda por conexión y total (0 = sin límite), latencia de ida y vuelta y
+# conexiones simultáneas que acepta el servidor antes de contestar 429 (0 = sin límite).
+# En latencia_alta el límite por conexión es el que impone la ventana de TCP, para que el
+# servidor local (donde la latencia solo retrasa las cabeceras) se comporte igual
+PROFILES = {
+    'enlace_32M_conexion_8M': {'bandwidth': 8 * MB, 'total': 32 * MB, 'latency': 0.02, 'max_connections': 0},
+    'enlace_96M_conexion_12M': {'bandwidth': 12 * MB, 'total': 96 * MB, 'latency': 0.02, 'max_connections': 0},
+    'latencia_alta': {'bandwidth': 4 * MB, 'total': 24 * MB, 'latency': 0.25, 'max_connections': 0},
+    'limite_3_conexiones': {'bandwidth': 6 * MB, 'total': 0, 'latency': 0.02, 'max_connections': 3},
+    'una_conexion_basta': {'bandwidth': 40 * MB, 'total': 40 * MB, 'latency': 0.01, 'max_connections': 0}
+}
+
+MAXIMUM = 16
+
+# En modo real el archivo dura unos segundos al goodput óptimo, para que dé tiempo a converger
+REAL_SECONDS = 15
+
+def per_connection(profile):
+    """Lo que da una conexión: su límite o, si la latencia pesa más, la ventana de TCP por RTT"""
+    window_limit = TCP_WINDOW / profile['latency'] if profile['latency'] else float('inf')
+    return min(profile['bandwidth'] or float('inf'), window_limit)
+
+def model_goodput(profile, connections):
+    accepted = connections
+    if profile['max_connections']:
+        accepted = min(connections, profile['max_connections'])
+    rate = accepted * per_connection(profile)
+    return min(rate, profile['total']) if profile['total'] else rate
+
+def optimum(profile):
+    best = max(model_goodput(profile, n) for n in range(1, MAXIMUM + 1))
+    for n in range(1, MAXIMUM + 1):
+        if model_goodput(profile, n) >= 0.9 * best:
+            return n
+    return MAXIMUM
+
+def summarize(name, profile, limits, goodput, decisions, duration):
+    """limits: [(instante, límite)] desde el principio; devuelve el resultado del perfil"""
+    second_half = [limit for instant, limit in limits if instant >= duration / 2]
+    chosen = statistics.median(second_half)
+    target = optimum(profile)
+    best = model_goodput(profile, target)
+    reached = next((instant for instant, limit in limits if abs(limit - target) <= 1), None)
+    return {
+        'perfil': name,
+        'optimo': target,
+        'elegido': chosen,
+        'min_max_segunda_mitad': [min(second_half), max(second_half)],
+        'goodput_mb_s': round(goodput / MB, 1),
+        'goodput_optimo_mb_s': round(best / MB, 1),
+        'segundos_hasta_optimo': round(reached, 1) if reached is not None else None,
+        'decisiones': decisions,
+        'converge': abs(chosen - target) <= 1
+    }
+
+def simulate(name, profile, duration, window, seed):
+    """Alimenta el controlador con el modelo del perfil sobre un reloj simulado"""
+    clock = [0.0]
+    rng = random.Random(seed)
+    controller = ConcurrencyController(name, MAXIMUM, initial=2, window=window, clock=lambda: clock[0])
+    step = 0.05
+    limits = []
+    received = 0
+    last_error = -1.0
+    while clock[0] < duration:
+        # La cola siempre tiene trabajo: todas las plazas están ocupadas
+        controller.active = controller.limit
+        limits.append((clock[0], controller.limit))
+        rate = model_goodput(profile, controller.limit) * rng.gauss(1.0, 0.05)
+        received += rate * step
+        controller.add_bytes(int(rate * step))
+        if profile['max_connections'] and controller.limit > profile['max_connections'] \
+                and clock[0] - last_error >= 0.5:
+            controller.add_error("429")
+            last_error = clock[0]
+        clock[0] += step
+    return summarize(name, profile, limits, received / duration, len(controller.decisions), duration)
+
+def run_real(name, profile, size, window):
+    """Descarga un archivo del servidor sintético con el perfil y adaptive=True"""
+    from archdownloader.core import FILE_CATEGORIES, DownloadEngine
+    from archdownloader.dedup import DEDUP_OFF
+    
+    arguments = ['--file', f'datos.bin:{size // MB}M', '--latency', str(profile['latency'])]
+    if profile['bandwidth']:
+        arguments += ['--bandwidth', str(int(profile['bandwidth']))]
+    if profile['total']:
+        arguments += ['--total-bandwidth', str(int(profile['total']))]
+    if profile['max_connections']:
+        arguments += ['--max-connections', str(profile['max_connections'])]
+    server = subprocess.Popen([sys.executable, os.path.join(BENCHMARKS_DIR, 'server.py')] + arguments,
+                              stdout=subprocess.PIPE, text=True)
+    tuner = get_concurrency_tuner()
+    tuner.window = window
+    tuner.hosts.clear()
+    try:
+        port = int(server.stdout.readline().split()[1])
+        with tempfile.TemporaryDirectory(prefix='archdl-concurrency-') as destination:
+            logs = []
+            engine = DownloadEngine(f'http://127.0.0.1:{port}/datos.bin', destination, FILE_CATEGORIES,
+                                    segments=MAXIMUM, pool_size=MAXIMUM, adaptive=True,
+                                    dedup_policy=DEDUP_OFF, use_history=False, metrics_path=None,
+                                    retries={'servidor': 1000, 'conexion': 50, 'incompleta': 50},
+                                    listener=lambda event, value: logs.append(value) if event == 'log' else None)
+            started = time.monotonic()
+            success, message, _ = engine.execute()
+            duration = time.monotonic() - started
+    finally:
+        server.kill()
+        server.wait()
+    if not success:
+        raise RuntimeError(f"{name}: {message}")
+    
+    controller = tuner.hosts['127.0.0.1']
+    # Reconstruir el límite en cada instante a partir de las decisiones
+    limits = [(0.0, controller.decisions[0][1] if controller.decisions else controller.limit)]
+    offset = time.time() - time.monotonic()
+    for instant, _, limit, _ in controller.decisions:
+        limits.append((instant - offset - started, limit))
+    samples = []
+    for index in range(int(duration * 10)):
+        instant = index / 10
+        samples.append((instant, [limit for start, limit in limits if start <= instant][-1]))
+    for line in logs:
+        if line.startswith('🎛️'):
+            print(f"  {line}")
+    return summarize(name, profile, samples, size / duration, len(controller.decisions), duration)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convergencia del ajuste automático de concurrencia")
+    parser.add_argument('--modo', choices=['simulado', 'real'], default='simulado')
+    parser.add_argument('--perfil', action='append', choices=sorted(PROFILES),
+                        help="Perfil a ejecutar (se puede repetir; por defecto todos)")
+    parser.add_argument('--duracion', type=float, default=120.0,
+                        help="Segundos simulados por perfil (por defecto 120)")
+    parser.add_argument('--ventana', type=float, default=None,
+                        help="Ventana de medida en segundos (por defecto la del programa; 0.5 en modo real)")
+    parser.add_argument('--tamano', type=int, default=0,
+                        help=f"MB del archivo en modo real (por defecto lo que da el óptimo en {REAL_SECONDS} s)")
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+    
+    results = []
+    for name in args.perfil or list(PROFILES):
+        profile = PROFILES[name]
+        if args.modo == 'simulado':
+            window = args.ventana or get_concurrency_tuner().window
+            result = simulate(name, profile, args.duracion, window, args.semilla)
+        else:
+            size = args.tamano * MB or int(model_goodput(profile, optimum(profile)) * REAL_SECONDS) // MB * MB
+            result = run_real(name, profile, size, args.ventana or 0.5)
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False))
+    
+    converged = sum(1 for result in results if result['converge'])
+    print(f"{converged}/{len(results)} perfiles convergen a ±1 conexión del óptimo")
+    return 0 if converged == len(results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché de la información de yt-dlp
+
+Pide varias veces el mismo video al servidor sintético (benchmarks/server.py)
+con yt-dlp, cambiando de calidad en cada descarga como quien reintenta o
+prueba otro formato, en dos modos:
+
+  sin_cache  cada descarga repite la extracción
+  con_cache  la primera extrae y guarda el info JSON; las demás lo cargan
+             con --load-info-json
+
+Necesita yt-dlp instalado (no usa el yt-dlp falso, que no extrae nada).
+
+Uso: python benchmarks/infocache.py --runs 4 --size 2M
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+# Calidades que se van alternando entre descargas
+QUALITIES = ['best', '720p', '480p', '360p']
+
+def run_mode(mode, url, runs, destination):
+    """Descarga el video runs veces; devuelve el resultado del modo"""
+    from archdownloader.core import DownloadEngine, FILE_CATEGORIES
+    from archdownloader.dedup import DEDUP_OFF
+    
+    times = []
+    cached = 0
+    completed = 0
+    for index in range(runs):
+        logs = []
+        engine = DownloadEngine(url, os.path.join(destination, str(index)), FILE_CATEGORIES,
+                                video_quality=QUALITIES[index % len(QUALITIES)], is_video_platform=True,
+                                use_warm_pool=False, use_history=False, dedup_policy=DEDUP_OFF,
+                                use_info_cache=(mode == 'con_cache'),
+                                listener=lambda event, value: logs.append(value) if event == 'log' else None)
+        started = time.monotonic()
+        success, _, _ = engine.execute()
+        times.append(round(time.monotonic() - started, 2))
+        completed += 1 if success else 0
+        cached += sum(1 for line in logs if 'en caché' in line and 'no se repite' in line)
+    return {
+        'mode': mode,
+        'runs': runs,
+        'completed': completed,
+        'from_cache': cached,
+        'times_s': times,
+        'total_s': round(sum(times), 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de descargas repetidas del mismo video con y sin caché")
+    parser.add_argument('--runs', type=int, default=4, help="Descargas del mismo video (por defecto 4)")
+    parser.add_argument('--size', default='2M', help="Tamaño del video servido (por defecto 2M)")
+    args = parser.parse_args()
+    
+    data_dir = tempfile.mkdtemp(prefix='archdl-infocache-')
+    os.environ['XDG_DATA_HOME'] = os.path.join(data_dir, '.datos')
+    server = subprocess.Popen([sys.executable, os.path.join(BENCHMARKS_DIR, 'server.py'), '--file', f'video.mp4:{args.size}'],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        port = int(server.stdout.readline().split()[1])
+        url = f'http://127.0.0.1:{port}/video.mp4'
+        results = []
+        for mode in ('sin_cache', 'con_cache'):
+            result = run_mode(mode, url, args.runs, os.path.join(data_dir, mode))
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        server.kill()
+        server.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    plain, cached = results
+    # La primera descarga con caché también extrae: se comparan las repetidas
+    repeated_plain = sum(plain['times_s'][1:]) / max(1, args.runs - 1)
+    repeated_cached = sum(cached['times_s'][1:]) / max(1, args.runs - 1)
+    print(f"sin caché: {plain['total_s']} s · con caché: {cached['total_s']} s; "
+          f"cada repetición {repeated_plain:.2f} s → {repeated_cached:.2f} s")
+    return 0 if all(result['completed'] == result['runs'] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
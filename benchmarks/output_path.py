@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ruta del archivo descargado con la carpeta llena
+
+Llena la carpeta Videos del destino con miles de archivos recientes y
+descarga con el yt-dlp falso. Para cada tamaño de carpeta mide la descarga
+completa (la ruta llega en la línea --print after_move de yt-dlp) y, como
+referencia, la búsqueda que se hacía antes: recorrer la carpeta por
+extensión y quedarse con el archivo modificado más reciente. Comprueba
+también que la ruta devuelta es la del video descargado.
+
+Uso: python benchmarks/output_path.py --files 0 1000 10000 --runs 3
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+# Extensiones que recorría la búsqueda anterior
+SCANNED_EXTENSIONS = ['.mp4', '.webm', '.mkv', '.mp3', '.m4a']
+
+def fill_folder(folder, count):
+    """Crea count archivos vacíos con las extensiones de video y audio"""
+    os.makedirs(folder, exist_ok=True)
+    for index in range(count):
+        extension = SCANNED_EXTENSIONS[index % len(SCANNED_EXTENSIONS)]
+        open(os.path.join(folder, f'existente-{index:06d}{extension}'), 'wb').close()
+
+def scan_folder(folder):
+    """Búsqueda anterior: el archivo más reciente de los últimos 60 segundos"""
+    recent_files = []
+    for extension in SCANNED_EXTENSIONS:
+        for path in glob.glob(os.path.join(folder, f'*{extension}')):
+            if os.path.getmtime(path) > time.time() - 60:
+                recent_files.append(path)
+    return max(recent_files, key=os.path.getmtime) if recent_files else None
+
+def measure(count, runs, data_dir):
+    """Descarga runs veces con count archivos en la carpeta; devuelve el resultado"""
+    from archdownloader.core import DownloadEngine, FILE_CATEGORIES
+    from archdownloader.dedup import DEDUP_OFF
+    
+    destination = os.path.join(data_dir, f'destino-{count}')
+    folder = os.path.join(destination, FILE_CATEGORIES['videos']['folder'])
+    fill_folder(folder, count)
+    
+    download_times = []
+    scan_times = []
+    correct = 0
+    for run in range(runs):
+        video_id = f'ruta{count:05d}{run:02d}'[-11:]
+        engine = DownloadEngine(f'https://www.youtube.com/watch?v={video_id}', destination, FILE_CATEGORIES,
+                                is_video_platform=True, use_warm_pool=False, use_history=False,
+                                use_info_cache=False, dedup_policy=DEDUP_OFF)
+        started = time.monotonic()
+        success, _, filepath = engine.execute()
+        download_times.append(time.monotonic() - started)
+        correct += 1 if success and filepath and video_id in os.path.basename(filepath) else 0
+        
+        started = time.monotonic()
+        scan_folder(folder)
+        scan_times.append(time.monotonic() - started)
+    return {
+        'files': count,
+        'runs': runs,
+        'correct_path': correct,
+        'download_ms': round(statistics.median(download_times) * 1000, 1),
+        'old_scan_ms': round(statistics.median(scan_times) * 1000, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo de localizar el archivo descargado según los archivos de la carpeta")
+    parser.add_argument('--files', type=int, nargs='+', default=[0, 1000, 10000],
+                        help="Archivos previos en la carpeta (por defecto 0 1000 10000)")
+    parser.add_argument('--runs', type=int, default=3, help="Descargas por tamaño de carpeta (por defecto 3)")
+    parser.add_argument('--speed', type=float, default=50.0, help="Factor de velocidad del yt-dlp falso (por defecto 50)")
+    args = parser.parse_args()
+    
+    data_dir = tempfile.mkdtemp(prefix='archdl-ruta-')
+    os.environ['XDG_DATA_HOME'] = os.path.join(data_dir, '.datos')
+    os.environ['PATH'] = os.pathsep.join([os.path.join(BENCHMARKS_DIR, 'fake-ytdlp'), os.environ.get('PATH', '')])
+    os.environ['ARCHDL_FAKE_YTDLP_SPEED'] = str(args.speed)
+    try:
+        results = []
+        for count in args.files:
+            result = measure(count, args.runs, data_dir)
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    smallest, largest = results[0], results[-1]
+    print(f"con {smallest['files']} archivos: {smallest['download_ms']} ms · con {largest['files']}: "
+          f"{largest['download_ms']} ms (la búsqueda anterior pasa de {smallest['old_scan_ms']} ms "
+          f"a {largest['old_scan_ms']} ms)")
+    return 0 if all(result['correct_path'] == result['runs'] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Descarga y post-procesado por etapas
+
+Descarga varios videos en modo solo audio con el yt-dlp falso y convierte
+cada uno con un ffmpeg falso (benchmarks/fake-ffmpeg), con el mismo número
+de plazas de descarga en dos modos:
+
+  en_linea    cada trabajo ocupa su plaza hasta que termina la conversión
+              (como cuando yt-dlp ejecutaba ffmpeg con -x)
+  por_etapas  la descarga entrega el archivo al grupo de post-procesado y la
+              plaza pasa al siguiente trabajo
+
+Uso: python benchmarks/postprocess.py --videos 6 --slots 2 --ffmpeg-seconds 1.5
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+def run_mode(mode, urls, slots, destination):
+    """Descarga y convierte todas las URLs; devuelve el resultado del modo"""
+    from archdownloader.core import DownloadEngine, FILE_CATEGORIES
+    from archdownloader.dedup import DEDUP_OFF
+    
+    engines = [DownloadEngine(url, destination, FILE_CATEGORIES, audio_only=True, use_warm_pool=False,
+                              use_history=False, dedup_policy=DEDUP_OFF) for url in urls]
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=slots) as executor:
+        if mode == 'en_linea':
+            results = list(executor.map(lambda engine: engine.execute(), engines))
+            network_s = None
+        else:
+            list(executor.map(lambda engine: engine.execute(wait_postprocess=False), engines))
+            network_s = time.monotonic() - start
+            results = [engine.wait_postprocess() if engine.postprocess_future else (False, "", "")
+                       for engine in engines]
+    elapsed = time.monotonic() - start
+    converted = sum(1 for success, _, filepath in results if success and filepath.endswith('.mp3'))
+    return {
+        'mode': mode,
+        'videos': len(urls),
+        'converted': converted,
+        'total_s': round(elapsed, 2),
+        'network_s': round(network_s, 2) if network_s is not None else None
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo total con la conversión dentro o fuera de la plaza de descarga")
+    parser.add_argument('--videos', type=int, default=6, help="Videos a descargar (por defecto 6)")
+    parser.add_argument('--slots', type=int, default=2, help="Descargas simultáneas (por defecto 2)")
+    parser.add_argument('--ffmpeg-seconds', type=float, default=1.5, help="Segundos de cada conversión (por defecto 1.5)")
+    parser.add_argument('--speed', type=float, default=1.0, help="Factor de velocidad del yt-dlp falso")
+    args = parser.parse_args()
+    
+    data_dir = tempfile.mkdtemp(prefix='archdl-postproceso-')
+    os.environ['XDG_DATA_HOME'] = os.path.join(data_dir, '.datos')
+    os.environ['PATH'] = os.pathsep.join([os.path.join(BENCHMARKS_DIR, 'fake-ytdlp'),
+                                          os.path.join(BENCHMARKS_DIR, 'fake-ffmpeg'), os.environ.get('PATH', '')])
+    os.environ['ARCHDL_FAKE_FFMPEG_SECONDS'] = str(args.ffmpeg_seconds)
+    os.environ['ARCHDL_FAKE_YTDLP_SPEED'] = str(args.speed)
+    
+    from archdownloader.postprocess import get_postprocess_pool
+    try:
+        results = []
+        for mode in ('en_linea', 'por_etapas'):
+            urls = [f'https://www.youtube.com/watch?v={mode}{index:03d}' for index in range(args.videos)]
+            result = run_mode(mode, urls, args.slots, os.path.join(data_dir, mode))
+            result['cpu_slots'] = get_postprocess_pool().size
+            results.append(result)
+            print(json.dumps(result))
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    inline, staged = (result['total_s'] for result in results)
+    print(f"en línea: {inline} s · por etapas: {staged} s ({(staged - inline) / inline:+.0%}); "
+          f"las descargas terminaron en {results[1]['network_s']} s")
+    return 0 if all(result['converted'] == result['videos'] for result in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
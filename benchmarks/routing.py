@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de la clasificación de descargas en carpetas
+
+Compara el coste por archivo de la búsqueda anterior (recorrer la lista de
+extensiones de cada categoría) con el índice extensión → categoría, y mide
+la detección del tipo por los primeros bytes. También comprueba que cada
+firma de ejemplo acaba en la carpeta esperada.
+
+Uso: python benchmarks/routing.py --files 100000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archdownloader.core import FILE_CATEGORIES
+from archdownloader.categories import CategoryIndex, sniff_extension
+
+# Primeros bytes de ejemplo de cada tipo y carpeta en la que deben acabar
+SAMPLES = [
+    (b'%PDF-1.7\n', 'Documentos'),
+    (b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR', 'Imágenes'),
+    (b'\xff\xd8\xff\xe0\x00\x10JFIF', 'Imágenes'),
+    (b'RIFF\x00\x00\x00\x00WEBPVP8 ', 'Imágenes'),
+    (b'\x00\x00\x00\x18ftypmp42\x00\x00\x00\x00', 'Videos'),
+    (b'\x00\x00\x00\x20ftypM4A \x00\x00\x00\x00', 'Música'),
+    (b'\x1aE\xdf\xa3\x9fB\x86\x81\x01B\xf7\x81\x01B\xf2\x81\x04B\xf3\x81\x08B\x82\x84webm', 'Videos'),
+    (b'OggS\x00\x02' + b'\x00' * 22 + b'OpusHead', 'Música'),
+    (b'ID3\x04\x00\x00\x00\x00\x00\x00', 'Música'),
+    (b'PK\x03\x04\x14\x00\x00\x00\x08\x00', 'Archivos'),
+    (b'\x1f\x8b\x08\x00\x00\x00\x00\x00', 'Archivos'),
+    (b'<html><body>', 'Otros')
+]
+
+def legacy_folder(filename, file_categories):
+    """Búsqueda anterior: lista de extensiones de cada categoría"""
+    file_ext = Path(filename).suffix.lower()
+    for category, info in file_categories.items():
+        if file_ext in info['extensions']:
+            return info['folder']
+    return file_categories['otros']['folder']
+
+def measure(name, function, items):
+    start = time.perf_counter()
+    for item in items:
+        function(item)
+    elapsed = time.perf_counter() - start
+    return {'path': name, 'items': len(items), 'total_s': round(elapsed, 3),
+            'us_per_item': round(elapsed / len(items) * 1e6, 3)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste de clasificar descargas en carpetas")
+    parser.add_argument('--files', type=int, default=100000, help="Nombres de archivo a clasificar (por defecto 100000)")
+    args = parser.parse_args()
+    
+    rng = random.Random(1)
+    extensions = [extension for info in FILE_CATEGORIES.values() for extension in info['extensions']]
+    extensions += ['.iso', '.deb', '.json', '']
+    filenames = [f"archivo_{index}{rng.choice(extensions)}" for index in range(args.files)]
+    index = CategoryIndex(FILE_CATEGORIES)
+    
+    results = [measure('anterior', lambda filename: legacy_folder(filename, FILE_CATEGORIES), filenames),
+               measure('indice', index.folder, filenames)]
+    heads = [head for head, _ in SAMPLES] * max(1, args.files // len(SAMPLES))
+    results.append(measure('deteccion_contenido', sniff_extension, heads))
+    for result in results:
+        print(json.dumps(result))
+    
+    errors = 0
+    for head, expected in SAMPLES:
+        sniffed = sniff_extension(head)
+        folder = index.folder('descarga', sniffed=sniffed)
+        if folder != expected:
+            errors += 1
+            print(f"❌ {head[:12]!r}: {sniffed} → {folder}, se esperaba {expected}")
+    
+    legacy, indexed = results[0]['us_per_item'], results[1]['us_per_item']
+    print(f"anterior: {legacy} µs por archivo · índice: {indexed} µs por archivo "
+          f"({(indexed - legacy) / legacy:+.0%}) · {len(SAMPLES) - errors}/{len(SAMPLES)} tipos detectados bien")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
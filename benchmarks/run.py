@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Banco de pruebas de rendimiento del Descargador Universal (sin red)
+
+Cada escenario arranca el servidor sintético (benchmarks/server.py) con su
+ancho de banda, latencia, rangos y fallos, o el yt-dlp falso que reproduce
+una salida grabada (benchmarks/fake-ytdlp), y ejecuta una descarga con
+UniversalDownloadWorker sin ventana en un proceso aparte. Se mide el
+rendimiento, el CPU, el pico de memoria, las señales por segundo y el
+tiempo hasta el primer byte, y el resultado se guarda en JSON para comparar
+entre commits.
+
+Uso:
+  python benchmarks/run.py --output base.json
+  python benchmarks/run.py --output nuevo.json --compare base.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import resource
+import statistics
+import subprocess
+import tempfile
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, PROJECT_DIR)
+
+# Argumentos del servidor sintético y opciones del motor de cada escenario
+SCENARIOS = {
+    'directa_1_conexion': {
+        'server': ['--file', 'datos.bin:256M'],
+        'segments': 1
+    },
+    'directa_segmentada': {
+        'server': ['--file', 'datos.bin:256M', '--bandwidth', '32M', '--latency', '0.02'],
+        'segments': 4
+    },
+    'directa_sin_rangos': {
+        'server': ['--file', 'datos.bin:64M', '--bandwidth', '32M', '--no-ranges'],
+        'segments': 4
+    },
+    'directa_con_fallos': {
+        'server': ['--file', 'datos.bin:64M', '--bandwidth', '32M', '--failure-rate', '0.3'],
+        'segments': 4
+    },
+    'archivo_pequeno_latencia': {
+        'server': ['--file', 'datos.bin:256K', '--latency', '0.1'],
+        'segments': 4
+    },
+    'ytdlp_grabado': {
+        'ytdlp': True,
+        'segments': 4
+    }
+}
+
+# Métricas que se comparan y si es mejor que suban o que bajen
+METRICS = {
+    'throughput_mb_s': 'mayor',
+    'cpu_s': 'menor',
+    'peak_rss_mb': 'menor',
+    'signals_per_s': 'menor',
+    'ttfb_s': 'menor'
+}
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=PROJECT_DIR,
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def start_server(arguments):
+    """Arranca benchmarks/server.py en otro proceso y devuelve (proceso, puerto)"""
+    process = subprocess.Popen([sys.executable, os.path.join(BENCHMARKS_DIR, 'server.py')] + arguments,
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('PORT '):
+        process.kill()
+        raise RuntimeError("El servidor de pruebas no arrancó")
+    return process, int(line.split()[1])
+
+def cpu_seconds():
+    usage = [resource.getrusage(who) for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)]
+    return sum(item.ru_utime + item.ru_stime for item in usage)
+
+def measure_download(name, url, destination):
+    """Ejecuta una descarga con UniversalDownloadWorker sin ventana y devuelve sus métricas"""
+    from PyQt6.QtCore import QCoreApplication
+    from archdownloader.core import FILE_CATEGORIES
+    from archdownloader.dedup import DEDUP_OFF
+    from archdownloader.gui import UniversalDownloadWorker
+    
+    scenario = SCENARIOS[name]
+    app = QCoreApplication.instance() or QCoreApplication([])
+    worker = UniversalDownloadWorker(url, destination, FILE_CATEGORIES,
+                                     is_video_platform=scenario.get('ytdlp', False),
+                                     segments=scenario['segments'],
+                                     dedup_policy=DEDUP_OFF,
+                                     use_history=False,
+                                     use_warm_pool=False)
+    
+    signals = {'progress': 0, 'status': 0, 'log': 0, 'transfer': 0}
+    state = {'first_byte': None, 'downloaded': 0, 'result': None}
+    
+    def on_transfer(snapshot):
+        signals['transfer'] += 1
+        state['downloaded'] = snapshot['downloaded']
+        if snapshot['downloaded'] > 0 and state['first_byte'] is None:
+            state['first_byte'] = time.monotonic()
+    
+    def on_finished(success, message, filepath):
+        state['result'] = (success, message, filepath)
+        app.quit()
+    
+    def count(signal):
+        def slot(_value):
+            signals[signal] += 1
+        return slot
+    
+    worker.progress_updated.connect(count('progress'))
+    worker.status_updated.connect(count('status'))
+    worker.log_updated.connect(count('log'))
+    worker.transfer_updated.connect(on_transfer)
+    worker.download_finished.connect(on_finished)
+    
+    cpu_start = cpu_seconds()
+    start = time.monotonic()
+    worker.start()
+    app.exec()
+    worker.wait()
+    wall = time.monotonic() - start
+    cpu = cpu_seconds() - cpu_start
+    
+    success, message, filepath = state['result']
+    size = os.path.getsize(filepath) if success and filepath and not scenario.get('ytdlp') else state['downloaded']
+    total_signals = sum(signals.values())
+    return {
+        'scenario': name,
+        'success': success,
+        'message': message.split('\n')[0],
+        'bytes': size,
+        'wall_s': round(wall, 3),
+        'throughput_mb_s': round(size / 1024 ** 2 / wall, 2),
+        'cpu_s': round(cpu, 3),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        'signals': signals,
+        'signals_per_s': round(total_signals / wall, 1),
+        'ttfb_s': round(state['first_byte'] - start, 4) if state['first_byte'] else None
+    }
+
+def run_scenario(name):
+    """Prepara el servidor o el yt-dlp falso y mide el escenario en un proceso nuevo.
+    
+    Un proceso por escenario hace que el pico de memoria y el CPU no se
+    mezclen entre escenarios.
+    """
+    scenario = SCENARIOS[name]
+    server = None
+    destination = tempfile.mkdtemp(prefix='archdl-bench-')
+    env = dict(os.environ, QT_QPA_PLATFORM='offscreen', XDG_DATA_HOME=os.path.join(destination, '.datos'))
+    try:
+        if scenario.get('ytdlp'):
+            env['PATH'] = os.path.join(BENCHMARKS_DIR, 'fake-ytdlp') + os.pathsep + env.get('PATH', '')
+            url = 'https://www.youtube.com/watch?v=aQvGIIdgFDM'
+        else:
+            server, port = start_server(scenario['server'])
+            url = f'http://127.0.0.1:{port}/datos.bin'
+        
+        completed = subprocess.run([sys.executable, os.path.abspath(__file__), '--measure', name,
+                                    '--url', url, '--dest', destination],
+                                   capture_output=True, text=True, env=env)
+        if completed.returncode != 0:
+            raise RuntimeError(f"El escenario {name} falló:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        shutil.rmtree(destination, ignore_errors=True)
+
+def summarize(results):
+    """Mediana de cada métrica por escenario"""
+    summary = {}
+    for name in dict.fromkeys(result['scenario'] for result in results):
+        runs = [result for result in results if result['scenario'] == name]
+        summary[name] = {}
+        for metric in METRICS:
+            values = [run[metric] for run in runs if run.get(metric) is not None]
+            summary[name][metric] = round(statistics.median(values), 4) if values else None
+        summary[name]['success'] = all(run['success'] for run in runs)
+    return summary
+
+def compare(current, baseline, tolerance):
+    """Imprime las diferencias con otra ejecución. Devuelve cuántas métricas empeoraron más de tolerance"""
+    regressions = 0
+    print(f"\nComparación con {baseline.get('commit') or 'la ejecución anterior'} "
+          f"(tolerancia {tolerance:.0%}):")
+    for name, metrics in current['summary'].items():
+        previous = baseline.get('summary', {}).get(name)
+        if not previous:
+            continue
+        for metric, better in METRICS.items():
+            old, new = previous.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change > tolerance if better == 'menor' else change < -tolerance
+            regressions += worse
+            mark = "⚠️ " if worse else "   "
+            print(f"{mark}{name:26} {metric:16} {old:>10} → {new:<10} ({change:+.1%})")
+        if previous.get('success') and not metrics.get('success'):
+            regressions += 1
+            print(f"⚠️ {name:26} la descarga ya no termina correctamente")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de pruebas de rendimiento sin red")
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS),
+                        help="Escenario a ejecutar (se puede repetir; por defecto todos)")
+    parser.add_argument('--repeat', type=int, default=1, help="Repeticiones de cada escenario (se usa la mediana)")
+    parser.add_argument('--output', default='benchmark-resultados.json', metavar='ARCHIVO',
+                        help="Archivo JSON con los resultados")
+    parser.add_argument('--compare', metavar='ARCHIVO', help="Resultados anteriores con los que comparar")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Cambio relativo a partir del cual una métrica cuenta como regresión (por defecto 0.10)")
+    # Uso interno: medir un escenario dentro del proceso hijo
+    parser.add_argument('--measure', choices=list(SCENARIOS), help=argparse.SUPPRESS)
+    parser.add_argument('--url', help=argparse.SUPPRESS)
+    parser.add_argument('--dest', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.measure:
+        print(json.dumps(measure_download(args.measure, args.url, args.dest)))
+        return 0
+    
+    results = []
+    for name in args.scenario or list(SCENARIOS):
+        for _ in range(args.repeat):
+            result = run_scenario(name)
+            results.append(result)
+            status = "✅" if result['success'] else "❌"
+            print(f"{status} {name:26} {result['throughput_mb_s']:>8} MB/s  CPU {result['cpu_s']:>6} s  "
+                  f"RSS {result['peak_rss_mb']:>6} MB  {result['signals_per_s']:>6} señales/s  "
+                  f"TTFB {result['ttfb_s']} s", flush=True)
+    
+    report = {
+        'commit': git_commit(),
+        'date': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results,
+        'summary': summarize(results)
+    }
+    with open(args.output, 'w', encoding='utf-8') as output:
+        json.dump(report, output, indent=2, ensure_ascii=False)
+    print(f"\n📄 Resultados guardados en {args.output}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
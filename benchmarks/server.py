@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor HTTP local para los benchmarks
+
+Sirve archivos sintéticos (generados al vuelo, sin ocupar disco) con ancho
+de banda por conexión y total, latencia, límite de conexiones, soporte de
+rangos y fallos configurables.
+Se ejecuta en un proceso aparte para que su CPU no cuente en las medidas e
+imprime 'PORT <n>' en cuanto acepta conexiones.
+
+Uso: python benchmarks/server.py --file datos.bin:64M --bandwidth 20M --latency 0.02
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+import threading
+import http.server
+
+PATTERN_SIZE = 1024 * 1024
+SEND_SIZE = 64 * 1024
+
+def parse_size(text):
+    """Convierte tamaños como '512K', '64M' o '1G' a bytes"""
+    match = re.match(r'^\s*(\d+)\s*([KMG]?)\s*$', text, re.IGNORECASE)
+    if not match:
+        raise argparse.ArgumentTypeError(f"Tamaño no válido: {text}")
+    return int(match.group(1)) * 1024 ** ' KMG'.index(match.group(2).upper() or ' ')
+
+def parse_file(text):
+    """'nombre:tamaño' → (nombre, bytes)"""
+    name, _, size = text.rpartition(':')
+    if not name:
+        raise argparse.ArgumentTypeError(f"Archivo no válido (nombre:tamaño): {text}")
+    return name, parse_size(size)
+
+class SyntheticFile:
+    """Contenido determinista de un tamaño dado: un bloque pseudoaleatorio que se repite"""
+    
+    def __init__(self, size, seed=0):
+        self.size = size
+        # Dos copias seguidas para poder cortar cualquier trozo sin dar la vuelta
+        self.pattern = random.Random(seed).randbytes(PATTERN_SIZE) * 2
+    
+    def read(self, offset, length):
+        start = offset % PATTERN_SIZE
+        return self.pattern[start:start + min(length, PATTERN_SIZE)]
+
+class BenchmarkHandler(http.server.BaseHTTPRequestHandler):
+    """Responde GET/HEAD con los archivos sintéticos y las condiciones configuradas"""
+    
+    protocol_version = 'HTTP/1.1'
+    files = {}
+    bandwidth = 0        # bytes/s por conexión, 0 = sin límite
+    total_bandwidth = 0  # bytes/s repartidos entre todas las conexiones, 0 = sin límite
+    max_connections = 0  # respuestas simultáneas antes de contestar 429, 0 = sin límite
+    latency = 0.0        # segundos antes de enviar las cabeceras
+    ranges = True
+    failure_rate = 0.0   # probabilidad de que una respuesta falle
+    failure_status = 0   # 0 = cortar la conexión a mitad del cuerpo; si no, responder con ese código
+    etag = '"benchmark"'
+    rng = random.Random(1)
+    rng_lock = threading.Lock()
+    link_lock = threading.Lock()
+    link_free_at = 0.0   # instante en que el enlace compartido queda libre
+    active = 0
+    
+    def log_message(self, *args):
+        pass
+    
+    def do_HEAD(self):
+        self.respond(send_body=False)
+    
+    def do_GET(self):
+        self.respond(send_body=True)
+    
+    def failure_point(self):
+        """Devuelve en qué fracción del cuerpo falla esta respuesta, o None si no falla"""
+        with self.rng_lock:
+            if self.rng.random() >= self.failure_rate:
+                return None
+            return self.rng.random()
+    
+    def reserve_link(self, size):
+        """Espera el turno de enviar size bytes por el enlace compartido (--total-bandwidth)"""
+        cls = BenchmarkHandler
+        with cls.link_lock:
+            send_at = max(time.monotonic(), cls.link_free_at)
+            cls.link_free_at = send_at + size / self.total_bandwidth
+        delay = send_at - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    
+    def respond(self, send_body):
+        if not send_body or not self.max_connections:
+            self.send_file(send_body)
+            return
+        cls = BenchmarkHandler
+        with cls.link_lock:
+            cls.active += 1
+            refused = cls.active > self.max_connections
+        try:
+            if refused:
+                # Como un servidor que limita conexiones por cliente
+                self.send_response(429)
+                self.send_header('Retry-After', '1')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_file(send_body)
+        finally:
+            with cls.link_lock:
+                cls.active -= 1
+    
+    def send_file(self, send_body):
+        if self.latency:
+            time.sleep(self.latency)
+        
+        synthetic = self.files.get(self.path.lstrip('/').split('?')[0])
+        if synthetic is None:
+            self.send_error(404)
+            return
+        
+        failure = self.failure_point()
+        if failure is not None and self.failure_status:
+            self.send_error(self.failure_status)
+            return
+        
+        start, end, status = 0, synthetic.size - 1, 200
+        range_header = self.headers.get('Range')
+        if_range = self.headers.get('If-Range')
+        if range_header and self.ranges and (if_range is None or if_range == self.etag):
+            match = re.match(r'bytes=(\d+)-(\d*)$', range_header)
+            if match:
+                start = int(match.group(1))
+                end = min(int(match.group(2) or end), end)
+                status = 206
+        
+        length = end - start + 1
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(length))
+        self.send_header('ETag', self.etag)
+        if self.ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{synthetic.size}')
+        self.end_headers()
+        if not send_body:
+            return
+        
+        # Los fallos cortan la conexión en un punto aleatorio del cuerpo
+        cut_at = start + int(length * failure) if failure is not None else None
+        position = start
+        started = time.monotonic()
+        try:
+            while position <= end:
+                chunk = synthetic.read(position, min(SEND_SIZE, end + 1 - position))
+                if self.total_bandwidth:
+                    self.reserve_link(len(chunk))
+                if cut_at is not None and position + len(chunk) > cut_at:
+                    self.wfile.write(chunk[:cut_at - position])
+                    self.close_connection = True
+                    return
+                self.wfile.write(chunk)
+                position += len(chunk)
+                if self.bandwidth and position <= end:
+                    # Ritmo constante: esperar hasta el instante en que tocaría haber enviado position
+                    delay = (position - start) / self.bandwidth - (time.monotonic() - started)
+                    if delay > 0:
+                        time.sleep(delay)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor HTTP sintético para benchmarks")
+    parser.add_argument('--port', type=int, default=0, help="Puerto (0 = uno libre)")
+    parser.add_argument('--file', type=parse_file, action='append', default=[], metavar='NOMBRE:TAMAÑO',
+                        help="Archivo sintético a servir (se puede repetir)")
+    parser.add_argument('--bandwidth', type=parse_size, default=0, metavar='BYTES',
+                        help="Ancho de banda por conexión, p. ej. 20M (por defecto sin límite)")
+    parser.add_argument('--total-bandwidth', type=parse_size, default=0, metavar='BYTES',
+                        help="Ancho de banda total repartido entre las conexiones (por defecto sin límite)")
+    parser.add_argument('--max-connections', type=int, default=0, metavar='N',
+                        help="Respuestas simultáneas a partir de las cuales se contesta 429 (por defecto sin límite)")
+    parser.add_argument('--latency', type=float, default=0.0, metavar='SEGUNDOS',
+                        help="Retraso antes de cada respuesta")
+    parser.add_argument('--no-ranges', dest='ranges', action='store_false',
+                        help="No admitir peticiones de rango")
+    parser.add_argument('--failure-rate', type=float, default=0.0, metavar='P',
+                        help="Probabilidad de que una respuesta falle (0-1)")
+    parser.add_argument('--failure-status', type=int, default=0, metavar='CÓDIGO',
+                        help="Código HTTP de las respuestas fallidas (por defecto se corta la conexión)")
+    parser.add_argument('--seed', type=int, default=1, help="Semilla de los fallos aleatorios")
+    args = parser.parse_args()
+    
+    BenchmarkHandler.files = {name: SyntheticFile(size) for name, size in args.file}
+    BenchmarkHandler.bandwidth = args.bandwidth
+    BenchmarkHandler.total_bandwidth = args.total_bandwidth
+    BenchmarkHandler.max_connections = args.max_connections
+    BenchmarkHandler.latency = args.latency
+    BenchmarkHandler.ranges = args.ranges
+    BenchmarkHandler.failure_rate = args.failure_rate
+    BenchmarkHandler.failure_status = args.failure_status
+    BenchmarkHandler.rng = random.Random(args.seed)
+    
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', args.port), BenchmarkHandler)
+    server.daemon_threads = True
+    print(f"PORT {server.server_port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
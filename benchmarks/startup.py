@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Presupuesto de arranque de la interfaz
+
+Lanza varias veces descargador.py --startup-profile (con la plataforma
+offscreen de Qt y una carpeta de datos vacía), lee el tiempo hasta que la
+ventana se muestra y falla si la mediana supera el presupuesto. También
+comprueba que importar la interfaz no carga el motor de descargas ni sus
+dependencias pesadas, que deben cargarse la primera vez que hacen falta.
+
+Uso: python benchmarks/startup.py --runs 5 --limit 500
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from archdownloader.startup import STARTUP_BUDGET_MS
+
+# Módulos que no deben cargarse hasta la primera descarga o el primer uso
+DEFERRED_MODULES = ['archdownloader.core', 'archdownloader.metrics', 'archdownloader.ytdlp_pool',
+                    'requests', 'urllib3', 'http.server', 'subprocess']
+
+VISIBLE_LINE = re.compile(r'Ventana visible en (\d+) ms')
+
+def measure_startup(environment, timeout):
+    """Arranca la interfaz y devuelve (ms hasta la ventana visible, desglose impreso)"""
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT_DIR, 'descargador.py'), '--startup-profile'],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=environment)
+    lines = []
+    try:
+        for line in process.stderr:
+            lines.append(line.rstrip('\n'))
+            match = VISIBLE_LINE.search(line)
+            if match:
+                return int(match.group(1)), lines
+        raise RuntimeError("La interfaz terminó sin imprimir el perfil de arranque:\n" + "\n".join(lines))
+    finally:
+        process.kill()
+        process.wait(timeout)
+
+def loaded_at_import(environment):
+    """Módulos de DEFERRED_MODULES que quedan cargados tras importar la interfaz"""
+    code = ("import sys, json; import archdownloader.gui; "
+            f"print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, env=environment,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempo hasta que se muestra la ventana principal")
+    parser.add_argument('--runs', type=int, default=5, help="Arranques a medir (por defecto 5)")
+    parser.add_argument('--limit', type=int, default=STARTUP_BUDGET_MS,
+                        help=f"Mediana máxima en ms (por defecto {STARTUP_BUDGET_MS})")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Segundos de espera por arranque")
+    parser.add_argument('--show-profile', action='store_true', help="Mostrar el desglose del último arranque")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(prefix='archdl-startup-') as data_dir:
+        environment = dict(os.environ, XDG_DATA_HOME=data_dir)
+        environment.setdefault('QT_QPA_PLATFORM', 'offscreen')
+        
+        # El primer arranque calienta la caché de bytecode y la del disco; no cuenta
+        measure_startup(environment, args.timeout)
+        times = []
+        for _ in range(args.runs):
+            elapsed, lines = measure_startup(environment, args.timeout)
+            times.append(elapsed)
+        eager = loaded_at_import(environment)
+    
+    if args.show_profile:
+        print("\n".join(lines))
+    median = statistics.median(times)
+    print(json.dumps({'runs': times, 'median_ms': median, 'max_ms': max(times), 'limit_ms': args.limit,
+                      'loaded_at_import': eager}))
+    print(f"ventana visible: mediana {median:.0f} ms, máximo {max(times)} ms (límite {args.limit} ms)")
+    
+    failed = False
+    if median > args.limit:
+        print(f"❌ El arranque supera el presupuesto de {args.limit} ms")
+        failed = True
+    if eager:
+        print(f"❌ Importar la interfaz carga módulos que deberían diferirse: {', '.join(eager)}")
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del camino de escritura de las descargas directas
+
+Compara el CPU por GB del bucle anterior (iter_content de 8 KB y un write()
+por bloque) con el del motor actual (readinto sobre búfer reutilizable,
+bloques alineados de 1 MB con pwrite y espacio reservado con posix_fallocate).
+El archivo se sirve desde un proceso aparte para no contar el CPU del servidor.
+
+Uso: python benchmarks/write_path.py --size 512
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import resource
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from archdownloader.core import FILE_CATEGORIES, DownloadEngine
+from archdownloader.dedup import DEDUP_OFF
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(directory):
+    """Sirve la carpeta con http.server en otro proceso"""
+    port = free_port()
+    process = subprocess.Popen([sys.executable, '-m', 'http.server', str(port), '--bind', '127.0.0.1',
+                                '--directory', directory],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.05)
+    process.kill()
+    raise RuntimeError("El servidor de pruebas no arrancó")
+
+def legacy_download(url, destination):
+    """Bucle de escritura anterior: bloques de 8 KB y un write() por bloque"""
+    with requests.get(url, stream=True, timeout=30) as response:
+        response.raise_for_status()
+        with open(destination, 'wb') as file:
+            for chunk in response.iter_content(chunk_size=8192):
+                if chunk:
+                    file.write(chunk)
+
+def engine_download(url, destination_dir):
+    """Camino actual del motor con una sola conexión (mismo trabajo que el anterior)"""
+    engine = DownloadEngine(url, destination_dir, FILE_CATEGORIES, segments=1,
+                            dedup_policy=DEDUP_OFF, use_history=False)
+    success, message, filepath = engine.download_direct_file()
+    if not success:
+        raise RuntimeError(message)
+    return filepath
+
+def measure(name, size, function):
+    wall_start = time.monotonic()
+    cpu_start = cpu_seconds()
+    function()
+    cpu = cpu_seconds() - cpu_start
+    wall = time.monotonic() - wall_start
+    gigabytes = size / 1024 ** 3
+    return {
+        'path': name,
+        'bytes': size,
+        'cpu_s': round(cpu, 3),
+        'cpu_s_per_gb': round(cpu / gigabytes, 3),
+        'wall_s': round(wall, 3),
+        'mb_s': round(size / 1024 ** 2 / wall, 1)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU por GB del camino de escritura")
+    parser.add_argument('--size', type=int, default=512, help="Tamaño del archivo en MB (por defecto 512)")
+    parser.add_argument('--repeat', type=int, default=3, help="Repeticiones de cada camino (por defecto 3)")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as served, tempfile.TemporaryDirectory() as downloads:
+        source = os.path.join(served, 'datos.bin')
+        with open(source, 'wb') as file:
+            for _ in range(args.size):
+                file.write(os.urandom(1024 * 1024))
+        size = os.path.getsize(source)
+        
+        server, port = start_server(served)
+        url = f'http://127.0.0.1:{port}/datos.bin'
+        try:
+            results = []
+            for index in range(args.repeat):
+                legacy_path = os.path.join(downloads, f'anterior_{index}.bin')
+                results.append(measure('anterior', size, lambda: legacy_download(url, legacy_path)))
+                os.remove(legacy_path)
+                
+                results.append(measure('motor', size, lambda: os.remove(engine_download(url, downloads))))
+        finally:
+            server.terminate()
+            server.wait()
+    
+    for result in results:
+        print(json.dumps(result))
+    
+    for name in ('anterior', 'motor'):
+        best = min(result['cpu_s_per_gb'] for result in results if result['path'] == name)
+        print(f"{name}: {best} s de CPU por GB (mejor de {args.repeat})")
+
+if __name__ == "__main__":
+    main()
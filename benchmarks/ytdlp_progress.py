@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del análisis del progreso de yt-dlp
+
+Compara el coste por línea del análisis anterior (texto de --newline con
+expresiones regulares y búsqueda de palabras clave en cada línea) con el
+actual (JSON de --progress-template detrás de un marcador). Las líneas
+salen de la grabación de benchmarks/recordings, convertidas al formato JSON
+con el mismo código que usa el yt-dlp falso.
+
+Uso: python benchmarks/ytdlp_progress.py --repeat 200
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import importlib.util
+from importlib.machinery import SourceFileLoader
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIR))
+
+from archdownloader.core import YTDLP_PROGRESS_MARKER, YTDLP_LOG_KEYWORDS
+
+RECORDING = os.path.join(BENCHMARKS_DIR, 'recordings', 'ytdlp_progress.txt')
+
+def load_fake_ytdlp():
+    """Importa benchmarks/fake-ytdlp/yt-dlp (no tiene extensión .py)"""
+    loader = SourceFileLoader('fake_ytdlp', os.path.join(BENCHMARKS_DIR, 'fake-ytdlp', 'yt-dlp'))
+    spec = importlib.util.spec_from_loader('fake_ytdlp', loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+def legacy_parse(output):
+    """Análisis anterior de una línea de texto de yt-dlp"""
+    progress = None
+    re.match(r'\[(\w+)\]', output)
+    if '[download]' in output and '%' in output:
+        match = re.search(r'(\d+\.?\d*)%(?:\s+of\s+~?\s*(\S+))?', output)
+        if match:
+            size = re.match(r'([\d.]+)\s*([KMGT]?)i?B', match.group(2) or '')
+            total = int(float(size.group(1)) * 1024 ** ' KMGT'.index(size.group(2) or ' ')) if size else 0
+            progress = (float(match.group(1)), total)
+    any(keyword in output.lower() for keyword in ['title:', 'destination:', 'finished'])
+    return progress
+
+def structured_parse(output):
+    """Análisis actual: el progreso llega en JSON y no pasa por ninguna expresión regular"""
+    if output.startswith(YTDLP_PROGRESS_MARKER):
+        return json.loads(output[len(YTDLP_PROGRESS_MARKER):])
+    lowered = output.lower()
+    any(keyword in lowered for keyword in YTDLP_LOG_KEYWORDS)
+    return None
+
+def measure(name, lines, parse, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for line in lines:
+            parse(line)
+    elapsed = time.perf_counter() - start
+    updates = len(lines) * repeat
+    return {
+        'path': name,
+        'lines': updates,
+        'total_s': round(elapsed, 3),
+        'us_per_line': round(elapsed / updates * 1e6, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Coste por línea del análisis del progreso de yt-dlp")
+    parser.add_argument('--repeat', type=int, default=200, help="Veces que se recorre la grabación (por defecto 200)")
+    args = parser.parse_args()
+    
+    fake = load_fake_ytdlp()
+    with open(RECORDING, 'r', encoding='utf-8') as recording:
+        text_lines = [line.rstrip('\n').partition('\t')[2] for line in recording]
+    json_lines = []
+    for line in text_lines:
+        progress = fake.progress_json(line)
+        json_lines.append(YTDLP_PROGRESS_MARKER + progress if progress else line)
+    
+    results = [measure('anterior', text_lines, legacy_parse, args.repeat),
+               measure('json', json_lines, structured_parse, args.repeat)]
+    for result in results:
+        print(json.dumps(result))
+    
+    legacy, structured = (result['us_per_line'] for result in results)
+    print(f"anterior: {legacy} µs por línea · json: {structured} µs por línea "
+          f"({(structured - legacy) / legacy:+.0%})")
+
+if __name__ == "__main__":
+    main()
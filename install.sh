@@ -160,6 +160,17 @@ else
     cp "$DESCARGADOR_FILE" "$DEST_FILE"
     chmod +x "$DEST_FILE"
     print_success "Archivo copiado y configurado como ejecutable"
+    
+    # Copiar el paquete con el núcleo, la cola, el modo por lotes y la interfaz
+    SOURCE_DIR="$(dirname "$DESCARGADOR_FILE")"
+    if [[ -d "$SOURCE_DIR/archdownloader" ]]; then
+        rm -rf "$APP_DIR/archdownloader"
+        cp -r "$SOURCE_DIR/archdownloader" "$APP_DIR/"
+        print_success "Paquete archdownloader copiado"
+    else
+        print_error "No se encontró la carpeta archdownloader junto a $DESCARGADOR_FILE"
+        exit 1
+    fi
 fi
 
 # Crear script de lanzamiento en /usr/local/bin
@@ -230,6 +241,10 @@ fi
 echo -e "\${BLUE}ℹ️  Actualizando desde: \$ORIGINAL_FILE\${NC}"
 cp "\$ORIGINAL_FILE" "$APP_DIR/descargador.py"
 chmod +x "$APP_DIR/descargador.py"
+if [[ -d "\$(dirname "\$ORIGINAL_FILE")/archdownloader" ]]; then
+    rm -rf "$APP_DIR/archdownloader"
+    cp -r "\$(dirname "\$ORIGINAL_FILE")/archdownloader" "$APP_DIR/"
+fi
 
 echo -e "\${GREEN}✅ Actualización completada\${NC}"
 echo ""
@@ -144,6 +144,11 @@ echo -e "${BLUE}ℹ️  Destino: $APP_DIR/descargador.py${NC}"
 
 if cp "$selected_file" "$APP_DIR/descargador.py"; then
     chmod +x "$APP_DIR/descargador.py"
+    # El lanzador necesita el paquete archdownloader que está a su lado
+    if [[ -d "$(dirname "$selected_file")/archdownloader" ]]; then
+        rm -rf "$APP_DIR/archdownloader"
+        cp -r "$(dirname "$selected_file")/archdownloader" "$APP_DIR/"
+    fi
     echo -e "${GREEN}✅ Archivo actualizado correctamente${NC}"
 else
     echo -e "${RED}❌ Error al copiar el archivo${NC}"
@@ -158,16 +163,10 @@ fi
 
 # Verificar que el archivo actualizado funciona
 echo -e "${BLUE}ℹ️  Verificando que el archivo actualizado funciona...${NC}"
-if python -c "
+if python "$APP_DIR/descargador.py" --help >/dev/null 2>&1 && python -c "
 import sys
 sys.path.insert(0, '$APP_DIR')
-try:
-    exec(open('$APP_DIR/descargador.py').read())
-except SystemExit:
-    pass  # Es normal que termine con sys.exit()
-except Exception as e:
-    print(f'Error: {e}')
-    sys.exit(1)
+import archdownloader.core, archdownloader.gui
 print('OK')
 " >/dev/null 2>&1; then
     echo -e "${GREEN}✅ Verificación exitosa${NC}"